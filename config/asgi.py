@@ -3,6 +3,9 @@ ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Async endpoints (/api/async/..., mock external API) need an ASGI server:
+    uvicorn config.asgi:application --workers 1
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,6 +45,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Первым: время запроса включает все остальные middleware
+    'wells.instrumentation.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -78,12 +81,63 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DB_ENGINE=postgres - рабочий профиль PostgreSQL (параметры из окружения),
+# иначе SQLite для разработки (WAL и PRAGMA настраиваются в wells.signals)
+if os.environ.get('DB_ENGINE') == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('POSTGRES_DB', 'wells'),
+            'USER': os.environ.get('POSTGRES_USER', 'wells'),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            # Постоянные соединения с проверкой перед повторным использованием
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            # За PgBouncer (DB_POOLER=pgbouncer, режим transaction) серверные курсоры недоступны
+            'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('DB_POOLER') == 'pgbouncer',
+            'OPTIONS': {
+                'connect_timeout': 5,
+                'application_name': 'wells',
+            },
+        }
     }
-}
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            # Ожидание блокировки записи вместо немедленной ошибки "database is locked"
+            'OPTIONS': {'timeout': 20},
+        }
+    }
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# По умолчанию - LRU-кэш в памяти процесса. Для нескольких процессов
+# (веб-сервер и sync_wells) нужен общий кэш: задайте REDIS_URL. Без него
+# изменения из другого процесса видны в API только через WELLS_CACHE_TIMEOUT.
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'wells',
+            'OPTIONS': {'MAX_ENTRIES': 5000},
+        }
+    }
+
+# Время жизни кэшированных ответов API скважин и их версий (ETag), секунд
+WELLS_CACHE_TIMEOUT = 60
 
 
 # Password validation
@@ -158,3 +212,40 @@ CORS_ALLOW_HEADERS = [
     'x-csrftoken',
     'x-requested-with',
 ]
+
+# Внешнее API системы мониторинга скважин (по умолчанию - встроенный mock_external_api)
+EXTERNAL_API_URL = os.environ.get('EXTERNAL_API_URL', 'http://127.0.0.1:8000/mock-external/api/v1')
+EXTERNAL_API_KEY = 'test_api_key_12345'
+
+# Mock внешнего API: режим нагрузочного тестирования (см. mock_external_api.views.MOCK_DEFAULTS)
+MOCK_EXTERNAL_API = {
+    'LOAD_TEST': os.environ.get('MOCK_LOAD_TEST') == '1',
+    'FLEET_SIZE': int(os.environ.get('MOCK_FLEET_SIZE', 10)),
+    'SEED': int(os.environ.get('MOCK_SEED', 42)),
+}
+
+# Переводить скважину в статус «Аварийная» при критической аномалии телеметрии
+ANOMALY_ESCALATE_EMERGENCY = False
+
+# Метрики запросов и внешнего API на /metrics (см. wells.instrumentation)
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+
+# Холодное хранилище телеметрии (manage.py tier_telemetry): показания старше
+# TELEMETRY_COLD_AFTER_DAYS переносятся из БД в файлы .npy по скважинам и месяцам
+TELEMETRY_COLD_DIR = os.environ.get('TELEMETRY_COLD_DIR', str(BASE_DIR / 'telemetry_cold'))
+TELEMETRY_COLD_AFTER_DAYS = 365
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {'format': '%(asctime)s - %(name)s - %(levelname)s - %(message)s'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'simple'},
+    },
+    'loggers': {
+        'wells': {'handlers': ['console'], 'level': 'INFO'},
+        'mock_external_api': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
@@ -18,6 +18,8 @@ from django.contrib import admin
 from django.urls import path, include
 from django.http import HttpResponse  # ← добавьте
 
+from wells.instrumentation import metrics_view
+
 
 # Простой корневой view для проверки
 def home_view(request):
@@ -36,4 +38,5 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('wells.urls')),
     path('mock-external/', include('mock_external_api.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
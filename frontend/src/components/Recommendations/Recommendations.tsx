@@ -1,4 +1,4 @@
-import React from 'react';
+import React, { useEffect, useState } from 'react';
 import { motion } from 'framer-motion';
 import {
   Typography, Box, Card, CardContent, Chip,
@@ -8,41 +8,42 @@ import {
   TrendingUp, Warning, Build,
   CheckCircle, Schedule, PriorityHigh
 } from '@mui/icons-material';
+import { apiClient } from '../../services/api';
+
+interface Recommendation {
+  id: number;
+  well: string;
+  type: string;
+  title: string;
+  description: string;
+  priority: string;
+  economicEffect: string;
+  status: string;
+}
 
 const Recommendations = () => {
-  // Тестовые данные рекомендаций
-  const recommendations = [
-    {
-      id: 1,
-      well: 'СКВ-001',
-      type: 'optimization',
-      title: 'Оптимизация режима работы',
-      description: 'Рекомендуется увеличить давление на 15% для повышения дебита',
-      priority: 'high',
-      economicEffect: '+850 тыс. руб/мес',
-      status: 'pending'
-    },
-    {
-      id: 2,
-      well: 'СКВ-003',
-      type: 'maintenance',
-      title: 'Плановое обслуживание',
-      description: 'Требуется замена фильтра согласно регламенту',
-      priority: 'medium',
-      economicEffect: 'Предотвращение простоя: 1.2 млн руб',
-      status: 'accepted'
-    },
-    {
-      id: 3,
-      well: 'СКВ-007',
-      type: 'emergency',
-      title: 'Аварийная ситуация',
-      description: 'Обнаружена утечка в трубопроводе',
-      priority: 'critical',
-      economicEffect: 'Срочный ремонт предотвратит убытки: 3.5 млн руб',
-      status: 'pending'
-    },
-  ];
+  // Рекомендации рассчитываются на сервере (/api/recommendations/)
+  const [recommendations, setRecommendations] = useState<Recommendation[]>([]);
+
+  useEffect(() => {
+    apiClient.get('/recommendations/')
+      .then(response => {
+        setRecommendations(response.data.map((rec: any) => ({
+          id: rec.id,
+          well: rec.well_number,
+          type: rec.type,
+          title: rec.title,
+          description: rec.description,
+          priority: rec.priority,
+          economicEffect: rec.economic_effect || '—',
+          status: rec.status,
+        })));
+      })
+      .catch(error => console.error('Ошибка загрузки рекомендаций:', error));
+  }, []);
+
+  const countByPriority = (priority: string) =>
+    recommendations.filter(rec => rec.priority === priority).length;
 
   const getPriorityColor = (priority: string) => {
     switch (priority) {
@@ -105,9 +106,9 @@ const Recommendations = () => {
                   ⚡ Приоритеты
                 </Typography>
                 <Box display="flex" gap={1} flexWrap="wrap" sx={{ mt: 2 }}>
-                  <Chip label="1 критическая" color="error" size="small" />
-                  <Chip label="1 высокая" color="warning" size="small" />
-                  <Chip label="1 средняя" color="info" size="small" />
+                  <Chip label={`${countByPriority('critical')} критическая`} color="error" size="small" />
+                  <Chip label={`${countByPriority('high')} высокая`} color="warning" size="small" />
+                  <Chip label={`${countByPriority('medium')} средняя`} color="info" size="small" />
                 </Box>
               </CardContent>
             </Card>
@@ -39,4 +39,46 @@ mockExternalApiClient.interceptors.response.use(
     console.error('[Mock API Response Error]', error.response?.status, error.message);
     return Promise.reject(error);
   }
-);
\ No newline at end of file
+);
+
+// Кадр потока изменений скважин (/api/async/wells/events/, только ASGI)
+export interface WellUpdateFrame {
+  cursor: string;
+  wells: Record<string, any>[];
+  deleted: { id: number; well_number: string; deleted_at: string }[];
+  telemetry: Record<string, {
+    timestamps: number[];
+    temperature: number[];
+    pressure: number[];
+    flow_rate: number[];
+  }>;
+}
+
+export interface WellUpdateSubscription {
+  ids?: number[];
+  fields?: string[];
+  // Курсор /api/wells/changes/, с которого догнать пропущенные изменения
+  since?: string;
+}
+
+// Подписка на изменения скважин через EventSource (переподключается сам,
+// пропущенные изменения догоняются по Last-Event-ID). onResync - список
+// нужно перечитать целиком. Возвращает функцию отписки.
+export function subscribeWellUpdates(
+  subscription: WellUpdateSubscription,
+  onUpdate: (frame: WellUpdateFrame) => void,
+  onResync?: () => void
+): () => void {
+  const params = new URLSearchParams();
+  if (subscription.ids?.length) params.set('ids', subscription.ids.join(','));
+  if (subscription.fields?.length) params.set('field', subscription.fields.join(','));
+  if (subscription.since) params.set('since', subscription.since);
+
+  const source = new EventSource(`${API_CONFIG.baseURL}/api/async/wells/events/?${params}`);
+  source.addEventListener('update', event => {
+    onUpdate(JSON.parse((event as MessageEvent).data));
+  });
+  source.addEventListener('resync', () => onResync?.());
+  source.onerror = () => console.warn('[Events] Соединение прервано, переподключение...');
+  return () => source.close();
+}
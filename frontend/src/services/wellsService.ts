@@ -36,6 +36,29 @@ export interface TelemetryData {
   points: number;
 }
 
+export interface TelemetryBatchData {
+  parameters: string[];
+  units: Record<string, string>;
+  telemetry: Record<string, TelemetryData['telemetry']>;
+  missing: string[];
+  period_hours: number;
+  points: number;
+}
+
+// Ответ /api/wells/telemetry/batch/ (наш API)
+export interface WellsTelemetryBatch {
+  parameters: string[];
+  units: Record<string, string>;
+  wells: {
+    id: number;
+    well_id: string;
+    telemetry: TelemetryData['telemetry'];
+    points: number;
+    source_points: number;
+  }[];
+  missing: number[];
+}
+
 export interface ApiResponse<T> {
   success: boolean;
   data: T;
@@ -123,6 +146,23 @@ export class ExternalWellService {
     }
   }
 
+  // Получить телеметрию нескольких скважин одним запросом
+  async getWellsTelemetry(ids: string[], hours: number = 24, points: number = 100): Promise<TelemetryBatchData> {
+    try {
+      if (this.useMock) {
+        const response = await mockExternalApiClient.get<ApiResponse<TelemetryBatchData>>('/api/v1/telemetry/', {
+          params: { well_ids: ids.join(','), hours, points },
+        });
+        return response.data.data;
+      } else {
+        throw new Error('Real external API not implemented yet');
+      }
+    } catch (error) {
+      console.error('Error fetching telemetry batch:', error);
+      throw error;
+    }
+  }
+
   // Проверить доступность API
   async checkHealth(): Promise<{ status: string; [key: string]: any }> {
     try {
@@ -152,3 +192,62 @@ export class ExternalWellService {
 
 // Создаем и экспортируем экземпляр сервиса
 export const externalWellService = new ExternalWellService();
+
+// Телеметрия скважин дашборда из нашего API одним запросом
+export async function fetchWellsTelemetryBatch(
+  ids: number[],
+  hours: number = 24,
+  points: number = 100
+): Promise<WellsTelemetryBatch> {
+  const response = await apiClient.get<WellsTelemetryBatch>('/wells/telemetry/batch/', {
+    params: { ids: ids.join(','), hours, points },
+  });
+  return response.data;
+}
+
+// Скважина в формате нашего API (WellSerializer)
+export interface Well {
+  id: number;
+  well_number: string;
+  field: string;
+  latitude: string;
+  longitude: string;
+  depth: number;
+  status: 'active' | 'inactive' | 'maintenance' | 'emergency';
+  status_display: string;
+  current_pressure: number | null;
+  measured_flow_rate: number | null;
+  temperature: number | null;
+  last_data_update: string;
+}
+
+// Ответ /api/wells/changes/
+export interface WellChanges {
+  cursor: string;
+  has_more: boolean;
+  updated: Well[];
+  deleted: { id: number; well_number: string; deleted_at: string }[];
+}
+
+// Изменения скважин после курсора (без курсора - весь список), все страницы подряд
+export async function fetchWellChanges(since?: string): Promise<WellChanges> {
+  const result: WellChanges = { cursor: since || '', has_more: false, updated: [], deleted: [] };
+  do {
+    const response = await apiClient.get<WellChanges>('/wells/changes/', {
+      params: result.cursor ? { since: result.cursor } : {},
+    });
+    result.cursor = response.data.cursor;
+    result.has_more = response.data.has_more;
+    result.updated.push(...response.data.updated);
+    result.deleted.push(...response.data.deleted);
+  } while (result.has_more);
+  return result;
+}
+
+// Применяет изменения к загруженному ранее списку (по id скважины)
+export function applyWellChanges(wells: Well[], changes: WellChanges): Well[] {
+  const byId = new Map(wells.map(well => [well.id, well]));
+  changes.deleted.forEach(item => byId.delete(item.id));
+  changes.updated.forEach(well => byId.set(well.id, well));
+  return Array.from(byId.values()).sort((a, b) => a.well_number.localeCompare(b.well_number));
+}
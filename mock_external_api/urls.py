@@ -6,6 +6,7 @@ urlpatterns = [
     path('api/v1/wells/', views.wells_list, name='mock_wells_list'),
     path('api/v1/wells/<str:well_id>/', views.well_detail, name='mock_well_detail'),
     path('api/v1/wells/<str:well_id>/telemetry/', views.well_telemetry, name='mock_well_telemetry'),
+    path('api/v1/telemetry/', views.telemetry_batch, name='mock_telemetry_batch'),
     path('api/v1/health/', views.health_check, name='mock_health_check'),
 
     # Корневой эндпоинт с документацией
@@ -1,62 +1,204 @@
-import math
+import asyncio
 import random
 import time
 import logging
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from typing import Optional
 
+import numpy as np
+from django.conf import settings
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_GET
 
+from wells.decorators import async_get
+
 logger = logging.getLogger(__name__)
 
 
+# Режим нагрузочного тестирования: настройки по умолчанию
+# (переопределяются MOCK_EXTERNAL_API в settings и параметрами запроса)
+MOCK_DEFAULTS = {
+    "LOAD_TEST": False,     # детерминированный фонд произвольного размера
+    "FLEET_SIZE": 10,       # количество скважин (до MAX_FLEET_SIZE)
+    "SEED": 42,             # seed детерминированной генерации
+    "LATENCY": True,        # имитировать сетевые задержки
+    "FAILURE_RATE": None,   # доля сбоев; None - как у реального API (3% / 1%)
+    "PAGE_SIZE": 100,       # размер страницы списка скважин
+}
+MAX_FLEET_SIZE = 100000
+MAX_PAGE_SIZE = 1000
+MAX_BATCH_WELLS = 500
+TELEMETRY_PARAMETERS = ["temperature", "pressure", "flow_rate"]
+TELEMETRY_UNITS = {"temperature": "°C", "pressure": "атм", "flow_rate": "м³/сут"}
+FIELD_NAMES = ["Северное", "Южное", "Западное"]
+OPERATORS = ["Газпром", "Лукойл", "Роснефть"]
+
+
+@dataclass
+class MockConfig:
+    load_test: bool
+    fleet_size: int
+    seed: int
+    latency: bool
+    failure_rate: Optional[float]
+    page_size: int
+
+    async def sleep(self, low, high):
+        """Имитация сетевой задержки (если не отключена); не блокирует поток"""
+        if self.latency:
+            await asyncio.sleep(random.uniform(low, high))
+
+    def fails(self, default_rate):
+        """Имитация случайного сбоя с заданной вероятностью"""
+        rate = default_rate if self.failure_rate is None else self.failure_rate
+        return random.random() < rate
+
+    def well_rng(self, well_number):
+        """Генератор случайных чисел скважины: детерминированный в режиме нагрузки"""
+        return random.Random(f"{self.seed}:{well_number}") if self.load_test else random
+
+
+def _flag(value):
+    return str(value).lower() in ("1", "true", "yes", "on")
+
+
+def get_mock_config(request):
+    """
+    Настройки mock API: MOCK_DEFAULTS <- settings.MOCK_EXTERNAL_API <- параметры запроса
+    (load_test, fleet_size, seed, latency, failure_rate, page_size).
+    """
+    config = {**MOCK_DEFAULTS, **getattr(settings, "MOCK_EXTERNAL_API", {})}
+    params = request.GET
+    load_test = _flag(params.get("load_test", config["LOAD_TEST"]))
+    try:
+        failure_rate = params.get("failure_rate", config["FAILURE_RATE"])
+        return MockConfig(
+            load_test=load_test,
+            fleet_size=min(max(int(params.get("fleet_size", config["FLEET_SIZE"])), 1), MAX_FLEET_SIZE),
+            seed=int(params.get("seed", config["SEED"])),
+            latency=_flag(params.get("latency", config["LATENCY"])),
+            failure_rate=None if failure_rate is None else float(failure_rate),
+            page_size=min(max(int(params.get("page_size", config["PAGE_SIZE"])), 1), MAX_PAGE_SIZE),
+        )
+    except ValueError as e:
+        raise ValueError(f"Некорректный параметр mock API: {e}")
+
+
+def parse_well_number(well_id):
+    """Номер скважины из well_id формата "WELL-001" (None при неверном формате)"""
+    try:
+        return int(well_id.split("-")[1])
+    except (IndexError, ValueError):
+        return None
+
+
+def format_well_id(number):
+    return f"WELL-{number:03d}"
+
+
+# Генератор данных одной скважины - O(1), без генерации предыдущих
+def generate_mock_well(number, rng=random, deterministic=False):
+    """Генерирует данные скважины с номером number"""
+    # Базовые значения с небольшими случайными отклонениями
+    base_temp = 80 + rng.uniform(0, 25)
+    base_flow = 50 + rng.uniform(0, 150)
+    base_pressure = 30 + rng.uniform(0, 25)
+
+    # Добавляем тренд по времени (чтобы данные менялись); в режиме нагрузки данные постоянны
+    time_factor = 0 if deterministic else time.time() / 10000
+
+    if deterministic:
+        # Фонд нагрузочного теста разнесен по региону, чтобы гео-запросы были осмысленными
+        coordinates = {"lat": 55 + rng.uniform(0, 10), "lon": 60 + rng.uniform(0, 20)}
+    else:
+        coordinates = {"lat": 55.75 + rng.uniform(-0.01, 0.01), "lon": 37.61 + rng.uniform(-0.01, 0.01)}
+
+    return {
+        "well_id": format_well_id(number),
+        "temperature": round(base_temp + rng.uniform(-2, 2) + time_factor % 5, 1),
+        "flow_rate": round(base_flow + rng.uniform(-10, 10) + time_factor % 20, 1),
+        "pressure": round(base_pressure + rng.uniform(-1, 1) + time_factor % 3, 1),
+        "coordinates": coordinates,
+        "depth": round(2000 + rng.uniform(0, 1500), 1),
+        "status": rng.choice(["active", "active", "active", "maintenance", "inactive"]),
+        "last_updated": datetime.now().isoformat()
+    }
+
+
 # Генератор случайных данных скважин
 def generate_mock_wells(count=3):
     """Генерирует случайные данные скважин"""
-    wells = []
-    for i in range(1, count + 1):
-        # Базовые значения с небольшими случайными отклонениями
-        base_temp = 80 + random.uniform(0, 25)
-        base_flow = 50 + random.uniform(0, 150)
-        base_pressure = 30 + random.uniform(0, 25)
-
-        # Добавляем тренд по времени (чтобы данные менялись)
-        time_factor = time.time() / 10000
-
-        well = {
-            "well_id": f"WELL-{i:03d}",
-            "temperature": round(base_temp + random.uniform(-2, 2) + time_factor % 5, 1),
-            "flow_rate": round(base_flow + random.uniform(-10, 10) + time_factor % 20, 1),
-            "pressure": round(base_pressure + random.uniform(-1, 1) + time_factor % 3, 1),
-            "coordinates": {
-                "lat": 55.75 + random.uniform(-0.01, 0.01),
-                "lon": 37.61 + random.uniform(-0.01, 0.01)
-            },
-            "depth": round(2000 + random.uniform(0, 1500), 1),
-            "status": random.choice(["active", "active", "active", "maintenance", "inactive"]),
-            "last_updated": datetime.now().isoformat()
-        }
-        wells.append(well)
-    return wells
+    return [generate_mock_well(i) for i in range(1, count + 1)]
 
 
-@require_GET
-@csrf_exempt
-def wells_list(request):
+def generate_telemetry(base, hours, points, rng=None, align=False):
+    """
+    Телеметрия скважины за последние hours часов, points точек (векторно, NumPy).
+    base - базовые значения (temperature, pressure, flow_rate);
+    rng - numpy Generator, None - недетерминированный шум;
+    align - выравнивать метки по шагу, чтобы повторный запрос возвращал те же точки.
+    """
+    rng = rng or np.random.default_rng()
+
+    # Временные метки (последние N часов), от старых к новым
+    step = hours * 3600 / points
+    now = time.time()
+    if align:
+        now -= now % step
+    steps = np.arange(points - 1, -1, -1)
+    timestamps = (now - steps * step).astype(np.int64)
+
+    # Базовые значения с трендом и сезонностью
+    base_temp, base_pressure, base_flow = base
+
+    # Тренд + шум + сезонность (синус)
+    season = np.sin(timestamps / 10000) * 3  # Сезонные колебания
+    noise = rng.uniform(-1, 1, points)
+    trend = np.arange(points) * 0.01
+
+    return {
+        "timestamps": timestamps.tolist(),
+        "temperature": np.round(base_temp + season + noise + trend, 1).tolist(),
+        "pressure": np.round(base_pressure + season * 0.5 + noise * 0.5, 1).tolist(),
+        "flow_rate": np.round(np.maximum(0, base_flow + season * 2 + noise * 2), 1).tolist()  # Не отрицательный
+    }
+
+
+def well_telemetry_data(config, well_number, hours, points):
+    """Телеметрия скважины с учетом режима (обычный / нагрузочный)"""
+    if config.load_test:
+        # Уровни совпадают с данными скважины в списке, шум детерминирован по seed
+        well = generate_mock_well(well_number, config.well_rng(well_number), deterministic=True)
+        base = (well["temperature"], well["pressure"], well["flow_rate"])
+        return generate_telemetry(
+            base, hours, points, np.random.default_rng([config.seed, well_number]), align=True
+        )
+    base = (80 + well_number * 2, 35 + well_number * 1.5, 100 + well_number * 10)
+    return generate_telemetry(base, hours, points)
+
+
+@async_get
+async def wells_list(request):
     """
     Эндпоинт: GET /api/v1/wells/
     Возвращает список всех скважин с телеметрией.
     Имитирует внешнее API системы мониторинга.
+    В режиме нагрузки (load_test=1) список постраничный: page, page_size.
     """
     logger.info(f"Mock API: запрос списка скважин от {request.META.get('REMOTE_ADDR')}")
+    try:
+        config = get_mock_config(request)
+        page = max(int(request.GET.get("page", 1)), 1)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
 
     # Имитация сетевой задержки (50-500ms)
-    delay = random.uniform(0.05, 0.5)
-    time.sleep(delay)
+    await config.sleep(0.05, 0.5)
 
     # Имитация случайных сбоев API (3% случаев)
-    if random.random() < 0.03:
+    if config.fails(0.03):
         logger.warning("Mock API: имитация сбоя API (503)")
         return JsonResponse(
             {"error": "Service temporarily unavailable"},
@@ -65,8 +207,23 @@ def wells_list(request):
         )
 
     # Генерируем данные
-    count = random.randint(2, 10)  # Случайное количество скважин
-    wells_data = generate_mock_wells(count)
+    pagination = None
+    if config.load_test:
+        first = (page - 1) * config.page_size + 1
+        last = min(first + config.page_size - 1, config.fleet_size)
+        wells_data = [
+            generate_mock_well(number, config.well_rng(number), deterministic=True)
+            for number in range(first, last + 1)
+        ]
+        pagination = {
+            "page": page,
+            "page_size": config.page_size,
+            "total": config.fleet_size,
+            "has_next": last < config.fleet_size,
+        }
+    else:
+        count = random.randint(2, 10)  # Случайное количество скважин
+        wells_data = generate_mock_wells(count)
 
     # Форматируем ответ как у реального API
     response_data = {
@@ -78,51 +235,55 @@ def wells_list(request):
             "api_version": "1.0.0"
         }
     }
+    if pagination:
+        response_data["data"]["pagination"] = pagination
 
     logger.info(f"Mock API: возвращено {len(wells_data)} скважин")
     return JsonResponse(response_data)
 
 
-@require_GET
-@csrf_exempt
-def well_detail(request, well_id):
+@async_get
+async def well_detail(request, well_id):
     """
     Эндпоинт: GET /api/v1/wells/{well_id}/
     Возвращает данные конкретной скважины.
     """
     logger.info(f"Mock API: запрос скважины {well_id}")
+    try:
+        config = get_mock_config(request)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
 
     # Имитация задержки
-    time.sleep(random.uniform(0.1, 0.3))
+    await config.sleep(0.1, 0.3)
 
     # Парсим номер из well_id (формат "WELL-001")
-    try:
-        well_number = int(well_id.split("-")[1])
-    except (IndexError, ValueError):
+    well_number = parse_well_number(well_id)
+    if well_number is None:
         logger.warning(f"Mock API: некорректный ID скважины {well_id}")
         return JsonResponse(
             {"error": f"Invalid well ID format: {well_id}"},
             status=400
         )
 
-    # Проверяем существование скважины (только WELL-001..WELL-010)
-    if well_number < 1 or well_number > 10:
+    # Проверяем существование скважины (WELL-001..WELL-<размер фонда>)
+    if well_number < 1 or well_number > config.fleet_size:
         logger.warning(f"Mock API: скважина {well_id} не найдена")
         return JsonResponse(
             {"error": f"Well {well_id} not found"},
             status=404
         )
 
-    # Генерируем данные для этой скважины
-    wells_data = generate_mock_wells(well_number)  # Генерируем до нужного номера
-    well_data = wells_data[-1]  # Берем последнюю (нужная нам)
+    # Генерируем данные только этой скважины
+    rng = config.well_rng(well_number)
+    well_data = generate_mock_well(well_number, rng, deterministic=config.load_test)
     well_data["well_id"] = well_id  # Гарантируем правильный ID
 
     # Добавляем дополнительную информацию
     well_data.update({
         "installation_date": "2020-05-15",
-        "field_name": random.choice(["Северное", "Южное", "Западное"]),
-        "operator": random.choice(["Газпром", "Лукойл", "Роснефть"]),
+        "field_name": rng.choice(FIELD_NAMES),
+        "operator": rng.choice(OPERATORS),
         "last_maintenance": "2024-11-20"
     })
 
@@ -134,9 +295,8 @@ def well_detail(request, well_id):
     return JsonResponse(response_data)
 
 
-@require_GET
-@csrf_exempt
-def well_telemetry(request, well_id):
+@async_get
+async def well_telemetry(request, well_id):
     """
     Эндпоинт: GET /api/v1/wells/{well_id}/telemetry/
     Возвращает исторические данные телеметрии.
@@ -144,65 +304,92 @@ def well_telemetry(request, well_id):
     """
     logger.info(f"Mock API: запрос телеметрии скважины {well_id}")
 
-    # Имитация задержки
-    time.sleep(random.uniform(0.2, 0.8))
-
     # Параметры запроса
-    hours = int(request.GET.get("hours", 24))  # За сколько часов данные
-    points = int(request.GET.get("points", 100))  # Количество точек
-    points = min(points, 1000)  # Лимит
+    try:
+        config = get_mock_config(request)
+        hours = int(request.GET.get("hours", 24))  # За сколько часов данные
+        points = int(request.GET.get("points", 100))  # Количество точек
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    hours = max(hours, 1)
+    points = min(max(points, 1), 1000)  # Лимит
+
+    # Имитация задержки
+    await config.sleep(0.2, 0.8)
 
     # Проверяем существование скважины
-    try:
-        well_number = int(well_id.split("-")[1])
-        if well_number < 1 or well_number > 10:
-            return JsonResponse({"error": "Well not found"}, status=404)
-    except:
+    well_number = parse_well_number(well_id)
+    if well_number is None:
         return JsonResponse({"error": "Invalid well ID"}, status=400)
+    if well_number < 1 or well_number > config.fleet_size:
+        return JsonResponse({"error": "Well not found"}, status=404)
 
-    # Генерируем временные метки (последние N часов)
-    now = time.time()
-    timestamps = [
-                     int(now - i * (hours * 3600 / points))
-                     for i in range(points)
-                 ][::-1]  # От старых к новым
-
-    # Базовые значения с трендом и сезонностью
-    base_temp = 80 + well_number * 2
-    base_pressure = 35 + well_number * 1.5
-    base_flow = 100 + well_number * 10
-
-    # Генерируем телеметрию
-    telemetry = {
-        "timestamps": timestamps,
-        "temperature": [],
-        "pressure": [],
-        "flow_rate": []
+    response_data = {
+        "success": True,
+        "data": {
+            "well_id": well_id,
+            "parameters": TELEMETRY_PARAMETERS,
+            "units": TELEMETRY_UNITS,
+            "telemetry": well_telemetry_data(config, well_number, hours, points),
+            "period_hours": hours,
+            "points": points
+        }
     }
 
-    for i, ts in enumerate(timestamps):
-        # Тренд + шум + сезонность (синус)
-        time_factor = ts / 10000
-        season = math.sin(time_factor) * 3  # Сезонные колебания
-        noise = random.uniform(-1, 1)
+    return JsonResponse(response_data)
 
-        telemetry["temperature"].append(
-            round(base_temp + season + noise + (i * 0.01), 1)
-        )
-        telemetry["pressure"].append(
-            round(base_pressure + season * 0.5 + noise * 0.5, 1)
-        )
-        telemetry["flow_rate"].append(
-            round(max(0, base_flow + season * 2 + noise * 2), 1)  # Не отрицательный
+
+@async_get
+async def telemetry_batch(request):
+    """
+    Эндпоинт: GET /api/v1/telemetry/?well_ids=WELL-001,WELL-002&hours=24&points=100
+    Телеметрия нескольких скважин одним запросом (не более MAX_BATCH_WELLS).
+    Задержка - как у одного запроса телеметрии, а не сумма по скважинам.
+    """
+    try:
+        config = get_mock_config(request)
+        hours = int(request.GET.get("hours", 24))
+        points = int(request.GET.get("points", 100))
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    hours = max(hours, 1)
+    points = min(max(points, 1), 1000)  # Лимит
+
+    well_ids = [well_id for well_id in request.GET.get("well_ids", "").split(",") if well_id]
+    if not well_ids:
+        return JsonResponse({"error": "Parameter well_ids is required"}, status=400)
+    if len(well_ids) > MAX_BATCH_WELLS:
+        return JsonResponse({"error": f"Too many wells, max {MAX_BATCH_WELLS}"}, status=400)
+    logger.info(f"Mock API: запрос телеметрии {len(well_ids)} скважин")
+
+    # Имитация задержки
+    await config.sleep(0.2, 0.8)
+
+    # Имитация случайных сбоев API (3% случаев)
+    if config.fails(0.03):
+        logger.warning("Mock API: имитация сбоя API (503)")
+        return JsonResponse(
+            {"error": "Service temporarily unavailable"},
+            status=503,
+            headers={"Retry-After": "30"}
         )
 
+    telemetry = {}
+    missing = []
+    for well_id in well_ids:
+        well_number = parse_well_number(well_id)
+        if well_number is None or well_number < 1 or well_number > config.fleet_size:
+            missing.append(well_id)
+            continue
+        telemetry[well_id] = well_telemetry_data(config, well_number, hours, points)
+
     response_data = {
         "success": True,
         "data": {
-            "well_id": well_id,
-            "parameters": ["temperature", "pressure", "flow_rate"],
-            "units": {"temperature": "°C", "pressure": "атм", "flow_rate": "м³/сут"},
+            "parameters": TELEMETRY_PARAMETERS,
+            "units": TELEMETRY_UNITS,
             "telemetry": telemetry,
+            "missing": missing,
             "period_hours": hours,
             "points": points
         }
@@ -211,21 +398,24 @@ def well_telemetry(request, well_id):
     return JsonResponse(response_data)
 
 
-@require_GET
-@csrf_exempt
-def health_check(request):
+@async_get
+async def health_check(request):
     """
     Эндпоинт: GET /api/v1/health/
     Проверка работоспособности API.
     Возвращает статус системы и метрики.
     """
     logger.info("Mock API: health check запрос")
+    try:
+        config = get_mock_config(request)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
 
     # Имитация быстрого ответа
-    time.sleep(random.uniform(0.01, 0.05))
+    await config.sleep(0.01, 0.05)
 
     # 1% шанс что API "упало"
-    if random.random() < 0.01:
+    if config.fails(0.01):
         logger.error("Mock API: имитация критического сбоя")
         return JsonResponse(
             {
@@ -277,8 +467,10 @@ def api_root(request):
             "wells_list": "/api/v1/wells/",
             "well_detail": "/api/v1/wells/{id}/",
             "well_telemetry": "/api/v1/wells/{id}/telemetry/",
+            "telemetry_batch": "/api/v1/telemetry/?well_ids={id},{id}",
             "health": "/api/v1/health/"
         },
+        "load_test": "Параметры: load_test=1, fleet_size, seed, latency=0, failure_rate, page, page_size",
         "documentation": "См. техническое задание",
         "contact": "api.support@example.com"
     })
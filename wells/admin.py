@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Well
+from .models import Recommendation, TelemetryReading, Well
 
 
 @admin.register(Well)
@@ -7,7 +7,7 @@ class WellAdmin(admin.ModelAdmin):
     list_display = ('well_number_display', 'field_display', 'depth_display', 'status_display',
                     'last_data_update_display')
     list_filter = ('status', 'field')
-    search_field = ('well_number', 'field')
+    search_fields = ('well_number', 'field')
     ordering = ('well_number',)
 
     def well_number_display(self, obj):
@@ -29,3 +29,19 @@ class WellAdmin(admin.ModelAdmin):
     def last_data_update_display(self, obj):
         return obj.last_data_update
     last_data_update_display.short_description = 'Последнее обновление'
+
+
+@admin.register(TelemetryReading)
+class TelemetryReadingAdmin(admin.ModelAdmin):
+    list_display = ('well', 'timestamp', 'temperature', 'pressure', 'flow_rate')
+    list_filter = ('bucket',)
+    raw_id_fields = ('well',)
+    # Без полного COUNT(*) по таблице телеметрии
+    show_full_result_count = False
+
+
+@admin.register(Recommendation)
+class RecommendationAdmin(admin.ModelAdmin):
+    list_display = ('well', 'title', 'priority', 'status', 'updated_at')
+    list_filter = ('priority', 'status', 'type', 'rule')
+    raw_id_fields = ('well',)
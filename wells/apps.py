@@ -5,3 +5,6 @@ class WellsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'wells'
     verbose_name = 'Скважины'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,283 @@
+"""
+Асинхронные представления API скважин для ASGI-сервера
+(например: uvicorn config.asgi:application).
+
+DRF 3.14 не поддерживает async-представления, поэтому это обычные
+async-функции Django: чтение через async ORM, ответы в формате
+WellSerializer, ошибки - как у DRF ({"поле": ["сообщение"]}).
+Ожидание БД и внешнего API не занимает поток, поэтому один ASGI-процесс
+держит сотни одновременных запросов дашборда.
+"""
+import asyncio
+import functools
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+
+from .decorators import async_get
+from .models import Well
+from .serializers import WellRowSerializer, WellSerializer
+from .services.async_client import AsyncExternalWellDataClient
+from .services.changes import CursorExpired, InvalidCursor, changes_since
+from .services.push import Subscription, Tick, get_hub
+from .services.telemetry import TELEMETRY_PARAMETERS, TELEMETRY_UNITS
+from .services.transport import CircuitBreaker, RetryBudget
+
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Живая телеметрия: не более LIVE_MAX_WELLS скважин, пакеты по LIVE_BATCH_SIZE запрашиваются одновременно
+LIVE_MAX_WELLS = 500
+LIVE_BATCH_SIZE = 50
+LIVE_MAX_POINTS = 1000
+LIVE_TIMEOUT = 10
+
+# Поток событий: подписка не более чем на EVENTS_MAX_WELLS скважин
+EVENTS_MAX_WELLS = 5000
+EVENTS_HEARTBEAT_SECONDS = 15
+# Django 4.2 не замечает отключения клиента во время потоковой передачи:
+# поток закрывается сам, EventSource переподключается с Last-Event-ID
+EVENTS_MAX_SECONDS = 300
+EVENTS_RETRY_MS = 2000
+# Изменений, догоняемых при переподключении; больше - клиенту событие resync
+EVENTS_CATCHUP_LIMIT = 5000
+
+# Общие для процесса выключатель и бюджет повторов обращений к внешнему API
+UPSTREAM_BREAKER = CircuitBreaker()
+UPSTREAM_BUDGET = RetryBudget()
+
+
+class ParamError(Exception):
+    """Некорректный параметр запроса (ответ 400)"""
+
+    def __init__(self, name, message):
+        super().__init__(message)
+        self.name = name
+        self.message = message
+
+
+def _json(data, status=200):
+    return JsonResponse(data, status=status, safe=False, json_dumps_params={'ensure_ascii': False})
+
+
+def param_errors(view):
+    """ParamError в async-представлении - ответ 400"""
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            return await view(request, *args, **kwargs)
+        except ParamError as e:
+            return _json({e.name: [e.message]}, status=400)
+    return wrapper
+
+
+def _int_param(request, name, default, maximum):
+    value = request.GET.get(name)
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise ParamError(name, 'Ожидается целое число')
+    if value < 1:
+        raise ParamError(name, 'Ожидается положительное число')
+    return min(value, maximum)
+
+
+def _ids_param(request, maximum):
+    raw_ids = [value for value in request.GET.get('ids', '').split(',') if value.strip()]
+    try:
+        ids = list(dict.fromkeys(int(value) for value in raw_ids))
+    except ValueError:
+        raise ParamError('ids', 'Ожидается список id скважин через запятую')
+    if len(ids) > maximum:
+        raise ParamError('ids', f'Не более {maximum} скважин за запрос')
+    return ids
+
+
+def _row_serializer(request):
+    """WellRowSerializer с полями из параметра fields (как у /api/wells/)"""
+    value = request.GET.get('fields')
+    if not value:
+        return WellRowSerializer()
+    fields = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = set(fields) - set(WellSerializer.Meta.fields)
+    if unknown:
+        raise ParamError('fields', f'Неизвестные поля: {", ".join(sorted(unknown))}')
+    return WellRowSerializer(fields)
+
+
+@async_get
+@param_errors
+async def well_list(request):
+    """
+    Список скважин, async-версия /api/wells/.
+    GET /api/async/wells/?after=<well_number>&page_size=100&fields=well_number,status
+    Постраничный по well_number: ссылка next продолжает список после последней скважины.
+    """
+    serializer = _row_serializer(request)
+    page_size = _int_param(request, 'page_size', DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+
+    queryset = Well.objects.order_by('well_number')
+    after = request.GET.get('after')
+    if after:
+        queryset = queryset.filter(well_number__gt=after)
+    # Номер скважины - последней колонкой, для ссылки на следующую страницу
+    rows = [row async for row in queryset.values_list(*serializer.columns, 'well_number')[:page_size + 1]]
+
+    next_url = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        query = request.GET.copy()
+        query['after'] = rows[-1][-1]
+        next_url = request.build_absolute_uri(f'?{query.urlencode()}')
+
+    return _json({'next': next_url, 'results': [serializer.to_dict(row) for row in rows]})
+
+
+@async_get
+@param_errors
+async def well_detail(request, id):
+    """
+    Скважина, async-версия /api/wells/{id}/.
+    GET /api/async/wells/{id}/
+    """
+    try:
+        well = await Well.objects.aget(id=id)
+    except Well.DoesNotExist:
+        return _json({'detail': 'Страница не найдена.'}, status=404)
+    return _json(WellSerializer(well).data)
+
+
+def _live_payload(telemetry):
+    if not telemetry or not telemetry['timestamps']:
+        return None
+    return {
+        'timestamp': telemetry['timestamps'][-1],
+        'latest': {name: telemetry[name][-1] for name in TELEMETRY_PARAMETERS},
+        'telemetry': telemetry,
+    }
+
+
+@async_get
+@param_errors
+async def wells_live(request):
+    """
+    Скважины из БД вместе с живой телеметрией внешнего API (для дашборда).
+    GET /api/async/wells/live/?ids=1,2,3&hours=1&points=10&fields=well_number,status
+    Без ids - первые page_size скважин по номеру. Телеметрия запрашивается
+    пакетами одновременно; если внешнее API недоступно, возвращаются данные
+    из БД с live=null и описанием ошибки в upstream.
+    """
+    serializer = _row_serializer(request)
+    ids = _ids_param(request, LIVE_MAX_WELLS)
+    hours = _int_param(request, 'hours', 24, 24 * 365)
+    points = _int_param(request, 'points', 10, LIVE_MAX_POINTS)
+
+    queryset = Well.objects.order_by('well_number')
+    if ids:
+        queryset = queryset.filter(id__in=ids)
+    else:
+        queryset = queryset[:_int_param(request, 'page_size', DEFAULT_PAGE_SIZE, LIVE_MAX_WELLS)]
+    rows = [row async for row in queryset.values_list(*serializer.columns, 'well_number')]
+    well_numbers = [row[-1] for row in rows]
+
+    started = time.perf_counter()
+    upstream = {'status': 'ok'}
+    telemetry = {}
+    if well_numbers:
+        try:
+            async with AsyncExternalWellDataClient(
+                settings.EXTERNAL_API_URL,
+                settings.EXTERNAL_API_KEY,
+                timeout=LIVE_TIMEOUT,
+                budget=UPSTREAM_BUDGET,
+                breaker=UPSTREAM_BREAKER
+            ) as client:
+                telemetry = await client.get_wells_telemetry(well_numbers, hours, points, batch_size=LIVE_BATCH_SIZE)
+        except ConnectionError as e:
+            upstream = {'status': 'unavailable', 'error': str(e)}
+    upstream['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+
+    return _json({
+        'parameters': list(TELEMETRY_PARAMETERS),
+        'units': TELEMETRY_UNITS,
+        'upstream': upstream,
+        'results': [
+            {**serializer.to_dict(row), 'live': _live_payload(telemetry.get(row[-1]))}
+            for row in rows
+        ],
+    })
+
+
+def _sse(event, data, event_id=None):
+    lines = [f'id: {event_id}'] if event_id else []
+    lines += [f'event: {event}', 'data: ' + json.dumps(data, ensure_ascii=False, separators=(',', ':'))]
+    return '\n'.join(lines) + '\n\n'
+
+
+async def _event_stream(subscription, since):
+    """
+    Кадры SSE: update - накопленные изменения, resync - клиенту нужно
+    перечитать список (курсор переподключения устарел или отстал слишком сильно).
+    Первый кадр и пульс несут курсор опроса (id): клиент, не получивший
+    ни одного update, переподключается с него и не теряет изменений.
+    """
+    hub = get_hub()
+    hub.subscribe(subscription)
+    try:
+        if not since:
+            yield f'retry: {EVENTS_RETRY_MS}\nid: {hub.published}\n\n'
+        else:
+            yield f'retry: {EVENTS_RETRY_MS}\n\n'
+            try:
+                catchup = await sync_to_async(changes_since)(since, EVENTS_CATCHUP_LIMIT)
+            except (InvalidCursor, CursorExpired):
+                catchup = None
+            if catchup is None or catchup.has_more:
+                yield _sse('resync', {}, event_id=hub.published)
+            else:
+                subscription.push(Tick.from_changes(catchup))
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + EVENTS_MAX_SECONDS
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                await asyncio.wait_for(subscription.ready.wait(), min(EVENTS_HEARTBEAT_SECONDS, remaining))
+            except asyncio.TimeoutError:
+                # Пока кадр не отправлен, курсор опроса для переподключения не годится
+                if not subscription.ready.is_set():
+                    yield f'id: {hub.published}\n: ping\n\n'
+                continue
+            frame = subscription.take()
+            yield _sse('update', frame, event_id=frame['cursor'])
+    finally:
+        hub.unsubscribe(subscription)
+
+
+@async_get
+@param_errors
+async def well_events(request):
+    """
+    Поток изменений скважин (Server-Sent Events), только под ASGI-сервером.
+    GET /api/async/wells/events/?ids=1,2,3&field=Северное,Южное
+    Событие update: {"cursor", "wells": [снимки WellSerializer], "deleted": [...],
+    "telemetry": {"<id>": {"timestamps": [...], ...}}} - изменения, накопленные
+    с прошлого кадра. При переподключении (Last-Event-ID или since=<cursor>)
+    сначала приходят пропущенные изменения скважин.
+    """
+    if not isinstance(request, ASGIRequest):
+        return _json({'detail': 'Поток событий доступен только под ASGI-сервером'}, status=501)
+
+    fields = [name.strip() for name in request.GET.get('field', '').split(',') if name.strip()]
+    subscription = Subscription(_ids_param(request, EVENTS_MAX_WELLS), fields)
+    since = request.headers.get('Last-Event-ID') or request.GET.get('since')
+    response = StreamingHttpResponse(_event_stream(subscription, since), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Без буферизации на обратном прокси (nginx)
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,511 @@
+"""
+Бенчмарки производительности API скважин.
+Запускаются командой python manage.py bench во временной тестовой БД;
+данные - из wells.synthetic. Результаты можно сохранить в JSON (--json)
+и сравнить со следующим запуском (--compare).
+"""
+import base64
+import re
+import shutil
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone as dt_timezone
+from pathlib import Path
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.db import connection
+from django.conf import settings
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, override_settings
+from django.urls import resolve
+from rest_framework.request import Request
+from rest_framework.renderers import JSONRenderer
+
+from .filters import WellFilterBackend, WellOrderingFilter
+from .instrumentation import MetricsMiddleware, QueryTimer
+from .models import TelemetryBlock, TelemetryReading, Well
+from .serializers import WellRowSerializer, WellSerializer
+from .services.anomaly import AnomalyDetector
+from .services.bulk_sync import sync_external_wells
+from .services.cold_storage import tier_telemetry
+from .services.compression import compact_telemetry, decode_block
+from .services.ingestion import WellSyncWorker
+from .services.scheduler import PollingScheduler, RequestBudget
+from .services.telemetry import ingest_telemetry_batch, load_series_batch
+from .synthetic import (
+    SyntheticExternalClient, VirtualClock, bench_well_number, create_telemetry, ensure_wells, external_records,
+    telemetry_payload
+)
+
+
+BENCHMARKS = {}
+# Бенчмарки, у которых rows - размер фонда скважин (задается --scale команды bench)
+SCALED_BENCHMARKS = set()
+
+
+def benchmark(name, scaled=False):
+    """Регистрирует функцию-бенчмарк под именем name"""
+    def decorator(func):
+        BENCHMARKS[name] = func
+        if scaled:
+            SCALED_BENCHMARKS.add(name)
+        return func
+    return decorator
+
+
+def measure(func, repeat=5):
+    """Медиана времени выполнения func, мс"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(timings), 3)
+
+
+def cursor_for(position):
+    """Курсор WellCursorPagination, указывающий на позицию после well_number=position"""
+    return base64.b64encode(urlencode({'p': position}).encode('ascii')).decode('ascii')
+
+
+@benchmark('pagination', scaled=True)
+def bench_pagination(rows=100_000, page_size=100):
+    """Время страницы /api/wells/ в зависимости от ее номера (keyset против OFFSET)"""
+    ensure_wells(rows)
+    client = Client()
+    results = {}
+    for page in (1, 10, 100, 1000):
+        offset = (page - 1) * page_size
+        if offset >= rows:
+            break
+        url = f'/api/wells/?page_size={page_size}'
+        if offset:
+            url += f'&cursor={cursor_for(bench_well_number(offset - 1))}'
+        results[f'api_keyset_page_{page}_ms'] = measure(lambda: client.get(url))
+        results[f'query_offset_page_{page}_ms'] = measure(
+            lambda: list(Well.objects.order_by('well_number')[offset:offset + page_size])
+        )
+    results['api_fields_page_1_ms'] = measure(
+        lambda: client.get(f'/api/wells/?page_size={page_size}&fields=well_number,status,current_pressure')
+    )
+    return results
+
+
+@benchmark('fast_list', scaled=True)
+def bench_fast_list(rows=50_000):
+    """Полный список скважин: WellSerializer + JSONRenderer против WellRowSerializer"""
+    ensure_wells(rows)
+    queryset = Well.objects.order_by('well_number')[:rows]
+    renderer = JSONRenderer()
+    serializer = WellRowSerializer()
+
+    model_ms = measure(lambda: renderer.render(WellSerializer(queryset, many=True).data), repeat=3)
+    fast_ms = measure(lambda: ''.join(serializer.iter_json(queryset)), repeat=3)
+    return {
+        'rows': rows,
+        'model_serializer_ms': model_ms,
+        'row_serializer_ms': fast_ms,
+        'speedup': round(model_ms / fast_ms, 1),
+    }
+
+
+@benchmark('detail', scaled=True)
+def bench_detail(rows=100_000, requests=200):
+    """
+    Карточка скважины /api/wells/{id}/: ответ из кэша и с чтением из БД
+    (кэш очищается перед каждым запросом); скважины - вразброс по таблице.
+    """
+    ensure_wells(rows)
+    ids = list(Well.objects.order_by('id').values_list('id', flat=True)[::max(rows // requests, 1)][:requests])
+    client = Client()
+
+    def uncached():
+        for well_id in ids:
+            cache.clear()
+            client.get(f'/api/wells/{well_id}/')
+
+    # Счетчик через execute_wrapper: журнал connection.queries сбрасывается в начале запроса
+    queries = QueryTimer()
+    cache.clear()
+    with connection.execute_wrapper(queries):
+        client.get(f'/api/wells/{ids[0]}/')
+    uncached_ms = measure(uncached, repeat=3) / len(ids)
+    cached_ms = measure(lambda: [client.get(f'/api/wells/{well_id}/') for well_id in ids], repeat=3) / len(ids)
+    return {
+        'rows': Well.objects.count(),
+        'uncached_ms': round(uncached_ms, 3),
+        'uncached_queries': queries.count,
+        'cached_ms': round(cached_ms, 3),
+    }
+
+
+def _consume(response):
+    """Читает потоковый ответ целиком; возвращает размер тела, байт"""
+    return sum(len(chunk) for chunk in response.streaming_content)
+
+
+@benchmark('export', scaled=True)
+def bench_export(rows=100_000, telemetry_days=30):
+    """
+    Потоковые выгрузки: все скважины в NDJSON (полные строки и только два поля)
+    и история телеметрии одной скважины в CSV за telemetry_days суток (шаг 5 минут).
+    """
+    ensure_wells(rows)
+    client = Client()
+    results = {'rows': Well.objects.count()}
+    for name, url in (
+            ('ndjson', '/api/wells/export.ndjson'),
+            ('ndjson_fields', '/api/wells/export.ndjson?fields=well_number,status'),
+    ):
+        size = _consume(client.get(url))
+        elapsed_ms = measure(lambda: _consume(client.get(url)), repeat=3)
+        results[f'{name}_ms'] = elapsed_ms
+        results[f'{name}_rows_per_s'] = round(results['rows'] / elapsed_ms * 1000)
+        results[f'{name}_mb'] = round(size / 1e6, 1)
+
+    well_id = Well.objects.order_by('id').values_list('id', flat=True).first()
+    points = telemetry_days * 24 * 12
+    if not TelemetryReading.objects.filter(well_id=well_id).exists():
+        create_telemetry([well_id], points, rollups=False)
+    url = f'/api/wells/{well_id}/telemetry/export.csv'
+    elapsed_ms = measure(lambda: _consume(client.get(url)), repeat=3)
+    results['telemetry_csv_points'] = points
+    results['telemetry_csv_ms'] = elapsed_ms
+    results['telemetry_csv_points_per_s'] = round(points / elapsed_ms * 1000)
+    return results
+
+
+def _table_bytes(model):
+    """Размер таблицы модели вместе с индексами, байт (None - СУБД не поддерживается)"""
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                'SELECT SUM(pgsize) FROM dbstat WHERE name IN (SELECT name FROM sqlite_master WHERE tbl_name = %s)',
+                [table]
+            )
+        elif connection.vendor == 'postgresql':
+            cursor.execute('SELECT pg_total_relation_size(%s)', [table])
+        else:
+            return None
+        return cursor.fetchone()[0] or 0
+
+
+@benchmark('compression')
+def bench_compression(rows=20, telemetry_days=30):
+    """
+    Сжатые блоки истории против строки на замер: байт на точку (таблица с индексами
+    и сами данные блоков), чтение всей истории и одних суток, скорость декодирования.
+    История - в прошлом, чтобы не пересекаться с данными других бенчмарков.
+    """
+    ensure_wells(rows)
+    well_ids = list(Well.objects.order_by('id').values_list('id', flat=True)[:rows])
+    end = datetime(2020, 1, 1, tzinfo=dt_timezone.utc)
+    points = telemetry_days * 24 * 12
+    window = (end - timedelta(days=telemetry_days // 2), end - timedelta(days=telemetry_days // 2 - 1))
+
+    rows_before = _table_bytes(TelemetryReading)
+    total = create_telemetry(well_ids, points, end=end, rollups=False)
+    rows_bytes = _table_bytes(TelemetryReading)
+    results = {'points': total}
+    if rows_bytes is not None:
+        results['rows_bytes_per_point'] = round((rows_bytes - rows_before) / total, 2)
+    results['rows_read_all_ms'] = measure(lambda: load_series_batch(well_ids), repeat=3)
+    results['rows_read_day_ms'] = measure(lambda: load_series_batch(well_ids, *window), repeat=3)
+
+    blocks_before = _table_bytes(TelemetryBlock)
+    started = time.perf_counter()
+    compact_telemetry(end + timedelta(seconds=1), well_ids)
+    results['compact_points_per_s'] = round(total / (time.perf_counter() - started))
+    blocks = list(TelemetryBlock.objects.filter(well_id__in=well_ids).values_list('data', flat=True))
+    payload = sum(len(data) for data in blocks)
+    results['blocks'] = len(blocks)
+    results['block_data_bytes_per_point'] = round(payload / total, 2)
+    if blocks_before is not None:
+        results['blocks_bytes_per_point'] = round((_table_bytes(TelemetryBlock) - blocks_before) / total, 2)
+    results['blocks_read_all_ms'] = measure(lambda: load_series_batch(well_ids), repeat=3)
+    results['blocks_read_day_ms'] = measure(lambda: load_series_batch(well_ids, *window), repeat=3)
+
+    decode_ms = measure(lambda: [decode_block(data) for data in blocks], repeat=3)
+    results['decode_points_per_s'] = round(total / decode_ms * 1000)
+    return results
+
+
+@benchmark('cold_storage')
+def bench_cold_storage(rows=5, telemetry_days=730):
+    """
+    Многолетняя выборка по уровням хранения: строки, сжатые блоки, файлы
+    холодного хранилища (memmap) - вся история rows скважин и одни сутки из нее.
+    """
+    ensure_wells(rows)
+    well_ids = list(Well.objects.order_by('id').values_list('id', flat=True)[:rows])
+    end = datetime(2019, 1, 1, tzinfo=dt_timezone.utc)
+    points = telemetry_days * 24 * 12
+    history = (end - timedelta(days=telemetry_days), end + timedelta(seconds=1))
+    day = (end - timedelta(days=telemetry_days // 2), end - timedelta(days=telemetry_days // 2 - 1))
+    cold_dir = tempfile.mkdtemp(prefix='wells-cold-')
+    try:
+        with override_settings(TELEMETRY_COLD_DIR=cold_dir):
+            total = create_telemetry(well_ids, points, end=end, rollups=False)
+            results = {'points': total}
+
+            def read(tier):
+                results[f'{tier}_history_ms'] = measure(lambda: load_series_batch(well_ids, *history), repeat=3)
+                results[f'{tier}_history_points_per_s'] = round(total / results[f'{tier}_history_ms'] * 1000)
+                results[f'{tier}_day_ms'] = measure(lambda: load_series_batch(well_ids, *day), repeat=3)
+
+            read('rows')
+            compact_telemetry(history[1], well_ids)
+            read('blocks')
+            started = time.perf_counter()
+            tier_telemetry(history[1], well_ids)
+            results['tier_points_per_s'] = round(total / (time.perf_counter() - started))
+            results['cold_bytes_per_point'] = round(
+                sum(path.stat().st_size for path in Path(cold_dir).rglob('*.npy')) / total, 2
+            )
+            read('cold')
+    finally:
+        shutil.rmtree(cold_dir, ignore_errors=True)
+    return results
+
+
+@benchmark('anomaly')
+def bench_anomaly(rows=200, points=288):
+    """Пропускная способность записи телеметрии без детектора аномалий и с ним"""
+    ensure_wells(rows)
+    wells = list(Well.objects.order_by('id')[:rows])
+    start = int(time.time()) // 300 * 300 - 10 * points * 300
+
+    detector = AnomalyDetector()
+    ingest_timings, detector_timings = [], []
+    for offset in range(5):
+        batch = [(well, telemetry_payload(points, start + offset * points * 300, seed=well.pk)) for well in wells]
+        started = time.perf_counter()
+        ingest_telemetry_batch(batch)
+        ingest_timings.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        detector.process_batch(batch)
+        detector_timings.append(time.perf_counter() - started)
+
+    readings = rows * points
+    ingest_s = statistics.median(ingest_timings)
+    detector_s = statistics.median(detector_timings)
+    return {
+        'readings_per_batch': readings,
+        'ingest_readings_per_s': round(readings / ingest_s),
+        'ingest_with_detector_readings_per_s': round(readings / (ingest_s + detector_s)),
+        'detector_readings_per_s': round(readings / detector_s),
+        'overhead_percent': round(100 * detector_s / ingest_s, 1),
+    }
+
+
+@benchmark('concurrent_writes')
+def bench_concurrent_writes(rows=64, points=288):
+    """
+    Пропускная способность записи телеметрии несколькими потоками
+    (у каждого потока свое соединение и свои скважины, как у параллельных синхронизаций).
+    """
+    ensure_wells(rows)
+    wells = list(Well.objects.order_by('id')[:rows])
+    start = int(time.time()) // 300 * 300 - 100 * points * 300
+
+    def write(chunk, offset):
+        try:
+            batch = [(well, telemetry_payload(points, start + offset * points * 300, seed=well.pk)) for well in chunk]
+            for well, telemetry in batch:
+                ingest_telemetry_batch([(well, telemetry)])
+        finally:
+            connection.close()
+
+    results = {'vendor': connection.vendor}
+    for offset, threads in enumerate((1, 2, 4, 8)):
+        chunks = [wells[i::threads] for i in range(threads)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            for future in [pool.submit(write, chunk, offset) for chunk in chunks]:
+                future.result()
+        elapsed = time.perf_counter() - started
+        results[f'threads_{threads}_readings_per_s'] = round(rows * points / elapsed)
+    return results
+
+
+@benchmark('bulk_upsert')
+def bench_bulk_upsert(rows=10_000):
+    """
+    Массовая синхронизация скважин (sync_external_wells, как POST /api/wells/bulk/):
+    первый проход создает rows скважин, второй обновляет те же записи.
+    """
+    records = external_records(rows)
+    results = {'records': rows}
+    for name in ('create', 'update'):
+        queries = QueryTimer()
+        with connection.execute_wrapper(queries):
+            started = time.perf_counter()
+            result = sync_external_wells(records)
+            elapsed = time.perf_counter() - started
+        results[f'{name}_records_per_s'] = round(rows / elapsed)
+        results[f'{name}_queries'] = queries.count
+        results[f'{name}_failed'] = result.as_dict()['failed']
+    return results
+
+
+@benchmark('sync')
+def bench_sync(rows=1000, points=100, concurrency=4):
+    """
+    Полная синхронизация WellSyncWorker с внешним API без сети (SyntheticExternalClient):
+    список скважин, телеметрия, свертки, рекомендации и детектор аномалий.
+    Второй проход получает те же точки телеметрии - повторная загрузка.
+    """
+    client = SyntheticExternalClient(rows)
+    results = {'wells': rows, 'points_per_well': points}
+    for name in ('first', 'repeat'):
+        result = WellSyncWorker(client, concurrency=concurrency, points=points).run()
+        results[f'{name}_s'] = round(result.elapsed, 2)
+        results[f'{name}_wells_per_s'] = round(result.wells_per_second)
+        results[f'{name}_readings_per_s'] = round(result.readings / result.elapsed)
+        results[f'{name}_failed'] = len(result.failed)
+    return results
+
+
+@benchmark('scheduler')
+def bench_scheduler(rows=200, minutes=60, budget_per_minute=2.0, emergency_every=50):
+    """
+    Опрос телеметрии в модельном времени: равномерный (все скважины раз в
+    BASE_INTERVAL) против адаптивного PollingScheduler. Адаптивному опросу дается
+    бюджет, равный числу запросов равномерного, - сравнение при одном объеме запросов.
+    Каждая emergency_every-я скважина аварийная и с сильными колебаниями показаний.
+    Возраст данных - среднее по ежеминутным срезам (p95 и максимум по статусу).
+    """
+    results = {'wells': rows, 'minutes': minutes}
+    budget = budget_per_minute
+    for name, adaptive in (('fixed', False), ('adaptive', True)):
+        client = SyntheticExternalClient(rows, emergency_every=emergency_every)
+        clock = VirtualClock()
+        scheduler = PollingScheduler(
+            client, RequestBudget(budget, clock=clock), adaptive=adaptive, concurrency=1,
+            clock=clock, sleep=clock.sleep
+        )
+        samples = {}
+        for _ in range(minutes):
+            scheduler.run(duration=60)
+            for status, values in scheduler.stats()['statuses'].items():
+                samples.setdefault(status, []).append(values)
+        results[f'{name}_budget_per_minute'] = round(budget, 2)
+        results[f'{name}_requests'] = client.requests
+        results[f'{name}_polls'] = sum(schedule.polls for schedule in scheduler.wells.values())
+        for status, values in sorted(samples.items()):
+            for key in ('staleness_p95_s', 'staleness_max_s'):
+                results[f'{name}_{status}_{key}'] = round(statistics.mean(item[key] for item in values), 1)
+        budget = client.requests / minutes
+    return results
+
+
+# Фильтры списка скважин для бенчмарка 'filters': имя -> параметры запроса
+FILTER_CASES = {
+    'status': 'status=maintenance',
+    'field_status': 'field=Южное&status=inactive',
+    'pressure_range': 'pressure_min=42&pressure_max=42.5',
+    'flow_range_order': 'flow_min=190&ordering=-measured_flow_rate',
+    'depth_range': 'depth_min=3400&depth_max=3401',
+    'since': 'since=2100-01-01T00:00:00',
+    'search_prefix': 'search=BENCH-00012',
+    'order_temperature': 'ordering=temperature',
+}
+# Поиск по индексу в плане SQLite (SEARCH) / PostgreSQL (условие на индекс).
+# SCAN ... USING INDEX и Index Scan без условия - полный проход по индексу
+# (только ради порядка строк), он поиском не считается
+INDEX_SEARCH_PATTERNS = (re.compile(r'\bSEARCH\b.*\bUSING (COVERING )?INDEX\b'), re.compile(r'\bIndex Cond:'))
+INDEX_SCAN_PATTERNS = (re.compile(r'\bSCAN\b.*\bUSING (COVERING )?INDEX\b'), re.compile(r'\bIndex (Only )?Scan\b'))
+
+
+def plan_access(plan):
+    """Вид доступа по плану запроса: 'index' (поиск), 'index scan' (полный проход по индексу) или 'FULL SCAN'"""
+    for kind, patterns in (('index', INDEX_SEARCH_PATTERNS), ('index scan', INDEX_SCAN_PATTERNS)):
+        if any(pattern.search(line) for pattern in patterns for line in plan.splitlines()):
+            return kind
+    return 'FULL SCAN'
+
+
+@benchmark('filters', scaled=True)
+def bench_filters(rows=1_000_000, page_size=100):
+    """
+    Фильтры и сортировка /api/wells/ на большой таблице: время страницы через API
+    и план запроса (EXPLAIN) - какой индекс его обслуживает.
+    """
+    ensure_wells(rows)
+    if connection.vendor == 'sqlite':
+        # Статистика для планировщика (PostgreSQL собирает ее сам - autovacuum)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+    client = Client()
+    factory = RequestFactory()
+    view = type('View', (), {'ordering': ['well_number']})()
+
+    results = {'rows': Well.objects.count()}
+    for name, query in FILTER_CASES.items():
+        request = Request(factory.get(f'/api/wells/?{query}'))
+        queryset = WellFilterBackend().filter_queryset(request, Well.objects.all(), view)
+        queryset = WellOrderingFilter().filter_queryset(request, queryset, view)[:page_size + 1]
+        plan = queryset.explain()
+
+        url = f'/api/wells/?page_size={page_size}&{query}'
+        # Без кэша ответов: измеряется запрос к БД
+        results[f'{name}_ms'] = measure(lambda: (cache.clear(), client.get(url)))
+        results[f'{name}_plan'] = f'{plan_access(plan)}: ' + ' | '.join(
+            line.strip() for line in plan.splitlines() if line.strip()
+        )
+    return results
+
+
+@benchmark('metrics_overhead')
+def bench_metrics_overhead(rows=1000, requests=200, rounds=15):
+    """
+    Накладные расходы MetricsMiddleware на запрос.
+    middleware_us - собственное время middleware вокруг пустого ответа (без ?profile=1
+    профилировщик не запускается - это одна проверка строки запроса; счетчик запросов
+    к БД стоит на соединении постоянно, на запрос - только contextvar). С METRICS_ENABLED=False
+    middleware не подключается (MiddlewareNotUsed), расходы нулевые.
+    Сквозные запросы с метриками и без: конфигурации чередуются по раундам,
+    берется лучший раунд - так меньше влияние шума машины.
+    """
+    factory = RequestFactory()
+    request = factory.get('/api/wells/')
+    request.resolver_match = resolve('/api/wells/')
+    response = HttpResponse()
+    bare = measure(lambda: [response for _ in range(10_000)]) / 10_000
+    middleware = MetricsMiddleware(lambda request: response)
+    wrapped = measure(lambda: [middleware(request) for _ in range(10_000)]) / 10_000
+    results = {'middleware_us': round((wrapped - bare) * 1000, 2)}
+
+    ensure_wells(rows)
+    well_id = Well.objects.order_by('id').values_list('id', flat=True).first()
+    urls = {'detail_cached': f'/api/wells/{well_id}/', 'list': '/api/wells/?page_size=100'}
+    path = 'wells.instrumentation.MetricsMiddleware'
+    configs = {
+        'without': {'MIDDLEWARE': [name for name in settings.MIDDLEWARE if name != path]},
+        'enabled': {'METRICS_ENABLED': True},
+    }
+    clients = {}
+    for name, overrides in configs.items():
+        with override_settings(**overrides):
+            # Цепочка middleware собирается при первом запросе - по текущим настройкам
+            clients[name] = Client()
+            clients[name].get('/api/wells/')
+
+    results['requests'] = requests
+    for url_name, url in urls.items():
+        best = {name: float('inf') for name in configs}
+        for _ in range(rounds):
+            for name, client in clients.items():
+                started = time.perf_counter()
+                for _ in range(requests):
+                    client.get(url)
+                best[name] = min(best[name], (time.perf_counter() - started) / requests * 1_000_000)
+        for name in configs:
+            results[f'{url_name}_{name}_us'] = round(best[name], 1)
+        results[f'{url_name}_overhead_pct'] = round((best['enabled'] / best['without'] - 1) * 100, 1)
+    return results
@@ -0,0 +1,102 @@
+"""
+Кэш ответов API скважин с точной инвалидацией и ETag.
+
+Ключ ответа строится из пути, параметров запроса и «версий» данных:
+общей версии списка скважин и версии конкретной скважины для детального
+ответа. Изменение скважины (post_save/post_delete или массовая синхронизация)
+меняет версию списка и версию только этой скважины, поэтому старые записи
+просто перестают использоваться и вытесняются по LRU/таймауту.
+
+ETag совпадает с ключом кэша: при If-None-Match ответ 304 отдается
+без обращения к БД и без сериализации.
+
+Версии живут не дольше WELLS_CACHE_TIMEOUT. Инвалидация видна другим
+процессам (sync_wells, другие воркеры веб-сервера) только через общий кэш -
+Redis (REDIS_URL); с кэшем в памяти процесса чужие изменения становятся
+видны по истечении версии, то есть ответ (и 304) устаревает не дольше,
+чем на WELLS_CACHE_TIMEOUT.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+
+LIST_VERSION_KEY = 'wells:version:list'
+
+
+def detail_version_key(well_id):
+    return f'wells:version:well:{well_id}'
+
+
+def get_versions(keys):
+    """Текущие версии по ключам (отсутствующие создаются)"""
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        token = time.time_ns()
+        for key in missing:
+            cache.add(key, token, timeout=settings.WELLS_CACHE_TIMEOUT)
+        versions.update(cache.get_many(missing))
+    return [versions.get(key) for key in keys]
+
+
+def invalidate_wells(well_ids=()):
+    """
+    Делает устаревшими кэшированный список скважин и детальные ответы well_ids.
+    Выполняется после фиксации транзакции, чтобы параллельный запрос
+    не закэшировал данные до изменения под новой версией.
+    """
+    keys = [LIST_VERSION_KEY] + [detail_version_key(well_id) for well_id in well_ids]
+
+    def bump():
+        token = time.time_ns()
+        cache.set_many({key: token for key in keys}, timeout=settings.WELLS_CACHE_TIMEOUT)
+
+    transaction.on_commit(bump)
+
+
+def _etag(request, versions):
+    params = sorted(request.GET.lists())
+    source = f'{request.path}|{params}|{request.accepted_renderer.format}|{versions}'
+    return '"' + hashlib.sha1(source.encode()).hexdigest() + '"'
+
+
+def _matches(etag, header):
+    """Совпадает ли etag с одним из тегов If-None-Match (слабое сравнение, RFC 9110)"""
+    if not header:
+        return False
+    tags = parse_etags(header)
+    return '*' in tags or etag in {tag.removeprefix('W/') for tag in tags}
+
+
+def cached_response(request, version_keys, build):
+    """
+    Ответ на GET из кэша, 304 по If-None-Match или build() с сохранением в кэш.
+
+    Args:
+        request: Запрос DRF
+        version_keys: Ключи версий данных, от которых зависит ответ
+        build: Функция, строящая Response при промахе кэша
+    """
+    etag = _etag(request, get_versions(version_keys))
+    headers = {'ETag': etag}
+
+    if _matches(etag, request.headers.get('If-None-Match')):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    cache_key = f'wells:response:{etag[1:-1]}'
+    data = cache.get(cache_key)
+    if data is not None:
+        return Response(data, headers=headers)
+
+    response = build()
+    if response.status_code == status.HTTP_200_OK:
+        cache.set(cache_key, response.data, timeout=settings.WELLS_CACHE_TIMEOUT)
+        response['ETag'] = etag
+    return response
@@ -0,0 +1,19 @@
+"""
+Декораторы представлений, общие для wells и mock_external_api.
+"""
+import functools
+
+from django.http import HttpResponseNotAllowed
+
+
+def async_get(view):
+    """
+    require_GET для async-представлений (декораторы Django 4.2 не поддерживают корутины).
+    CSRF проверяется только для небезопасных методов, поэтому csrf_exempt не нужен.
+    """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return HttpResponseNotAllowed(['GET', 'HEAD'])
+        return await view(request, *args, **kwargs)
+    return wrapper
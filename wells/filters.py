@@ -0,0 +1,147 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import connection
+from django.db.models import F
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+
+
+# Числовые диапазоны: параметр <имя>_min / <имя>_max -> поле модели
+RANGE_FILTERS = {
+    'pressure': 'current_pressure',
+    'flow': 'measured_flow_rate',
+    'temperature': 'temperature',
+    'depth': 'depth',
+}
+
+
+def _split(value):
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def _parse_since(value):
+    """unix-время (секунды) или дата/время ISO 8601"""
+    if value.isdigit():
+        return datetime.fromtimestamp(int(value), tz=dt_timezone.utc)
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValidationError({'since': 'Ожидается unix-время или дата ISO 8601'})
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=dt_timezone.utc)
+    return parsed
+
+
+def prefix_upper_bound(prefix):
+    """
+    Наименьшая строка больше всех строк с началом prefix (по кодовым точкам)
+    или None, если такой нет (prefix из одних U+10FFFF).
+    """
+    prefix = prefix.rstrip(chr(0x10FFFF))
+    if not prefix:
+        return None
+    code = ord(prefix[-1]) + 1
+    if 0xD800 <= code <= 0xDFFF:
+        # Суррогаты не кодируются в UTF-8: следующий допустимый символ - U+E000
+        code = 0xE000
+    return prefix[:-1] + chr(code)
+
+
+def ordering_expressions(model, ordering, reverse=False):
+    """
+    Выражения ORDER BY для полей ordering ('-поле' - по убыванию):
+    NULL необязательных полей - в конце списка (reverse=True - обратный порядок, NULL в начале).
+    """
+    expressions = []
+    for field in ordering:
+        name = field.lstrip('-')
+        descending = field.startswith('-') != reverse
+        if model._meta.get_field(name).null:
+            expression = F(name).desc if descending else F(name).asc
+            expressions.append(expression(nulls_last=not reverse, nulls_first=reverse))
+        else:
+            expressions.append(f'-{name}' if descending else name)
+    return expressions
+
+
+class WellFilterBackend(BaseFilterBackend):
+    """
+    Фильтры списка скважин (каждый обслуживается индексом):
+        status=active,maintenance     - статус (несколько через запятую)
+        field=Северное                - месторождение (несколько через запятую)
+        pressure_min / pressure_max   - давление, атм (также flow_, temperature_, depth_)
+        since=<unix|ISO 8601>         - обновленные не раньше указанного момента
+        search=WELL-00                - начало номера скважины
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+
+        if params.get('status'):
+            statuses = _split(params['status'])
+            allowed = {value for value, _ in queryset.model.STATUS_CHOICES}
+            unknown = set(statuses) - allowed
+            if unknown:
+                raise ValidationError({'status': f'Допустимые значения: {", ".join(sorted(allowed))}'})
+            queryset = queryset.filter(status__in=statuses)
+
+        if params.get('field'):
+            queryset = queryset.filter(field__in=_split(params['field']))
+
+        for name, model_field in RANGE_FILTERS.items():
+            for suffix, lookup in (('min', 'gte'), ('max', 'lte')):
+                param = f'{name}_{suffix}'
+                value = params.get(param)
+                if value is None:
+                    continue
+                try:
+                    value = float(value)
+                except ValueError:
+                    raise ValidationError({param: 'Ожидается число'})
+                queryset = queryset.filter(**{f'{model_field}__{lookup}': value})
+
+        if params.get('since'):
+            queryset = queryset.filter(last_data_update__gte=_parse_since(params['since']))
+
+        prefix = params.get('search', '').strip()
+        if prefix:
+            queryset = queryset.filter(well_number__startswith=prefix)
+            if connection.vendor == 'sqlite':
+                # LIKE в SQLite регистронезависим и не использует индекс:
+                # диапазон по бинарному порядку сужает выборку по уникальному индексу
+                queryset = queryset.filter(well_number__gte=prefix)
+                upper = prefix_upper_bound(prefix)
+                if upper is not None:
+                    queryset = queryset.filter(well_number__lt=upper)
+
+        return queryset
+
+
+class WellOrderingFilter(OrderingFilter):
+    """
+    Сортировка: ordering=-current_pressure (по умолчанию well_number).
+    Скважины без значения поля сортировки (NULL) идут в конце списка при любом
+    направлении; номер скважины добавляется последним полем для устойчивого
+    порядка и однозначного курсора (см. WellCursorPagination).
+    """
+    ordering_fields = [
+        'well_number', 'current_pressure', 'measured_flow_rate', 'temperature', 'depth', 'last_data_update'
+    ]
+
+    def get_ordering(self, request, queryset, view):
+        params = request.query_params.get(self.ordering_param)
+        if params:
+            fields = [param.strip() for param in params.split(',')]
+            invalid = [field for field in fields if field.lstrip('-') not in self.ordering_fields]
+            if invalid:
+                raise ValidationError({
+                    self.ordering_param: f'Допустимые поля: {", ".join(self.ordering_fields)}'
+                })
+        ordering = list(super().get_ordering(request, queryset, view))
+        if not any(field.lstrip('-') == 'well_number' for field in ordering):
+            ordering.append('well_number')
+        return ordering
+
+    def filter_queryset(self, request, queryset, view):
+        ordering = self.get_ordering(request, queryset, view)
+        return queryset.order_by(*ordering_expressions(queryset.model, ordering))
@@ -0,0 +1,134 @@
+"""
+Geohash: кодирование координат строкой, у которой общий префикс означает
+общую ячейку сетки. Алфавит base32 geohash упорядочен так же, как ASCII,
+поэтому ячейка = непрерывный диапазон строк, и обычный B-tree индекс по
+колонке geohash отвечает на запросы "все точки в ячейке" диапазоном.
+"""
+import math
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+# Точность, хранимая у скважин: ячейка ~4.8 x 4.8 м
+PRECISION = 9
+
+
+def encode(lat: float, lon: float, precision: int = PRECISION) -> str:
+    """Geohash точки (lat, lon) длиной precision"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True  # Биты чередуются: долгота, широта, долгота, ...
+    while len(chars) < precision:
+        if even:
+            mid = (lon_range[0] + lon_range[1]) / 2
+            if lon >= mid:
+                value = value * 2 + 1
+                lon_range[0] = mid
+            else:
+                value *= 2
+                lon_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if lat >= mid:
+                value = value * 2 + 1
+                lat_range[0] = mid
+            else:
+                value *= 2
+                lat_range[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = 0
+            value = 0
+    return ''.join(chars)
+
+
+def encode_many(lats: Sequence[float], lons: Sequence[float], precision: int = PRECISION) -> List[str]:
+    """
+    Geohash массивов координат (векторно, для массовой загрузки).
+    Номер ячейки по каждой оси - floor от доли диапазона, биты чередуются как в encode.
+    """
+    total_bits = 5 * precision
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    lon_index = np.floor((np.asarray(lons, dtype=np.float64) + 180.0) / 360.0 * 2 ** lon_bits).astype(np.int64)
+    lat_index = np.floor((np.asarray(lats, dtype=np.float64) + 90.0) / 180.0 * 2 ** lat_bits).astype(np.int64)
+    lon_index = np.clip(lon_index, 0, 2 ** lon_bits - 1)
+    lat_index = np.clip(lat_index, 0, 2 ** lat_bits - 1)
+
+    code = np.zeros(len(lon_index), dtype=np.int64)
+    for bit in range(total_bits):
+        if bit % 2 == 0:
+            value = (lon_index >> (lon_bits - 1 - bit // 2)) & 1
+        else:
+            value = (lat_index >> (lat_bits - 1 - bit // 2)) & 1
+        code = (code << 1) | value
+
+    alphabet = np.frombuffer(BASE32.encode(), dtype=np.uint8)
+    shifts = 5 * np.arange(precision - 1, -1, -1)
+    chars = alphabet[(code[:, None] >> shifts) & 31]
+    return np.ascontiguousarray(chars).view(f'S{precision}').ravel().astype(f'U{precision}').tolist()
+
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """Размер ячейки (по широте, по долготе) в градусах"""
+    total_bits = 5 * precision
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def next_prefix(prefix: str) -> Optional[str]:
+    """Наименьшая строка после всех строк с префиксом prefix (None - конец алфавита)"""
+    chars = list(prefix)
+    while chars:
+        index = BASE32.index(chars[-1])
+        if index + 1 < len(BASE32):
+            chars[-1] = BASE32[index + 1]
+            return ''.join(chars)
+        chars.pop()
+    return None
+
+
+def _cells(min_lat, min_lon, max_lat, max_lon, precision) -> Iterator[str]:
+    lat_step, lon_step = cell_size(precision)
+    lat = (math.floor(min_lat / lat_step) + 0.5) * lat_step
+    while lat - lat_step / 2 <= max_lat:
+        lon = (math.floor(min_lon / lon_step) + 0.5) * lon_step
+        while lon - lon_step / 2 <= max_lon:
+            yield encode(min(lat, 90.0), min(lon, 180.0), precision)
+            lon += lon_step
+        lat += lat_step
+
+
+def cover(
+        min_lat: float, min_lon: float, max_lat: float, max_lon: float, max_cells: int = 32
+) -> List[Tuple[str, Optional[str]]]:
+    """
+    Диапазоны [from, to) значений geohash, покрывающие прямоугольник.
+    Выбирается самая мелкая ячейка, при которой их не больше max_cells;
+    соседние по порядку ячейки сливаются в один диапазон (to=None - до конца).
+    """
+    precision = 1
+    for candidate in range(PRECISION, 0, -1):
+        lat_step, lon_step = cell_size(candidate)
+        count = (
+            (math.floor(max_lat / lat_step) - math.floor(min_lat / lat_step) + 1)
+            * (math.floor(max_lon / lon_step) - math.floor(min_lon / lon_step) + 1)
+        )
+        if count <= max_cells:
+            precision = candidate
+            break
+
+    ranges: List[Tuple[str, Optional[str]]] = []
+    for prefix in sorted(set(_cells(min_lat, min_lon, max_lat, max_lon, precision))):
+        if ranges and ranges[-1][1] == prefix:
+            ranges[-1] = (ranges[-1][0], next_prefix(prefix))
+        else:
+            ranges.append((prefix, next_prefix(prefix)))
+    return ranges
@@ -0,0 +1,251 @@
+"""
+Инструментирование запросов к API.
+
+MetricsMiddleware записывает для каждого запроса время ответа, число и
+время запросов к БД и время сериализации (рендеринга) ответа в гистограммы
+по имени представления; метрики отдаются в формате Prometheus на /metrics.
+
+Middleware работает и в синхронной, и в асинхронной цепочке (ASGI): под
+ASGI async-представления не занимают поток. Запросы к БД считает постоянная
+обертка каждого соединения (count_queries, ставится при его открытии) в
+QueryTimer текущего HTTP-запроса из contextvar: контекст переходит и в
+потоки sync_to_async, поэтому учитываются и запросы async ORM.
+
+Профилирование: GET-запрос с ?profile=1 от сотрудника (is_staff) вместо
+ответа возвращает отчет сэмплирующего профилировщика - где представление
+провело время, с числом и временем запросов к БД.
+"""
+import asyncio
+import sys
+import threading
+import time
+from collections import Counter as TallyCounter
+from contextvars import ContextVar
+from typing import Optional
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+
+from .services.metrics import (
+    HTTP_DB_QUERIES, HTTP_DB_SECONDS, HTTP_RENDER_SECONDS, HTTP_REQUEST_SECONDS, REGISTRY
+)
+
+
+# Интервал выборки стека профилировщиком, с
+PROFILE_INTERVAL = 0.001
+PROFILE_TOP = 25
+
+
+class QueryTimer:
+    """Обертка выполнения SQL (connection.execute_wrapper): число и суммарное время запросов"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+# QueryTimer обрабатываемого HTTP-запроса (None - вне запроса)
+_request_queries: ContextVar[Optional[QueryTimer]] = ContextVar('request_queries', default=None)
+
+
+def count_queries(execute, sql, params, many, context):
+    """Постоянная обертка SQL соединения: учитывает запрос в QueryTimer текущего HTTP-запроса"""
+    timer = _request_queries.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+def install_query_counter(connection) -> None:
+    """Ставит count_queries соединению (повторный вызов ничего не меняет)"""
+    if count_queries not in connection.execute_wrappers:
+        # Первой в списке: execute_wrapper() снимает обертки с конца
+        connection.execute_wrappers.insert(0, count_queries)
+
+
+class SamplingProfiler:
+    """
+    Сэмплирующий профилировщик потока: фоновый поток каждые interval секунд
+    снимает стек профилируемого потока (sys._current_frames). В отличие от
+    cProfile не перехватывает каждый вызов, поэтому почти не искажает время.
+    Стек обрезается по кадру, открывшему профилировщик (with SamplingProfiler()).
+    thread_id можно сменить на ходу - например, на поток цикла событий async-представления.
+    """
+
+    def __init__(self, interval=PROFILE_INTERVAL):
+        self.thread_id = threading.get_ident()
+        self.interval = interval
+        self.stacks = TallyCounter()
+        self.samples = 0
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+        self._root = None
+        self._started = 0.0
+        self._switch_interval = None
+
+    @staticmethod
+    def _frame_name(frame):
+        code = frame.f_code
+        module = frame.f_globals.get('__name__', '?')
+        return f'{module}.{getattr(code, "co_qualname", code.co_name)}'
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and frame is not self._root:
+                stack.append(self._frame_name(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(reversed(stack))] += 1
+                self.samples += 1
+
+    def __enter__(self):
+        self._root = sys._getframe(1)
+        # Поток-сэмплер получает GIL не чаще интервала переключения (по умолчанию 5 мс)
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval, self.interval / 2))
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._sample, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self._started
+        sys.setswitchinterval(self._switch_interval)
+        self._root = None
+
+    def top(self, own=True, limit=PROFILE_TOP):
+        """Функции с наибольшим собственным (own) или суммарным временем: [(функция, выборок)]"""
+        totals = TallyCounter()
+        for stack, count in self.stacks.items():
+            if own:
+                totals[stack[-1]] += count
+            else:
+                for name in set(stack):
+                    totals[name] += count
+        return totals.most_common(limit)
+
+    def collapsed(self):
+        """Свернутые стеки (формат flamegraph.pl / speedscope): "a;b;c <выборок>" """
+        return [f'{";".join(stack)} {count}' for stack, count in self.stacks.most_common()]
+
+
+def profile_report(request, profiler, queries, status):
+    lines = [
+        f'Профиль {request.method} {request.get_full_path()} -> {status}',
+        f'Время: {profiler.elapsed * 1000:.1f} мс, выборок: {profiler.samples} '
+        f'(интервал {profiler.interval * 1000:.1f} мс)',
+        f'Запросов к БД: {queries.count}, {queries.seconds * 1000:.1f} мс',
+    ]
+    total = profiler.samples or 1
+    for title, own in (('Собственное время', True), ('Суммарное время (с вызванными)', False)):
+        lines += ['', title + ':']
+        lines += [f'{count * 100 / total:6.1f}% {count:6d}  {name}' for name, count in profiler.top(own=own)]
+    lines += ['', 'Свернутые стеки:'] + profiler.collapsed()
+    return HttpResponse('\n'.join(lines) + '\n', content_type='text/plain; charset=utf-8')
+
+
+class MetricsMiddleware:
+    """
+    Метрики запросов (см. описание модуля). Подключается первым в MIDDLEWARE,
+    чтобы время включало остальные middleware. Выключается настройкой
+    METRICS_ENABLED = False.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        queries = QueryTimer()
+        token = _request_queries.set(queries)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_queries.reset(token)
+        self.observe(request, response, time.perf_counter() - started, queries)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        queries = QueryTimer()
+        token = _request_queries.set(queries)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_queries.reset(token)
+        self.observe(request, response, time.perf_counter() - started, queries)
+        return response
+
+    @staticmethod
+    def observe(request, response, elapsed, queries):
+        match = request.resolver_match
+        view = match.view_name if match else 'unmatched'
+        HTTP_REQUEST_SECONDS.observe(elapsed, view, request.method, str(response.status_code))
+        HTTP_DB_QUERIES.observe(queries.count, view)
+        HTTP_DB_SECONDS.observe(queries.seconds, view)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Быстрая проверка строки запроса: QueryDict без нужды не разбирается
+        if 'profile' not in request.META.get('QUERY_STRING', ''):
+            return None
+        if request.GET.get('profile') != '1' or request.method != 'GET':
+            return None
+        user = getattr(request, 'user', None)
+        if not (user and user.is_staff):
+            return None
+        queries = QueryTimer()
+        token = _request_queries.set(queries)
+        try:
+            with SamplingProfiler() as profiler:
+                if asyncio.iscoroutinefunction(view_func):
+                    async def run():
+                        # async-представление выполняется в потоке цикла событий
+                        profiler.thread_id = threading.get_ident()
+                        return await view_func(request, *view_args, **view_kwargs)
+                    response = async_to_sync(run)()
+                else:
+                    response = view_func(request, *view_args, **view_kwargs)
+                if hasattr(response, 'render'):
+                    response.render()
+        finally:
+            _request_queries.reset(token)
+        return profile_report(request, profiler, queries, response.status_code)
+
+    def process_template_response(self, request, response):
+        # Вызывается последним среди middleware - непосредственно перед рендерингом
+        started = time.perf_counter()
+        match = request.resolver_match
+        view = match.view_name if match else 'unmatched'
+        response.add_post_render_callback(
+            lambda rendered: HTTP_RENDER_SECONDS.observe(time.perf_counter() - started, view)
+        )
+        return response
+
+
+def metrics_view(request):
+    """Метрики процесса в текстовом формате Prometheus (GET /metrics)"""
+    return HttpResponse(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,106 @@
+import json
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.utils import (
+    setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+)
+from django.utils import timezone
+
+from wells.benchmarks import BENCHMARKS, SCALED_BENCHMARKS
+from wells.synthetic import FLEET_SIZES
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = 'Запускает бенчмарки производительности во временной тестовой БД'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help=f'Бенчмарки (по умолчанию все): {", ".join(BENCHMARKS)}')
+        parser.add_argument('--rows', type=int, help='Размер синтетических данных (для всех бенчмарков)')
+        parser.add_argument(
+            '--scale', choices=list(FLEET_SIZES),
+            help=f'Размер фонда скважин для {", ".join(sorted(SCALED_BENCHMARKS))}'
+        )
+        parser.add_argument('--json', dest='json_path', help='Записать результаты в JSON-файл')
+        parser.add_argument('--compare', help='JSON-файл прошлого запуска: вывести изменения относительно него')
+
+    def handle(self, *args, **options):
+        names = options['names'] or list(BENCHMARKS)
+        unknown = set(names) - set(BENCHMARKS)
+        if unknown:
+            raise CommandError(f'Неизвестные бенчмарки: {", ".join(sorted(unknown))}')
+        baseline = {}
+        if options['compare']:
+            try:
+                with open(options['compare'], encoding='utf-8') as f:
+                    baseline = json.load(f)['results']
+            except (OSError, ValueError, KeyError) as e:
+                raise CommandError(f'Не удалось прочитать {options["compare"]}: {e}')
+
+        database = connections['default'].settings_dict
+        report = {
+            'meta': {
+                'started_at': timezone.now().isoformat(),
+                'commit': _git_commit(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'vendor': connections['default'].vendor,
+                'machine': platform.machine(),
+                'rows': options['rows'],
+                'scale': options['scale'],
+            },
+            'results': {},
+        }
+        temp_dir = None
+        if database['ENGINE'] == 'django.db.backends.sqlite3' and not database['TEST']['NAME']:
+            # Файловая БД вместо тестовой в памяти: WAL и конкурентная запись как в рабочем режиме
+            temp_dir = tempfile.mkdtemp(prefix='wells-bench-')
+            database['TEST']['NAME'] = os.path.join(temp_dir, 'bench.sqlite3')
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            for name in names:
+                kwargs = {}
+                if options['rows']:
+                    kwargs['rows'] = options['rows']
+                elif options['scale'] and name in SCALED_BENCHMARKS:
+                    kwargs['rows'] = FLEET_SIZES[options['scale']]
+                self.stdout.write(self.style.MIGRATE_HEADING(name))
+                results = report['results'][name] = BENCHMARKS[name](**kwargs)
+                for key, value in results.items():
+                    self.stdout.write(f'  {key:<40} {value}{self.delta(baseline.get(name, {}).get(key), value)}')
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+            if temp_dir:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            self.stdout.write(f'Результаты записаны в {options["json_path"]}')
+
+    @staticmethod
+    def delta(old, new):
+        """Изменение числового результата относительно прошлого запуска"""
+        numbers = (int, float)
+        if not isinstance(old, numbers) or not isinstance(new, numbers) or isinstance(new, bool) or not old:
+            return ''
+        return f'  (было {old}, {(new / old - 1) * 100:+.1f}%)'
@@ -0,0 +1,32 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from wells.services.compression import BLOCK_POINTS, COMPACT_AFTER_DAYS, compact_telemetry
+from wells.services.rollups import HOUR, floor_bucket
+
+
+class Command(BaseCommand):
+    help = 'Упаковывает старую историю телеметрии в сжатые блоки'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=float, default=COMPACT_AFTER_DAYS,
+                            help='Упаковывать показания старше стольких суток')
+        parser.add_argument('--block-points', type=int, default=BLOCK_POINTS,
+                            help='Показаний в одном блоке')
+        parser.add_argument('--well', type=int, action='append', dest='well_ids',
+                            help='Только эта скважина (id), можно указать несколько раз')
+
+    def handle(self, *args, **options):
+        if options['older_than_days'] < 0 or options['block_points'] <= 0:
+            raise CommandError('--older-than-days и --block-points должны быть положительными')
+        # Граница по началу часа: часовые свертки не делятся между блоками и строками
+        before = floor_bucket(timezone.now() - timedelta(days=options['older_than_days']), HOUR)
+        started = time.perf_counter()
+        points, blocks = compact_telemetry(before, options['well_ids'], options['block_points'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Упаковано показаний: {points} в {blocks} блоков до {before:%Y-%m-%d %H:%M} UTC '
+            f'({time.perf_counter() - started:.2f} с)'
+        ))
@@ -0,0 +1,56 @@
+import json
+from urllib.parse import parse_qsl
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from wells.services.external_api_client import ExternalWellDataClient
+from wells.services.ingestion import DEFAULT_BATCH_SIZE, DEFAULT_CONCURRENCY
+from wells.services.scheduler import DEFAULT_BUDGET_PER_MINUTE, PollingScheduler, RequestBudget
+
+
+class Command(BaseCommand):
+    help = 'Непрерывно опрашивает телеметрию скважин с адаптивной частотой в пределах бюджета запросов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET_PER_MINUTE,
+                            help='Запросов к внешнему API в минуту (все виды запросов)')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='Количество скважин в одном запросе телеметрии')
+        parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                            help='Количество одновременных запросов телеметрии')
+        parser.add_argument('--duration', type=float, help='Время работы, с (по умолчанию - до прерывания)')
+        parser.add_argument('--fixed', action='store_true',
+                            help='Равномерный опрос без адаптации интервалов (для сравнения)')
+        parser.add_argument('--api-url', default=settings.EXTERNAL_API_URL, help='Адрес внешнего API')
+        parser.add_argument('--api-params', default='',
+                            help='Доп. параметры запросов, например "load_test=1&fleet_size=5000&latency=0"')
+
+    def handle(self, *args, **options):
+        if options['budget'] <= 0:
+            raise CommandError('--budget должен быть положительным')
+        client = ExternalWellDataClient(
+            api_url=options['api_url'],
+            api_key=settings.EXTERNAL_API_KEY,
+            use_mock=False,
+            params=dict(parse_qsl(options['api_params']))
+        )
+        scheduler = PollingScheduler(
+            client,
+            RequestBudget(options['budget']),
+            batch_size=options['batch_size'],
+            concurrency=options['concurrency'],
+            adaptive=not options['fixed'],
+        )
+        try:
+            result = scheduler.run(duration=options['duration'])
+        except ConnectionError as e:
+            raise CommandError(f'Внешнее API недоступно: {e}')
+        except KeyboardInterrupt:
+            result = scheduler.result
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Обновлений скважин: {result.wells}, показаний: {result.readings}, аномалий: {result.alerts}, '
+            f'запросов к API: {scheduler.budget.spent}'
+        ))
+        self.stdout.write(json.dumps(scheduler.stats(), ensure_ascii=False, indent=2))
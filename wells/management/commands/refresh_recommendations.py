@@ -0,0 +1,16 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from wells.services.recommendations import refresh_recommendations
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации по всему фонду скважин'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = refresh_recommendations()
+        self.stdout.write(self.style.SUCCESS(
+            f'Актуальных рекомендаций: {count} ({time.perf_counter() - started:.2f} с)'
+        ))
@@ -0,0 +1,54 @@
+from urllib.parse import parse_qsl
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from wells.services.changes import purge_tombstones
+from wells.services.external_api_client import ExternalWellDataClient
+from wells.services.ingestion import DEFAULT_BATCH_SIZE, DEFAULT_CONCURRENCY, WellSyncWorker
+
+
+class Command(BaseCommand):
+    help = 'Загружает скважины и их телеметрию из внешнего API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                            help='Количество одновременных пакетных запросов телеметрии')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='Количество скважин в одном запросе телеметрии и одной записи в БД')
+        parser.add_argument('--hours', type=int, default=24, help='Глубина истории телеметрии, часов')
+        parser.add_argument('--points', type=int, default=100, help='Количество точек телеметрии')
+        parser.add_argument('--api-url', default=settings.EXTERNAL_API_URL, help='Адрес внешнего API')
+        parser.add_argument('--api-params', default='',
+                            help='Доп. параметры запросов, например "load_test=1&fleet_size=5000&latency=0"')
+
+    def handle(self, *args, **options):
+        client = ExternalWellDataClient(
+            api_url=options['api_url'],
+            api_key=settings.EXTERNAL_API_KEY,
+            use_mock=False,
+            params=dict(parse_qsl(options['api_params']))
+        )
+        worker = WellSyncWorker(
+            client,
+            concurrency=options['concurrency'],
+            batch_size=options['batch_size'],
+            hours=options['hours'],
+            points=options['points'],
+        )
+        try:
+            result = worker.run()
+        except ConnectionError as e:
+            raise CommandError(f'Внешнее API недоступно: {e}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Синхронизировано скважин: {result.wells}, показаний: {result.readings}, '
+            f'аномалий: {result.alerts} '
+            f'за {result.elapsed:.2f} с ({result.wells_per_second:.1f} скважин/с)'
+        ))
+        if result.failed:
+            self.stdout.write(self.style.WARNING(f'Ошибки загрузки: {", ".join(result.failed)}'))
+
+        purged = purge_tombstones()
+        if purged:
+            self.stdout.write(f'Удалено устаревших отметок об удалении скважин: {purged}')
@@ -0,0 +1,29 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from wells.services.cold_storage import month_start, tier_telemetry
+
+
+class Command(BaseCommand):
+    help = 'Переносит старую историю телеметрии из БД в файлы холодного хранилища'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=float, default=settings.TELEMETRY_COLD_AFTER_DAYS,
+                            help='Переносить месяцы, закончившиеся раньше стольких суток назад')
+        parser.add_argument('--well', type=int, action='append', dest='well_ids',
+                            help='Только эта скважина (id), можно указать несколько раз')
+
+    def handle(self, *args, **options):
+        if options['older_than_days'] < 0:
+            raise CommandError('--older-than-days не может быть отрицательным')
+        before = timezone.now() - timedelta(days=options['older_than_days'])
+        started = time.perf_counter()
+        points, wells = tier_telemetry(before, options['well_ids'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Перенесено показаний: {points} ({wells} скважин) до {month_start(before):%Y-%m-%d} UTC '
+            f'в {settings.TELEMETRY_COLD_DIR} ({time.perf_counter() - started:.2f} с)'
+        ))
@@ -0,0 +1,38 @@
+# Generated by Django 4.2 on 2026-10-17 18:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wells', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TelemetryReading',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.DateTimeField(verbose_name='Время замера')),
+                ('bucket', models.PositiveIntegerField(help_text='Месяц замера в формате ГГГГММ (UTC), используется для секционирования', verbose_name='Период')),
+                ('temperature', models.FloatField(verbose_name='Температура, °C')),
+                ('pressure', models.FloatField(verbose_name='Давление, атм')),
+                ('flow_rate', models.FloatField(verbose_name='Дебит, м³/сут')),
+                ('well', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='telemetry', to='wells.well', verbose_name='Скважина')),
+            ],
+            options={
+                'verbose_name': 'Показание телеметрии',
+                'verbose_name_plural': 'Показания телеметрии',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='telemetryreading',
+            index=models.Index(fields=['bucket', 'well'], name='telemetry_bucket_well_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='telemetryreading',
+            constraint=models.UniqueConstraint(fields=('well', 'timestamp'), name='telemetry_well_timestamp_uniq'),
+        ),
+    ]
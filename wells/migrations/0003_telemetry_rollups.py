@@ -0,0 +1,72 @@
+# Generated by Django 4.2 on 2026-10-17 18:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wells', '0002_telemetry_reading'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FieldTelemetryRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Час'), ('day', 'Сутки')], max_length=10, verbose_name='Интервал')),
+                ('bucket_start', models.DateTimeField(verbose_name='Начало интервала')),
+                ('count', models.PositiveIntegerField(verbose_name='Количество замеров')),
+                ('temperature_min', models.FloatField(verbose_name='Температура, мин.')),
+                ('temperature_max', models.FloatField(verbose_name='Температура, макс.')),
+                ('temperature_avg', models.FloatField(verbose_name='Температура, средн.')),
+                ('pressure_min', models.FloatField(verbose_name='Давление, мин.')),
+                ('pressure_max', models.FloatField(verbose_name='Давление, макс.')),
+                ('pressure_avg', models.FloatField(verbose_name='Давление, средн.')),
+                ('flow_rate_min', models.FloatField(verbose_name='Дебит, мин.')),
+                ('flow_rate_max', models.FloatField(verbose_name='Дебит, макс.')),
+                ('flow_rate_avg', models.FloatField(verbose_name='Дебит, средн.')),
+                ('field', models.CharField(max_length=100, verbose_name='Месторождение')),
+            ],
+            options={
+                'verbose_name': 'Свертка телеметрии месторождения',
+                'verbose_name_plural': 'Свертки телеметрии месторождений',
+            },
+        ),
+        migrations.CreateModel(
+            name='TelemetryRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Час'), ('day', 'Сутки')], max_length=10, verbose_name='Интервал')),
+                ('bucket_start', models.DateTimeField(verbose_name='Начало интервала')),
+                ('count', models.PositiveIntegerField(verbose_name='Количество замеров')),
+                ('temperature_min', models.FloatField(verbose_name='Температура, мин.')),
+                ('temperature_max', models.FloatField(verbose_name='Температура, макс.')),
+                ('temperature_avg', models.FloatField(verbose_name='Температура, средн.')),
+                ('pressure_min', models.FloatField(verbose_name='Давление, мин.')),
+                ('pressure_max', models.FloatField(verbose_name='Давление, макс.')),
+                ('pressure_avg', models.FloatField(verbose_name='Давление, средн.')),
+                ('flow_rate_min', models.FloatField(verbose_name='Дебит, мин.')),
+                ('flow_rate_max', models.FloatField(verbose_name='Дебит, макс.')),
+                ('flow_rate_avg', models.FloatField(verbose_name='Дебит, средн.')),
+                ('well', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='telemetry_rollups', to='wells.well', verbose_name='Скважина')),
+            ],
+            options={
+                'verbose_name': 'Свертка телеметрии скважины',
+                'verbose_name_plural': 'Свертки телеметрии скважин',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='fieldtelemetryrollup',
+            index=models.Index(fields=['granularity', 'bucket_start'], name='rollup_field_gran_bucket_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='fieldtelemetryrollup',
+            constraint=models.UniqueConstraint(fields=('field', 'granularity', 'bucket_start'), name='rollup_field_bucket_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='telemetryrollup',
+            constraint=models.UniqueConstraint(fields=('well', 'granularity', 'bucket_start'), name='rollup_well_bucket_uniq'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2 on 2026-10-17 18:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wells', '0003_telemetry_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Recommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rule', models.CharField(max_length=50, verbose_name='Правило')),
+                ('type', models.CharField(choices=[('optimization', 'Оптимизация'), ('maintenance', 'Обслуживание'), ('emergency', 'Аварийная ситуация')], max_length=20, verbose_name='Тип')),
+                ('priority', models.CharField(choices=[('critical', 'Критическая'), ('high', 'Высокая'), ('medium', 'Средняя'), ('low', 'Низкая')], max_length=10, verbose_name='Приоритет')),
+                ('title', models.CharField(max_length=200, verbose_name='Заголовок')),
+                ('description', models.TextField(verbose_name='Описание')),
+                ('economic_effect', models.CharField(blank=True, max_length=200, verbose_name='Экономический эффект')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает рассмотрения'), ('accepted', 'Принята'), ('rejected', 'Отклонена')], default='pending', max_length=10, verbose_name='Статус')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создана')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлена')),
+                ('well', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='recommendations', to='wells.well', verbose_name='Скважина')),
+            ],
+            options={
+                'verbose_name': 'Рекомендация',
+                'verbose_name_plural': 'Рекомендации',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='recommendation',
+            index=models.Index(fields=['status', 'priority'], name='recommendation_status_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='recommendation',
+            constraint=models.UniqueConstraint(fields=('well', 'rule'), name='recommendation_well_rule_uniq'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2 on 2026-10-17 18:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wells', '0004_recommendations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnomalyDetectorState',
+            fields=[
+                ('well', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='anomaly_state', serialize=False, to='wells.well', verbose_name='Скважина')),
+                ('state', models.BinaryField(help_text='Упакованные статистики EWMA/CUSUM по параметрам телеметрии', verbose_name='Состояние')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+            ],
+            options={
+                'verbose_name': 'Состояние детектора аномалий',
+                'verbose_name_plural': 'Состояния детектора аномалий',
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2 on 2026-10-17 18:48
+
+from django.db import migrations, models
+
+
+# BRIN-индекс по времени показаний: на PostgreSQL занимает единицы страниц
+# и ускоряет выборки по периоду всего фонда (свертки). На других СУБД не создается.
+BRIN_INDEX = 'telemetry_timestamp_brin'
+
+
+def create_telemetry_brin(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = apps.get_model('wells', 'TelemetryReading')._meta.db_table
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {BRIN_INDEX} ON {table} '
+        f'USING brin (timestamp) WITH (pages_per_range = 32)'
+    )
+
+
+def drop_telemetry_brin(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {BRIN_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wells', '0005_anomaly_detector_state'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='well',
+            index=models.Index(fields=['status'], name='well_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='well',
+            index=models.Index(fields=['field', 'status'], name='well_field_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='well',
+            index=models.Index(fields=['last_data_update'], name='well_last_update_idx'),
+        ),
+        migrations.RunPython(create_telemetry_brin, drop_telemetry_brin),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2 on 2026-10-17 18:55
+
+from django.db import migrations, models
+
+from wells.geohash import encode
+
+
+def fill_geohash(apps, schema_editor):
+    Well = apps.get_model('wells', 'Well')
+    batch = []
+    for well in Well.objects.only('id', 'latitude', 'longitude').iterator(chunk_size=2000):
+        well.geohash = encode(float(well.latitude), float(well.longitude))
+        batch.append(well)
+        if len(batch) >= 2000:
+            Well.objects.bulk_update(batch, ['geohash'])
+            batch = []
+    if batch:
+        Well.objects.bulk_update(batch, ['geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wells', '0006_well_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='well',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Пространственный индекс; заполняется при сохранении из широты и долготы', max_length=12, verbose_name='Geohash координат'),
+        ),
+        migrations.RunPython(fill_geohash, migrations.RunPython.noop),
+    ]
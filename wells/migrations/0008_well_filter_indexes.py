@@ -0,0 +1,45 @@
+# Generated by Django 4.2 on 2026-10-17 18:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wells', '0007_well_geohash'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='well',
+            name='well_status_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='well',
+            name='well_field_status_idx',
+        ),
+        migrations.AddIndex(
+            model_name='well',
+            index=models.Index(fields=['status', 'well_number'], name='well_status_number_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='well',
+            index=models.Index(fields=['field', 'status', 'well_number'], name='well_field_status_number_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='well',
+            index=models.Index(fields=['current_pressure'], name='well_pressure_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='well',
+            index=models.Index(fields=['measured_flow_rate'], name='well_flow_rate_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='well',
+            index=models.Index(fields=['temperature'], name='well_temperature_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='well',
+            index=models.Index(fields=['depth'], name='well_depth_idx'),
+        ),
+    ]
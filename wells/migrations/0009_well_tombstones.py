@@ -0,0 +1,39 @@
+# Generated by Django 4.2 on 2026-10-17 19:03
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wells', '0008_well_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WellTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('well_id', models.BigIntegerField(verbose_name='ID скважины')),
+                ('well_number', models.CharField(max_length=100, verbose_name='Номер скважины')),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Время удаления')),
+            ],
+            options={
+                'verbose_name': 'Удаленная скважина',
+                'verbose_name_plural': 'Удаленные скважины',
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='well',
+            name='well_last_update_idx',
+        ),
+        migrations.AddIndex(
+            model_name='well',
+            index=models.Index(fields=['last_data_update', 'id'], name='well_last_update_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='welltombstone',
+            index=models.Index(fields=['deleted_at', 'well_id'], name='tombstone_deleted_well_idx'),
+        ),
+    ]
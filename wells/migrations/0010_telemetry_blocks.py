@@ -0,0 +1,33 @@
+# Generated by Django 4.2 on 2026-10-17 20:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wells', '0009_well_tombstones'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TelemetryBlock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start', models.DateTimeField(verbose_name='Первый замер')),
+                ('end', models.DateTimeField(verbose_name='Последний замер')),
+                ('count', models.PositiveIntegerField(verbose_name='Количество замеров')),
+                ('data', models.BinaryField(verbose_name='Данные')),
+                ('well', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='telemetry_blocks', to='wells.well', verbose_name='Скважина')),
+            ],
+            options={
+                'verbose_name': 'Блок телеметрии',
+                'verbose_name_plural': 'Блоки телеметрии',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='telemetryblock',
+            constraint=models.UniqueConstraint(fields=('well', 'start'), name='telemetry_block_well_start_uniq'),
+        ),
+    ]
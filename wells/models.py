@@ -1,4 +1,9 @@
+from datetime import timezone as dt_timezone
+
 from django.db import models
+from django.utils import timezone
+
+from .geohash import encode as geohash_encode
 
 
 class Well(models.Model):
@@ -60,11 +65,376 @@ class Well(models.Model):
         verbose_name='Последнее обновление данных',
         auto_now=True
     )
+    geohash = models.CharField(
+        max_length=12,
+        verbose_name='Geohash координат',
+        db_index=True,
+        editable=False,
+        blank=True,
+        help_text='Пространственный индекс; заполняется при сохранении из широты и долготы'
+    )
 
     def __str__(self):
         return f'{self.well_number} = {self.field}'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Месторождение при загрузке: перенос скважины пересчитывает свертки
+        # прежнего и нового месторождений (см. wells.signals)
+        instance._loaded_field = instance.__dict__.get('field')
+        return instance
+
+    def update_geohash(self):
+        """Пересчитывает geohash по координатам (для bulk_create/bulk_update - вызывать явно)"""
+        self.geohash = geohash_encode(float(self.latitude), float(self.longitude))
+
+    def save(self, *args, **kwargs):
+        self.update_geohash()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'geohash'}
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = 'Скважина'
         verbose_name_plural = 'Скважины'
         ordering = ['well_number']
+        indexes = [
+            # Номер скважины последней колонкой: фильтр + страница в порядке
+            # well_number (сортировка по умолчанию) читаются из индекса без сортировки
+            models.Index(fields=['status', 'well_number'], name='well_status_number_idx'),
+            # Покрывает и фильтр только по месторождению (ведущая колонка)
+            models.Index(fields=['field', 'status', 'well_number'], name='well_field_status_number_idx'),
+            # Фильтр since и лента изменений по курсору (last_data_update, id)
+            models.Index(fields=['last_data_update', 'id'], name='well_last_update_id_idx'),
+            # Диапазонные фильтры и сортировка списка (см. wells.filters)
+            models.Index(fields=['current_pressure'], name='well_pressure_idx'),
+            models.Index(fields=['measured_flow_rate'], name='well_flow_rate_idx'),
+            models.Index(fields=['temperature'], name='well_temperature_idx'),
+            models.Index(fields=['depth'], name='well_depth_idx'),
+        ]
+
+
+class WellTombstone(models.Model):
+    """
+    Отметка об удалении скважины для ленты изменений (/api/wells/changes/):
+    клиент, синхронизирующийся по курсору, узнает, какие скважины убрать.
+    Хранится TOMBSTONE_RETENTION (см. wells.services.changes).
+    """
+    well_id = models.BigIntegerField(
+        verbose_name='ID скважины'
+    )
+    well_number = models.CharField(
+        max_length=100,
+        verbose_name='Номер скважины'
+    )
+    deleted_at = models.DateTimeField(
+        verbose_name='Время удаления',
+        default=timezone.now
+    )
+
+    def __str__(self):
+        return f'{self.well_number} (удалена {self.deleted_at:%Y-%m-%d %H:%M})'
+
+    class Meta:
+        verbose_name = 'Удаленная скважина'
+        verbose_name_plural = 'Удаленные скважины'
+        indexes = [
+            models.Index(fields=['deleted_at', 'well_id'], name='tombstone_deleted_well_idx')
+        ]
+
+
+def telemetry_bucket(timestamp):
+    """Номер временного сегмента (ГГГГММ, UTC) для показаний телеметрии"""
+    timestamp = timestamp.astimezone(dt_timezone.utc)
+    return timestamp.year * 100 + timestamp.month
+
+
+class TelemetryReadingQuerySet(models.QuerySet):
+    """Запросы к истории телеметрии"""
+
+    def in_range(self, start=None, end=None):
+        """
+        Показания в полуинтервале [start, end).
+        Дополнительное условие по bucket позволяет СУБД отбросить
+        лишние сегменты (секции) ещё до обращения к индексу.
+        """
+        queryset = self
+        if start is not None:
+            queryset = queryset.filter(timestamp__gte=start, bucket__gte=telemetry_bucket(start))
+        if end is not None:
+            queryset = queryset.filter(timestamp__lt=end, bucket__lte=telemetry_bucket(end))
+        return queryset
+
+
+class TelemetryReading(models.Model):
+    """Показания телеметрии скважины: одна строка на момент замера"""
+    well = models.ForeignKey(
+        Well,
+        on_delete=models.CASCADE,
+        related_name='telemetry',
+        verbose_name='Скважина',
+        # Индекс по well покрывается составным ограничением (well, timestamp)
+        db_index=False
+    )
+    timestamp = models.DateTimeField(
+        verbose_name='Время замера'
+    )
+    bucket = models.PositiveIntegerField(
+        verbose_name='Период',
+        help_text='Месяц замера в формате ГГГГММ (UTC), используется для секционирования'
+    )
+    temperature = models.FloatField(
+        verbose_name='Температура, °C'
+    )
+    pressure = models.FloatField(
+        verbose_name='Давление, атм'
+    )
+    flow_rate = models.FloatField(
+        verbose_name='Дебит, м³/сут'
+    )
+
+    objects = TelemetryReadingQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        self.bucket = telemetry_bucket(self.timestamp)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f'{self.well_id} @ {self.timestamp:%Y-%m-%d %H:%M}'
+
+    class Meta:
+        verbose_name = 'Показание телеметрии'
+        verbose_name_plural = 'Показания телеметрии'
+        constraints = [
+            # Составной индекс (well, timestamp) для выборок по диапазону времени
+            models.UniqueConstraint(
+                fields=['well', 'timestamp'],
+                name='telemetry_well_timestamp_uniq'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['bucket', 'well'], name='telemetry_bucket_well_idx')
+        ]
+
+
+class TelemetryBlock(models.Model):
+    """
+    Сжатый блок истории телеметрии скважины (формат - wells.services.compression).
+    Блоки одной скважины не пересекаются по времени и не пересекаются с ее строками TelemetryReading.
+    """
+    well = models.ForeignKey(
+        Well,
+        on_delete=models.CASCADE,
+        related_name='telemetry_blocks',
+        verbose_name='Скважина',
+        # Индекс по well покрывается составным ограничением (well, start)
+        db_index=False
+    )
+    start = models.DateTimeField(
+        verbose_name='Первый замер'
+    )
+    end = models.DateTimeField(
+        verbose_name='Последний замер'
+    )
+    count = models.PositiveIntegerField(
+        verbose_name='Количество замеров'
+    )
+    data = models.BinaryField(
+        verbose_name='Данные'
+    )
+
+    def __str__(self):
+        return f'{self.well_id} @ {self.start:%Y-%m-%d %H:%M} ({self.count})'
+
+    class Meta:
+        verbose_name = 'Блок телеметрии'
+        verbose_name_plural = 'Блоки телеметрии'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['well', 'start'],
+                name='telemetry_block_well_start_uniq'
+            )
+        ]
+
+
+class TelemetryStats(models.Model):
+    """Агрегаты телеметрии за интервал времени (общая часть таблиц свертки)"""
+    HOUR = 'hour'
+    DAY = 'day'
+    GRANULARITY_CHOICES = [
+        (HOUR, 'Час'),
+        (DAY, 'Сутки')
+    ]
+
+    granularity = models.CharField(
+        max_length=10,
+        choices=GRANULARITY_CHOICES,
+        verbose_name='Интервал'
+    )
+    bucket_start = models.DateTimeField(
+        verbose_name='Начало интервала'
+    )
+    count = models.PositiveIntegerField(
+        verbose_name='Количество замеров'
+    )
+    temperature_min = models.FloatField(verbose_name='Температура, мин.')
+    temperature_max = models.FloatField(verbose_name='Температура, макс.')
+    temperature_avg = models.FloatField(verbose_name='Температура, средн.')
+    pressure_min = models.FloatField(verbose_name='Давление, мин.')
+    pressure_max = models.FloatField(verbose_name='Давление, макс.')
+    pressure_avg = models.FloatField(verbose_name='Давление, средн.')
+    flow_rate_min = models.FloatField(verbose_name='Дебит, мин.')
+    flow_rate_max = models.FloatField(verbose_name='Дебит, макс.')
+    flow_rate_avg = models.FloatField(verbose_name='Дебит, средн.')
+
+    class Meta:
+        abstract = True
+
+
+class TelemetryRollup(TelemetryStats):
+    """Свертка телеметрии скважины по часам и суткам"""
+    well = models.ForeignKey(
+        Well,
+        on_delete=models.CASCADE,
+        related_name='telemetry_rollups',
+        verbose_name='Скважина',
+        db_index=False
+    )
+
+    class Meta:
+        verbose_name = 'Свертка телеметрии скважины'
+        verbose_name_plural = 'Свертки телеметрии скважин'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['well', 'granularity', 'bucket_start'],
+                name='rollup_well_bucket_uniq'
+            )
+        ]
+
+
+class FieldTelemetryRollup(TelemetryStats):
+    """Свертка телеметрии месторождения (все его скважины) по часам и суткам"""
+    field = models.CharField(
+        max_length=100,
+        verbose_name='Месторождение'
+    )
+
+    class Meta:
+        verbose_name = 'Свертка телеметрии месторождения'
+        verbose_name_plural = 'Свертки телеметрии месторождений'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['field', 'granularity', 'bucket_start'],
+                name='rollup_field_bucket_uniq'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['granularity', 'bucket_start'], name='rollup_field_gran_bucket_idx')
+        ]
+
+
+class Recommendation(models.Model):
+    """Рекомендация по скважине, сформированная правилами аналитики"""
+    TYPE_CHOICES = [
+        ('optimization', 'Оптимизация'),
+        ('maintenance', 'Обслуживание'),
+        ('emergency', 'Аварийная ситуация')
+    ]
+    PRIORITY_CHOICES = [
+        ('critical', 'Критическая'),
+        ('high', 'Высокая'),
+        ('medium', 'Средняя'),
+        ('low', 'Низкая')
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Ожидает рассмотрения'),
+        ('accepted', 'Принята'),
+        ('rejected', 'Отклонена')
+    ]
+
+    well = models.ForeignKey(
+        Well,
+        on_delete=models.CASCADE,
+        related_name='recommendations',
+        verbose_name='Скважина',
+        db_index=False
+    )
+    rule = models.CharField(
+        max_length=50,
+        verbose_name='Правило'
+    )
+    type = models.CharField(
+        max_length=20,
+        choices=TYPE_CHOICES,
+        verbose_name='Тип'
+    )
+    priority = models.CharField(
+        max_length=10,
+        choices=PRIORITY_CHOICES,
+        verbose_name='Приоритет'
+    )
+    title = models.CharField(
+        max_length=200,
+        verbose_name='Заголовок'
+    )
+    description = models.TextField(
+        verbose_name='Описание'
+    )
+    economic_effect = models.CharField(
+        max_length=200,
+        blank=True,
+        verbose_name='Экономический эффект'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='pending',
+        verbose_name='Статус'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Создана'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Обновлена'
+    )
+
+    def __str__(self):
+        return f'{self.well_id}: {self.title}'
+
+    class Meta:
+        verbose_name = 'Рекомендация'
+        verbose_name_plural = 'Рекомендации'
+        constraints = [
+            # Одна актуальная рекомендация каждого правила на скважину
+            models.UniqueConstraint(fields=['well', 'rule'], name='recommendation_well_rule_uniq')
+        ]
+        indexes = [
+            models.Index(fields=['status', 'priority'], name='recommendation_status_idx')
+        ]
+
+
+class AnomalyDetectorState(models.Model):
+    """Сохраненное состояние онлайн-детектора аномалий скважины"""
+    well = models.OneToOneField(
+        Well,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='anomaly_state',
+        verbose_name='Скважина'
+    )
+    state = models.BinaryField(
+        verbose_name='Состояние',
+        help_text='Упакованные статистики EWMA/CUSUM по параметрам телеметрии'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Обновлено'
+    )
+
+    class Meta:
+        verbose_name = 'Состояние детектора аномалий'
+        verbose_name_plural = 'Состояния детектора аномалий'
@@ -0,0 +1,109 @@
+import json
+from datetime import datetime
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+
+from .filters import ordering_expressions
+
+
+class WellCursorPagination(CursorPagination):
+    """
+    Keyset-пагинация списка скважин по номеру скважины.
+    Страница выбирается условием well_number > <позиция курсора> по уникальному
+    индексу, поэтому стоимость любой страницы не зависит от ее номера.
+
+    При сортировке по другому полю позиция составная - (значение поля,
+    номер скважины): номер уникален, поэтому смещение в курсоре не нужно,
+    а скважины без значения поля (NULL, в конце списка) тоже листаются.
+    """
+    ordering = 'well_number'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.model = queryset.model
+        self.cursor = self.decode_cursor(request)
+        reverse = bool(self.cursor and self.cursor.reverse)
+        position = self.cursor.position if self.cursor else None
+
+        queryset = queryset.order_by(*ordering_expressions(self.model, self.ordering, reverse))
+        if position is not None:
+            queryset = queryset.filter(self._after(self._decode_position(position), reverse))
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        position = self._get_position_from_instance(self.page[-1], self.ordering) if self.page else self.cursor.position
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        position = self._get_position_from_instance(self.page[0], self.ordering) if self.page else self.cursor.position
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field in ordering:
+            value = getattr(instance, field.lstrip('-'))
+            values.append(value.isoformat() if isinstance(value, datetime) else value)
+        # Сортировка только по номеру - позиция в прежнем формате (строка)
+        return values[0] if len(values) == 1 else json.dumps(values, ensure_ascii=False)
+
+    def _decode_position(self, position):
+        try:
+            values = [position] if len(self.ordering) == 1 else json.loads(position)
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError(position)
+            return [
+                None if value is None else self.model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except (ValueError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _after(self, values, reverse):
+        """
+        Условие "строго после позиции values" в порядке обхода:
+        лексикографически по полям сортировки, NULL - в конце (при reverse - в начале).
+        """
+        condition = None
+        for field, value in reversed(list(zip(self.ordering, values))):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            nullable = self.model._meta.get_field(name).null
+            if value is None:
+                # NULL в конце: после него только NULL; в начале (reverse): все не-NULL
+                greater = None if not reverse else Q(**{f'{name}__isnull': False})
+                equal = Q(**{f'{name}__isnull': True})
+            else:
+                greater = Q(**{f'{name}__{"lt" if descending else "gt"}': value})
+                if nullable and not reverse:
+                    greater |= Q(**{f'{name}__isnull': True})
+                equal = Q(**{name: value})
+            if condition is not None:
+                tail = equal & condition
+                condition = tail if greater is None else greater | tail
+            else:
+                condition = greater if greater is not None else Q(pk__in=[])
+        return condition
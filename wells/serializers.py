@@ -1,8 +1,39 @@
+import json
+
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Well
+from .models import Recommendation, Well
+
+
+class SparseFieldsMixin:
+    """
+    Выбор полей ответа параметром запроса: ?fields=well_number,status
+    Действует только для чтения (GET), запись всегда проверяет все поля.
+    """
+
+    @classmethod
+    def requested_fields(cls, request):
+        """Запрошенные поля или None, если ограничение не задано"""
+        if request is None or request.method != 'GET':
+            return None
+        value = request.query_params.get('fields')
+        if not value:
+            return None
+        fields = [name.strip() for name in value.split(',') if name.strip()]
+        unknown = set(fields) - set(cls.Meta.fields)
+        if unknown:
+            raise serializers.ValidationError({'fields': f'Неизвестные поля: {", ".join(sorted(unknown))}'})
+        return fields
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = self.requested_fields(self.context.get('request'))
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
 
-class WellSerializer(serializers.ModelSerializer):
+
+class WellSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Сериализатор для модели скважины"""
 
     status_display = serializers.CharField(
@@ -26,4 +57,138 @@ class WellSerializer(serializers.ModelSerializer):
             'measured_flow_rate',
             'temperature',
             'last_data_update'
-        ]
\ No newline at end of file
+        ]
+
+
+class WellRowSerializer:
+    """
+    Быстрая сериализация списка скважин только для чтения.
+    Читает кортежи через values_list() и преобразует их простыми функциями,
+    без полей ModelSerializer и вызова get_status_display() на каждую строку.
+    Результат совпадает с WellSerializer (поля, типы, формат чисел и дат).
+    """
+    STATUS_DISPLAY = dict(Well.STATUS_CHOICES)
+
+    def __init__(self, fields=None):
+        self.fields = list(fields or WellSerializer.Meta.fields)
+        self.columns = []
+        self.converters = []
+        for name in self.fields:
+            column = 'status' if name == 'status_display' else name
+            if column not in self.columns:
+                self.columns.append(column)
+            self.converters.append((name, self.columns.index(column), self._converter(name)))
+
+    def _converter(self, name):
+        if name == 'status_display':
+            return self.STATUS_DISPLAY.get
+        if name in ('latitude', 'longitude'):
+            # Значения из БД уже округлены до decimal_places, как в DecimalField DRF
+            return lambda value: None if value is None else format(value, 'f')
+        if name == 'last_data_update':
+            tz = timezone.get_current_timezone()
+
+            def to_iso(value):
+                if value is None:
+                    return None
+                value = value.astimezone(tz).isoformat()
+                return value[:-6] + 'Z' if value.endswith('+00:00') else value
+            return to_iso
+        return None
+
+    def to_dict(self, row):
+        """Кортеж values_list(*self.columns) -> словарь в формате WellSerializer"""
+        return {
+            name: convert(row[index]) if convert else row[index]
+            for name, index, convert in self.converters
+        }
+
+    def rows(self, queryset, chunk_size=2000):
+        """Итератор словарей в формате WellSerializer"""
+        to_dict = self.to_dict
+        for row in queryset.values_list(*self.columns).iterator(chunk_size=chunk_size):
+            yield to_dict(row)
+
+    def iter_json(self, queryset, chunk_size=2000):
+        """JSON-массив скважин по частям, для StreamingHttpResponse"""
+        yield '['
+        chunk = []
+        first = True
+        for row in self.rows(queryset, chunk_size=chunk_size):
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield ('' if first else ',') + json.dumps(chunk, ensure_ascii=False)[1:-1]
+                first = False
+                chunk = []
+        if chunk:
+            yield ('' if first else ',') + json.dumps(chunk, ensure_ascii=False)[1:-1]
+        yield ']'
+
+    def iter_ndjson(self, queryset, chunk_size=2000):
+        """Скважины в формате NDJSON (по объекту на строку), частями по chunk_size строк"""
+        lines = []
+        for row in self.rows(queryset, chunk_size=chunk_size):
+            lines.append(json.dumps(row, ensure_ascii=False))
+            if len(lines) >= chunk_size:
+                yield '\n'.join(lines) + '\n'
+                lines = []
+        if lines:
+            yield '\n'.join(lines) + '\n'
+
+
+class RecommendationSerializer(serializers.ModelSerializer):
+    """Сериализатор рекомендации по скважине"""
+
+    well_number = serializers.CharField(source='well.well_number', read_only=True)
+
+    class Meta:
+        model = Recommendation
+        fields = [
+            'id',
+            'well',
+            'well_number',
+            'rule',
+            'type',
+            'priority',
+            'title',
+            'description',
+            'economic_effect',
+            'status',
+            'created_at',
+            'updated_at'
+        ]
+
+
+class ExternalCoordinatesSerializer(serializers.Serializer):
+    """Координаты скважины во внешнем API"""
+    lat = serializers.FloatField(min_value=-90, max_value=90)
+    lon = serializers.FloatField(min_value=-180, max_value=180)
+
+
+class ExternalWellSerializer(serializers.Serializer):
+    """Скважина в формате внешнего API (mock_external_api, ExternalWellDataClient)"""
+    well_id = serializers.CharField(max_length=100)
+    coordinates = ExternalCoordinatesSerializer()
+    depth = serializers.FloatField(min_value=0)
+    status = serializers.ChoiceField(choices=Well.STATUS_CHOICES)
+    field_name = serializers.CharField(max_length=100, required=False)
+    temperature = serializers.FloatField(required=False, allow_null=True)
+    pressure = serializers.FloatField(required=False, allow_null=True)
+    flow_rate = serializers.FloatField(required=False, allow_null=True)
+
+    @staticmethod
+    def to_well(data):
+        """Экземпляр Well (не сохраненный) из проверенных данных"""
+        well = Well(
+            well_number=data['well_id'],
+            field=data.get('field_name', ''),
+            latitude=round(data['coordinates']['lat'], 6),
+            longitude=round(data['coordinates']['lon'], 6),
+            depth=data['depth'],
+            status=data['status'],
+            current_pressure=data.get('pressure'),
+            measured_flow_rate=data.get('flow_rate'),
+            temperature=data.get('temperature'),
+        )
+        well.update_geohash()
+        return well
@@ -0,0 +1,268 @@
+"""
+Онлайн-обнаружение аномалий телеметрии.
+
+Для каждой скважины и параметра хранится компактное состояние
+(SeriesState, __slots__): экспоненциально взвешенные среднее и дисперсия
+и две суммы CUSUM. Каждая новая точка обновляет его за O(1),
+точки одной пачки проходят по каждому параметру одним циклом:
+    - выброс (spike): |z| >= Z_THRESHOLD относительно EWMA;
+    - сдвиг уровня (shift): накопленная сумма CUSUM превысила CUSUM_H.
+
+Состояния сохраняются в AnomalyDetectorState, поэтому после перезапуска
+история не перечитывается. Уже обработанные точки (повторно присланные
+внешним API) пропускаются по метке времени.
+
+Тревога - рекомендация anomaly_<параметр>; повторная аномалия снова
+открывает ее (status=pending), даже если ранее она была принята или
+отклонена. Пока тревога открыта и не старше ALERT_HOLD, статус emergency,
+выставленный детектором, синхронизация из внешнего API не перезаписывает
+(см. held_emergency_wells).
+"""
+import math
+import struct
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Dict, Iterable, List, Set, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from wells.models import AnomalyDetectorState, Recommendation, Well
+
+
+PARAMETERS = ('temperature', 'pressure', 'flow_rate')
+PARAMETER_TITLES = {'temperature': 'температуры', 'pressure': 'давления', 'flow_rate': 'дебита'}
+
+EWMA_ALPHA = 0.2
+WARMUP_POINTS = 10
+Z_THRESHOLD = 4.0
+CRITICAL_Z = 6.0
+CUSUM_K = 1.0
+CUSUM_H = 10.0
+# Минимальное стандартное отклонение: телеметрия округляется до 0.1
+MIN_STD = 0.1
+# Сколько открытая тревога удерживает статус emergency без новых аномалий
+ALERT_HOLD = timedelta(hours=24)
+ALERT_RULE_PREFIX = 'anomaly_'
+
+
+class SeriesState:
+    """Состояние одного временного ряда (O(1) памяти и времени на точку)"""
+    __slots__ = ('count', 'mean', 'var', 'cusum_pos', 'cusum_neg')
+    FORMAT = '<qdddd'
+
+    def __init__(self, count=0, mean=0.0, var=0.0, cusum_pos=0.0, cusum_neg=0.0):
+        self.count = count
+        self.mean = mean
+        self.var = var
+        self.cusum_pos = cusum_pos
+        self.cusum_neg = cusum_neg
+
+    def update(self, values: List[float]) -> List[Tuple[int, str, float]]:
+        """
+        Учитывает точки values по порядку, O(1) на точку.
+        Статистики держатся в локальных переменных на время цикла.
+
+        Returns:
+            Аномалии: (индекс точки, вид аномалии, z-оценка)
+        """
+        count, mean, var = self.count, self.mean, self.var
+        cusum_pos, cusum_neg = self.cusum_pos, self.cusum_neg
+        alpha, decay = EWMA_ALPHA, 1 - EWMA_ALPHA
+        anomalies = []
+
+        for index, x in enumerate(values):
+            if count == 0:
+                count, mean = 1, x
+                continue
+
+            diff = x - mean
+            std = math.sqrt(var)
+            z = diff / (std if std > MIN_STD else MIN_STD)
+            increment = alpha * diff
+            mean += increment
+            var = decay * (var + diff * increment)
+            count += 1
+            if count <= WARMUP_POINTS:
+                continue
+
+            if z >= Z_THRESHOLD or z <= -Z_THRESHOLD:
+                # Выброс не копится в CUSUM: иначе следом за ним сработал бы и сдвиг уровня
+                anomalies.append((index, 'spike', z))
+                continue
+            cusum_pos = max(0.0, cusum_pos + z - CUSUM_K)
+            cusum_neg = max(0.0, cusum_neg - z - CUSUM_K)
+            if cusum_pos > CUSUM_H or cusum_neg > CUSUM_H:
+                cusum_pos = cusum_neg = 0.0
+                anomalies.append((index, 'shift', z))
+
+        self.count, self.mean, self.var = count, mean, var
+        self.cusum_pos, self.cusum_neg = cusum_pos, cusum_neg
+        return anomalies
+
+
+class WellDetector:
+    """Состояния всех параметров скважины и метка времени последней точки"""
+    __slots__ = ('last_timestamp', 'series')
+    FORMAT = '<q' + SeriesState.FORMAT[1:] * len(PARAMETERS)
+
+    def __init__(self, last_timestamp=0, series=None):
+        self.last_timestamp = last_timestamp
+        self.series = series or [SeriesState() for _ in PARAMETERS]
+
+    def pack(self) -> bytes:
+        values = [self.last_timestamp]
+        for state in self.series:
+            values.extend((state.count, state.mean, state.var, state.cusum_pos, state.cusum_neg))
+        return struct.pack(self.FORMAT, *values)
+
+    @classmethod
+    def unpack(cls, data: bytes) -> 'WellDetector':
+        values = struct.unpack(cls.FORMAT, bytes(data))
+        width = len(SeriesState.__slots__)
+        return cls(values[0], [
+            SeriesState(*values[1 + i * width:1 + (i + 1) * width]) for i in range(len(PARAMETERS))
+        ])
+
+
+@dataclass
+class Alert:
+    well_id: int
+    parameter: str
+    kind: str
+    timestamp: int
+    value: float
+    z: float
+
+    @property
+    def critical(self) -> bool:
+        return abs(self.z) >= CRITICAL_Z
+
+
+class AnomalyDetector:
+    """
+    Детектор аномалий для потока телеметрии нескольких скважин.
+
+    Использование:
+        detector = AnomalyDetector()
+        alerts = detector.process_batch([(well, telemetry), ...])
+    """
+
+    def __init__(self):
+        self.detectors: Dict[int, WellDetector] = {}
+
+    def load(self, well_ids: Iterable[int]) -> None:
+        """Загружает сохраненные состояния еще не загруженных скважин (один запрос)"""
+        missing = [well_id for well_id in well_ids if well_id not in self.detectors]
+        if not missing:
+            return
+        for well_id, state in AnomalyDetectorState.objects.filter(well_id__in=missing).values_list('well_id', 'state'):
+            self.detectors[well_id] = WellDetector.unpack(state)
+        for well_id in missing:
+            self.detectors.setdefault(well_id, WellDetector())
+
+    def save(self, well_ids: Iterable[int]) -> None:
+        """Сохраняет состояния скважин (один запрос)"""
+        AnomalyDetectorState.objects.bulk_create(
+            [AnomalyDetectorState(well_id=well_id, state=self.detectors[well_id].pack()) for well_id in well_ids],
+            update_conflicts=True,
+            unique_fields=['well'],
+            update_fields=['state', 'updated_at'],
+        )
+
+    def process(self, well_id: int, telemetry: Dict[str, List]) -> List[Alert]:
+        """Обрабатывает новые точки телеметрии скважины (состояние должно быть загружено)"""
+        detector = self.detectors[well_id]
+        timestamps = telemetry['timestamps']
+        # Точки упорядочены по времени: пропускаем уже обработанные ранее
+        start = bisect_right(timestamps, detector.last_timestamp)
+        if start >= len(timestamps):
+            return []
+        detector.last_timestamp = timestamps[-1]
+
+        alerts = []
+        for parameter, state in zip(PARAMETERS, detector.series):
+            values = telemetry[parameter][start:]
+            for index, kind, z in state.update(values):
+                alerts.append(Alert(well_id, parameter, kind, timestamps[start + index], values[index], z))
+        return alerts
+
+    def process_batch(self, batch: List[Tuple[Well, Dict[str, List]]]) -> List[Alert]:
+        """
+        Обрабатывает пачку синхронизации: загрузка состояний, обработка,
+        сохранение состояний и запись тревог - постоянное число запросов.
+        """
+        well_ids = [well.pk for well, _ in batch]
+        self.load(well_ids)
+        alerts = []
+        for well, telemetry in batch:
+            alerts.extend(self.process(well.pk, telemetry))
+        with transaction.atomic():
+            self.save(well_ids)
+            record_alerts(alerts)
+        return alerts
+
+
+def record_alerts(alerts: List[Alert]) -> None:
+    """
+    Сохраняет самую сильную тревогу каждой скважины и параметра как рекомендацию
+    (открытую заново, если она была закрыта) и при ANOMALY_ESCALATE_EMERGENCY переводит скважины с критическими
+    тревогами в статус emergency.
+    """
+    latest: Dict[Tuple[int, str], Alert] = {}
+    for alert in alerts:
+        key = (alert.well_id, alert.parameter)
+        if key not in latest or abs(alert.z) >= abs(latest[key].z):
+            latest[key] = alert
+    if not latest:
+        return
+
+    Recommendation.objects.bulk_create(
+        [
+            Recommendation(
+                well_id=alert.well_id,
+                rule=f'{ALERT_RULE_PREFIX}{alert.parameter}',
+                type='emergency',
+                priority='critical' if alert.critical else 'high',
+                title=f'Аномалия {PARAMETER_TITLES[alert.parameter]}',
+                description=(
+                    f'{"Выброс" if alert.kind == "spike" else "Сдвиг уровня"}: значение {alert.value} '
+                    f'(z = {alert.z:+.1f})'
+                ),
+            )
+            for alert in latest.values()
+        ],
+        update_conflicts=True,
+        unique_fields=['well', 'rule'],
+        # Аномалия вернулась: закрытая (принятая или отклоненная) тревога открывается снова
+        update_fields=['priority', 'title', 'description', 'status', 'updated_at'],
+    )
+
+    critical = {alert.well_id for alert in latest.values() if alert.critical}
+    if critical and settings.ANOMALY_ESCALATE_EMERGENCY:
+        wells = list(Well.objects.filter(id__in=critical).exclude(status='emergency'))
+        for well in wells:
+            well.status = 'emergency'
+            well.save(update_fields=['status', 'last_data_update'])
+
+
+def held_emergency_wells(well_ids: Iterable[int]) -> Set[int]:
+    """
+    Скважины из well_ids в статусе emergency с открытой тревогой не старше
+    ALERT_HOLD: синхронизация сохраняет им статус. Принятие или отклонение
+    тревоги снимает удержание.
+    """
+    return set(
+        Recommendation.objects
+        .filter(
+            well_id__in=list(well_ids),
+            well__status='emergency',
+            rule__startswith=ALERT_RULE_PREFIX,
+            status='pending',
+            updated_at__gte=timezone.now() - ALERT_HOLD,
+        )
+        .values_list('well_id', flat=True)
+        .distinct()
+    )
@@ -0,0 +1,172 @@
+"""
+Асинхронный клиент внешнего API для async-представлений (httpx).
+
+Повторы, бюджет повторов и выключатель - те же, что у синхронного
+HTTPTransport (см. transport.py), но ожидание ответа и задержки перед
+повтором не занимают поток: сотни одновременных запросов обслуживаются
+одним циклом событий.
+"""
+import asyncio
+import json
+from typing import Dict, List, Optional
+
+import httpx
+
+from .external_api_client import TELEMETRY_BATCH_SIZE
+from .transport import (
+    CircuitBreaker, CircuitOpenError, RequestMetrics, Response, RetryBudget, RetryPolicy, TransportError,
+    parse_retry_after, retry_delay
+)
+
+
+class AsyncHTTPTransport:
+    """
+    Запросы через httpx.AsyncClient с повторами и автоматическим выключателем.
+    Жизненным циклом client управляет вызывающий код.
+    """
+
+    def __init__(
+            self,
+            client: httpx.AsyncClient,
+            retry: Optional[RetryPolicy] = None,
+            budget: Optional[RetryBudget] = None,
+            breaker: Optional[CircuitBreaker] = None,
+            sleep=asyncio.sleep
+    ):
+        self.client = client
+        self.retry = retry or RetryPolicy()
+        self.budget = budget or RetryBudget()
+        self.breaker = breaker or CircuitBreaker()
+        self.sleep = sleep
+
+    async def request(self, method: str, path: str, params: Optional[Dict] = None) -> Response:
+        """
+        Выполняет запрос с повторами (семантика HTTPTransport.request).
+
+        Raises:
+            CircuitOpenError: Если выключатель разомкнут
+            TransportError: Если запрос не удался после всех допустимых повторов
+        """
+        metrics = RequestMetrics(method, path)
+        self.budget.deposit()
+        attempt = 0
+        while True:
+            try:
+                self.breaker.before_request()
+            except CircuitOpenError:
+                metrics.failed('circuit_open')
+                raise
+            retry_after = None
+            metrics.start()
+            try:
+                raw = await self.client.request(method, path, params=params)
+            except httpx.HTTPError as e:
+                status, error = None, f"{type(e).__name__}: {e}"
+            else:
+                status = raw.status_code
+                if status not in self.retry.retry_statuses:
+                    metrics.attempt(status)
+                    self.breaker.record_success()
+                    return Response(
+                        status=status,
+                        headers={k.lower(): v for k, v in raw.headers.items()},
+                        body=raw.content
+                    )
+                error = f"HTTP {status}"
+                retry_after = parse_retry_after(raw.headers.get('retry-after'))
+            metrics.attempt(status)
+
+            self.breaker.record_failure()
+            message = f"{method} {path}: {error}"
+            try:
+                delay = retry_delay(self.retry, self.budget, message, attempt, status, retry_after)
+            except TransportError:
+                metrics.failed('retries_exhausted')
+                raise
+            metrics.retried()
+            await self.sleep(delay)
+            attempt += 1
+
+
+class AsyncExternalWellDataClient:
+    """
+    Асинхронный аналог ExternalWellDataClient (только HTTP-режим).
+    Соединения живут в пределах блока async with, выключатель и бюджет
+    повторов можно передать общими для всех клиентов процесса.
+
+    Использование:
+        async with AsyncExternalWellDataClient(settings.EXTERNAL_API_URL, settings.EXTERNAL_API_KEY) as client:
+            telemetry = await client.get_wells_telemetry(["WELL-001", "WELL-002"])
+    """
+
+    def __init__(
+            self,
+            api_url: str,
+            api_key: str,
+            timeout: float = 30,
+            params: Optional[Dict] = None,
+            max_connections: int = 100,
+            budget: Optional[RetryBudget] = None,
+            breaker: Optional[CircuitBreaker] = None
+    ):
+        self.api_url = api_url.rstrip('/')
+        self.api_key = api_key
+        self.timeout = timeout
+        self.params = dict(params or {})
+        self.max_connections = max_connections
+        self.budget = budget
+        self.breaker = breaker
+        self._http = None
+        self.transport = None
+
+    async def __aenter__(self) -> "AsyncExternalWellDataClient":
+        self._http = httpx.AsyncClient(
+            base_url=self.api_url,
+            headers={"Accept": "application/json", "X-API-Key": self.api_key},
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.max_connections)
+        )
+        self.transport = AsyncHTTPTransport(self._http, budget=self.budget, breaker=self.breaker)
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self._http.aclose()
+
+    async def _get_json(self, path: str, params: Optional[Dict] = None) -> Optional[Dict]:
+        """GET-запрос с разбором JSON; None, если ресурс не найден (404)"""
+        response = await self.transport.request("GET", path, {**self.params, **(params or {})})
+        if response.status == 404:
+            return None
+        if response.status >= 400:
+            raise TransportError(f"Внешнее API вернуло {response.status} для {path}", status=response.status)
+        return json.loads(response.body)
+
+    async def get_well_telemetry(
+            self, well_id: str, hours: int = 24, points: int = 100
+    ) -> Optional[Dict[str, List[float]]]:
+        """Телеметрия одной скважины (формат ExternalWellDataClient.get_well_telemetry)"""
+        payload = await self._get_json(f"/wells/{well_id}/telemetry/", {"hours": hours, "points": points})
+        return payload["data"]["telemetry"] if payload else None
+
+    async def get_wells_telemetry(
+            self, well_ids: List[str], hours: int = 24, points: int = 100,
+            batch_size: int = TELEMETRY_BATCH_SIZE
+    ) -> Dict[str, Dict[str, List[float]]]:
+        """
+        Телеметрия нескольких скважин: пакетные запросы по batch_size скважин
+        выполняются одновременно.
+
+        Raises:
+            ConnectionError: Если хотя бы один пакет не получен
+        """
+        async def fetch(chunk):
+            payload = await self._get_json(
+                "/telemetry/", {"well_ids": ",".join(chunk), "hours": hours, "points": points}
+            )
+            return payload["data"]["telemetry"] if payload else {}
+
+        chunks = [well_ids[i:i + batch_size] for i in range(0, len(well_ids), batch_size)]
+        result = {}
+        for telemetry in await asyncio.gather(*(fetch(chunk) for chunk in chunks)):
+            result.update(telemetry)
+        return result
@@ -0,0 +1,153 @@
+"""
+Массовая синхронизация скважин из внешнего API в таблицу Well.
+
+Записи проверяются без обращения к БД, после чего все скважины
+создаются или обновляются одним INSERT ... ON CONFLICT DO UPDATE
+(с разбиением на пачки по лимиту параметров СУБД) в одной транзакции.
+Число запросов не зависит от количества записей в пределах пачки.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+from django.db import connection, transaction
+from rest_framework.exceptions import ValidationError
+
+from wells.cache import invalidate_wells
+from wells.models import Well
+from wells.services.anomaly import held_emergency_wells
+from wells.services.rollups import refresh_moved_wells
+from wells.serializers import ExternalWellSerializer
+
+
+# Месторождение для новых скважин, о которых внешнее API его не сообщает
+DEFAULT_FIELD = 'Не указано'
+
+# Поля, обновляемые у существующих скважин
+UPDATE_FIELDS = [
+    'latitude',
+    'longitude',
+    'geohash',
+    'depth',
+    'status',
+    'current_pressure',
+    'measured_flow_rate',
+    'temperature',
+    'last_data_update',
+]
+
+CREATED, UPDATED, INVALID, DUPLICATE = 'created', 'updated', 'invalid', 'duplicate'
+
+
+@dataclass
+class BulkSyncResult:
+    """Итоги массовой синхронизации с результатом по каждой записи"""
+    results: List[Dict] = field(default_factory=list)
+
+    def count(self, status: str) -> int:
+        return sum(1 for item in self.results if item['status'] == status)
+
+    def as_dict(self) -> Dict:
+        return {
+            'created': self.count(CREATED),
+            'updated': self.count(UPDATED),
+            'failed': self.count(INVALID) + self.count(DUPLICATE),
+            'results': self.results,
+        }
+
+
+def _existing_wells(well_numbers: List[str]) -> Dict[str, Tuple[int, str]]:
+    """Номер -> (id, месторождение) уже существующих скважин (IN-запросы пачками по лимиту параметров)"""
+    existing = {}
+    batch_size = connection.features.max_query_params or len(well_numbers) or 1
+    for start in range(0, len(well_numbers), batch_size):
+        rows = (
+            Well.objects
+            .filter(well_number__in=well_numbers[start:start + batch_size])
+            .values_list('well_number', 'id', 'field')
+        )
+        existing.update((well_number, (well_id, field)) for well_number, well_id, field in rows)
+    return existing
+
+
+def sync_external_wells(records: List[Dict]) -> BulkSyncResult:
+    """
+    Создает или обновляет скважины по записям внешнего API.
+
+    Месторождение обновляется только у записей, где оно передано (field_name);
+    при повторе well_id в одном запросе применяется последняя запись.
+    Статус emergency с открытой тревогой детектора аномалий не перезаписывается.
+
+    Args:
+        records: Список скважин в формате внешнего API
+
+    Returns:
+        BulkSyncResult со статусом created/updated/invalid/duplicate по каждой записи
+    """
+    results: List[Dict] = []
+    wells: Dict[str, Well] = {}
+    result_index: Dict[str, int] = {}
+
+    # Один экземпляр сериализатора на все записи: поля строятся один раз,
+    # а не заново для каждой из тысяч записей
+    validator = ExternalWellSerializer()
+    for record in records:
+        try:
+            data = validator.run_validation(record)
+        except ValidationError as e:
+            results.append({
+                'well_id': record.get('well_id') if isinstance(record, dict) else None,
+                'status': INVALID,
+                'errors': e.detail,
+            })
+            continue
+
+        well = ExternalWellSerializer.to_well(data)
+        if well.well_number in result_index:
+            results[result_index[well.well_number]]['status'] = DUPLICATE
+        result_index[well.well_number] = len(results)
+        wells[well.well_number] = well
+        results.append({'well_id': well.well_number, 'status': None})
+
+    if not wells:
+        return BulkSyncResult(results)
+
+    with transaction.atomic():
+        existing = _existing_wells(list(wells))
+        # Статус emergency от детектора аномалий держится, пока тревога открыта
+        held = held_emergency_wells(well_id for well_id, _ in existing.values())
+        if held:
+            for well in wells.values():
+                if well.well_number in existing and existing[well.well_number][0] in held:
+                    well.status = 'emergency'
+
+        with_field = [well for well in wells.values() if well.field]
+        without_field = [well for well in wells.values() if not well.field]
+        for well in without_field:
+            # Используется только при создании: в UPDATE поле не входит
+            well.field = DEFAULT_FIELD
+
+        for group, update_fields in ((with_field, UPDATE_FIELDS + ['field']), (without_field, UPDATE_FIELDS)):
+            if group:
+                Well.objects.bulk_create(
+                    group,
+                    update_conflicts=True,
+                    unique_fields=['well_number'],
+                    update_fields=update_fields,
+                )
+        # bulk_create не отправляет post_save: кэш и свертки перенесенных
+        # на другое месторождение скважин обновляются явно
+        moved = [
+            (existing[well.well_number], well.field)
+            for well in with_field
+            if well.well_number in existing and existing[well.well_number][1] != well.field
+        ]
+        if moved:
+            refresh_moved_wells(
+                [well_id for (well_id, _), _ in moved],
+                {field for (_, previous), new in moved for field in (previous, new)}
+            )
+        invalidate_wells([well_id for well_id, _ in existing.values()])
+
+    for well_number, index in result_index.items():
+        results[index]['status'] = UPDATED if well_number in existing else CREATED
+    return BulkSyncResult(results)
@@ -0,0 +1,172 @@
+"""
+Лента изменений скважин для инкрементального обновления дашборда.
+
+Позиция клиента - курсор (время изменения, id скважины). Изменения
+читаются по индексам (last_data_update, id) у скважин и (deleted_at, well_id)
+у отметок об удалении, поэтому стоимость запроса зависит от числа
+изменений после курсора, а не от размера фонда.
+
+Время last_data_update (auto_now) выставляется до фиксации транзакции:
+изменение, записанное чуть раньше, может стать видимым позже соседних.
+Поэтому курсор без продолжения не сдвигается дальше, чем на
+SETTLE_SECONDS назад от текущего момента - последние изменения приходят
+повторно (клиент применяет их идемпотентно), но не теряются.
+
+Курсор хранит и момент начала синхронизации клиента: при полной загрузке
+(без since) клиенту не нужны удаления до ее начала, поэтому страницы со
+старыми last_data_update не считаются устаревшими. Курсор устарел, только
+если и позиция, и начало синхронизации старше TOMBSTONE_RETENTION.
+
+Изменения через QuerySet.update() не обновляют last_data_update и в ленту
+не попадают: такой код должен выставлять поле явно (как WellSyncWorker).
+"""
+import base64
+import binascii
+import heapq
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Dict, List, Optional, Tuple
+
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.fields import DateTimeField
+
+from wells.models import Well, WellTombstone
+from wells.serializers import WellRowSerializer
+
+
+# Транзакции записи скважин короче этого времени (см. описание модуля)
+SETTLE_SECONDS = 2
+# Сколько хранятся отметки об удалении; более старый курсор требует полной загрузки
+TOMBSTONE_RETENTION = timedelta(days=30)
+
+# Курсор "с начала": вся лента, включая скважины без изменений
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+Position = Tuple[datetime, int]
+
+
+class InvalidCursor(ValueError):
+    """Курсор не разобран"""
+
+
+class CursorExpired(Exception):
+    """Курсор старше срока хранения отметок об удалении"""
+
+
+def _micros(timestamp: datetime) -> int:
+    return (timestamp - EPOCH) // timedelta(microseconds=1)
+
+
+def encode_cursor(position: Position, synced: Optional[datetime] = None) -> str:
+    """
+    Непрозрачная строка курсора: base64 от "<микросекунды unix>:<id>[:<микросекунды unix>]",
+    последнее - начало синхронизации клиента (synced)
+    """
+    timestamp, well_id = position
+    raw = f'{_micros(timestamp)}:{well_id}'
+    if synced is not None:
+        raw += f':{_micros(synced)}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(value: Optional[str]) -> Tuple[Position, datetime]:
+    """Позиция и начало синхронизации по строке курсора; пустой курсор - начало ленты"""
+    if not value:
+        return (EPOCH, 0), EPOCH
+    try:
+        raw = base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)).decode()
+        micros, well_id, *synced = raw.split(':')
+        if len(synced) > 1:
+            raise ValueError(raw)
+        position = EPOCH + timedelta(microseconds=int(micros)), int(well_id)
+        return position, (EPOCH + timedelta(microseconds=int(synced[0])) if synced else EPOCH)
+    except (binascii.Error, UnicodeDecodeError, ValueError, OverflowError):
+        raise InvalidCursor(value)
+
+
+def _after(queryset, time_field: str, id_field: str, position: Position):
+    """Строки строго после позиции в порядке (time_field, id_field)"""
+    timestamp, well_id = position
+    # Условие >= по ведущей колонке дает диапазонное чтение индекса, OR уточняет его
+    return queryset.filter(
+        Q(**{f'{time_field}__gte': timestamp}),
+        Q(**{f'{time_field}__gt': timestamp}) | Q(**{f'{id_field}__gt': well_id})
+    ).order_by(time_field, id_field)
+
+
+@dataclass
+class ChangeSet:
+    """Страница ленты изменений"""
+    cursor: str
+    has_more: bool
+    updated: List[Dict] = field(default_factory=list)
+    deleted: List[Dict] = field(default_factory=list)
+
+    def as_dict(self) -> Dict:
+        return {
+            'cursor': self.cursor,
+            'has_more': self.has_more,
+            'updated': self.updated,
+            'deleted': self.deleted,
+        }
+
+
+def changes_since(
+        cursor: Optional[str], limit: int, serializer: Optional[WellRowSerializer] = None
+) -> ChangeSet:
+    """
+    Скважины, измененные или удаленные после курсора (не более limit).
+
+    Raises:
+        InvalidCursor: Курсор не разобран
+        CursorExpired: Отметки об удалениях после курсора могли быть уже очищены
+    """
+    position, synced = decode_cursor(cursor)
+    now = timezone.now()
+    if not cursor:
+        # Полная загрузка: удаления до ее начала клиенту не нужны
+        synced = now
+    elif max(position[0], synced) < now - TOMBSTONE_RETENTION:
+        raise CursorExpired(cursor)
+
+    serializer = serializer or WellRowSerializer()
+    # Время и id - последними колонками, для позиции в ленте
+    wells = _after(Well.objects.all(), 'last_data_update', 'id', position)
+    rows = list(wells.values_list(*serializer.columns, 'last_data_update', 'id')[:limit + 1])
+    tombstones = list(
+        _after(WellTombstone.objects.all(), 'deleted_at', 'well_id', position)
+        .values_list('well_id', 'well_number', 'deleted_at')[:limit + 1]
+    )
+
+    # Слияние двух упорядоченных потоков и отбор первых limit изменений
+    merged = heapq.merge(
+        ((row[-2], row[-1], False, row) for row in rows),
+        ((row[2], row[0], True, row) for row in tombstones),
+        key=lambda item: item[:2]
+    )
+    page = [item for _, item in zip(range(limit + 1), merged)]
+    has_more = len(page) > limit
+    page = page[:limit]
+
+    result = ChangeSet(cursor='', has_more=has_more)
+    to_iso = DateTimeField().to_representation
+    for _, _, deleted, row in page:
+        if deleted:
+            result.deleted.append({'id': row[0], 'well_number': row[1], 'deleted_at': to_iso(row[2])})
+        else:
+            result.updated.append(serializer.to_dict(row))
+
+    if has_more:
+        next_position = page[-1][:2]
+    else:
+        next_position = max(position, (now - timedelta(seconds=SETTLE_SECONDS), 0))
+    result.cursor = encode_cursor(next_position, synced)
+    return result
+
+
+def purge_tombstones(now: Optional[datetime] = None) -> int:
+    """Удаляет отметки старше TOMBSTONE_RETENTION; возвращает их количество"""
+    now = now or timezone.now()
+    deleted, _ = WellTombstone.objects.filter(deleted_at__lt=now - TOMBSTONE_RETENTION).delete()
+    return deleted
@@ -0,0 +1,237 @@
+"""
+Холодное хранилище истории телеметрии: файлы NumPy на локальном диске.
+
+Показания старше TELEMETRY_COLD_AFTER_DAYS переносятся из БД (строк и сжатых
+блоков) в файлы TELEMETRY_COLD_DIR/<id скважины>/<ГГГГММ>.npy - по файлу на
+скважину и месяц, целыми месяцами (tier_telemetry). Файл - структурированный
+массив COLD_DTYPE, упорядоченный по времени.
+
+Чтение открывает файлы через np.memmap (np.load(mmap_mode='r')): границы
+интервала ищутся двоичным поиском по отображенному файлу, в память
+копируется только нужный срез. Многолетние выборки упираются в диск,
+а не в ORM.
+
+Файлы пишутся во временный и подменяются атомарно (os.replace): читатель
+видит либо старую, либо новую версию месяца. Строки удаляются из БД уже
+после записи файла, поэтому при сбое точки окажутся в обоих местах -
+чтение (concat_series) оставляет одну копию, повторный запуск переноса
+доводит дело до конца.
+"""
+import os
+import shutil
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+from wells.models import TelemetryBlock, TelemetryReading, telemetry_bucket
+from .compression import (
+    DELETE_CHUNK_SIZE, PARAMETERS, build_blocks, concat_series, decode_block, slice_series, to_unix
+)
+
+
+COLD_DTYPE = np.dtype([('timestamp', '<i8')] + [(name, '<f8') for name in PARAMETERS])
+
+
+def _well_dir(well_id: int) -> Path:
+    return Path(settings.TELEMETRY_COLD_DIR) / str(well_id)
+
+
+def _month_path(well_id: int, bucket: int) -> Path:
+    return _well_dir(well_id) / f'{bucket}.npy'
+
+
+def _buckets(timestamps: np.ndarray) -> np.ndarray:
+    """Месяц ГГГГММ (см. telemetry_bucket) каждой метки unix-времени"""
+    months = timestamps.astype('datetime64[s]').astype('datetime64[M]').astype(np.int64)
+    return (1970 + months // 12) * 100 + months % 12 + 1
+
+
+def _month_files(well_id: int, start: Optional[datetime], end: Optional[datetime]) -> List[Tuple[int, Path]]:
+    """Файлы месяцев скважины, пересекающих [start, end), по возрастанию"""
+    directory = _well_dir(well_id)
+    if not directory.is_dir():
+        return []
+    first = telemetry_bucket(start) if start is not None else 0
+    last = telemetry_bucket(end) if end is not None else float('inf')
+    files = []
+    for path in directory.glob('*.npy'):
+        if path.stem.isdigit() and first <= int(path.stem) <= last:
+            files.append((int(path.stem), path))
+    return sorted(files)
+
+
+def _to_series(array: np.ndarray) -> Dict[str, np.ndarray]:
+    """Срез структурированного массива -> ряды в формате load_series (копии колонок)"""
+    series = {'timestamps': np.ascontiguousarray(array['timestamp'])}
+    for name in PARAMETERS:
+        series[name] = np.ascontiguousarray(array[name])
+    return series
+
+
+def read_month(path: Path, start: Optional[int] = None, end: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """Точки файла месяца в полуинтервале [start, end) unix-времени"""
+    array = np.load(path, mmap_mode='r')
+    timestamps = array['timestamp']
+    first = 0 if start is None else int(np.searchsorted(timestamps, start, side='left'))
+    last = len(array) if end is None else int(np.searchsorted(timestamps, end, side='left'))
+    return _to_series(array[first:last])
+
+
+def _write_month(path: Path, series: Dict[str, np.ndarray]) -> None:
+    """Атомарно записывает (или удаляет, если ряд пуст) файл месяца"""
+    if not len(series['timestamps']):
+        path.unlink(missing_ok=True)
+        return
+    array = np.empty(len(series['timestamps']), dtype=COLD_DTYPE)
+    array['timestamp'] = series['timestamps']
+    for name in PARAMETERS:
+        array[name] = series[name]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp = path.with_name(f'.{path.stem}.{os.getpid()}.tmp')
+    with open(temp, 'wb') as f:
+        np.save(f, array)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp, path)
+
+
+def load_cold(
+    well_ids: Iterable[int],
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+) -> Dict[int, Dict[str, np.ndarray]]:
+    """
+    Холодная история скважин за [start, end).
+    Returns:
+        {id скважины: ряды в формате load_series} - только для скважин с файлами в интервале
+    """
+    start_ts, end_ts = to_unix(start), to_unix(end)
+    result = {}
+    for well_id in well_ids:
+        parts = [read_month(path, start_ts, end_ts) for _, path in _month_files(well_id, start, end)]
+        if parts:
+            result[well_id] = concat_series(parts)
+    return result
+
+
+def _series_from_rows(rows) -> Dict[str, np.ndarray]:
+    values = np.array([row[2:] for row in rows], dtype=np.float64).reshape(-1, len(PARAMETERS))
+    series = {'timestamps': np.array([int(row[1].timestamp()) for row in rows], dtype=np.int64)}
+    for index, name in enumerate(PARAMETERS):
+        series[name] = values[:, index]
+    return series
+
+
+def _tier_well(well_id: int, boundary: datetime) -> int:
+    rows = list(
+        TelemetryReading.objects
+        .filter(well_id=well_id, timestamp__lt=boundary)
+        .order_by('timestamp')
+        .values_list('id', 'timestamp', *PARAMETERS)
+    )
+    blocks = list(
+        TelemetryBlock.objects
+        .filter(well_id=well_id, start__lt=boundary)
+        .order_by('start')
+        .values_list('id', 'data')
+    )
+    if not rows and not blocks:
+        return 0
+    boundary_ts = int(boundary.timestamp())
+    series = concat_series([decode_block(data) for _, data in blocks] + [_series_from_rows(rows)])
+    cold = slice_series(series, None, boundary_ts)
+    # Блок, пересекающий границу: оставшиеся точки перепаковываются
+    remainder = build_blocks(well_id, slice_series(series, boundary_ts, None))
+
+    buckets = _buckets(cold['timestamps'])
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    stops = np.r_[starts[1:], len(buckets)]
+    for first, last in zip(starts, stops):
+        path = _month_path(well_id, int(buckets[first]))
+        month = {name: values[first:last] for name, values in cold.items()}
+        if path.exists():
+            # Месяц уже переносился (поздние данные): файл объединяется с новыми точками
+            month = concat_series([read_month(path), month])
+        _write_month(path, month)
+
+    TelemetryBlock.objects.filter(id__in=[block_id for block_id, _ in blocks]).delete()
+    TelemetryBlock.objects.bulk_create(remainder)
+    ids = [row[0] for row in rows]
+    for first in range(0, len(ids), DELETE_CHUNK_SIZE):
+        TelemetryReading.objects.filter(id__in=ids[first:first + DELETE_CHUNK_SIZE]).delete()
+    return len(cold['timestamps'])
+
+
+def month_start(moment: datetime) -> datetime:
+    """Начало месяца (UTC), содержащего moment"""
+    return moment.astimezone(dt_timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def tier_telemetry(before: datetime, well_ids: Optional[Iterable[int]] = None) -> Tuple[int, int]:
+    """
+    Переносит в холодное хранилище показания (строки и блоки) всех месяцев,
+    закончившихся до before. Свертки остаются в БД.
+
+    Returns:
+        (перенесено показаний, скважин)
+    """
+    boundary = month_start(before)
+    rows = TelemetryReading.objects.filter(timestamp__lt=boundary, bucket__lt=telemetry_bucket(boundary))
+    blocks = TelemetryBlock.objects.filter(start__lt=boundary)
+    if well_ids is not None:
+        well_ids = list(well_ids)
+        rows = rows.filter(well_id__in=well_ids)
+        blocks = blocks.filter(well_id__in=well_ids)
+    candidates = set(rows.order_by().values_list('well_id', flat=True).distinct())
+    candidates.update(blocks.order_by().values_list('well_id', flat=True).distinct())
+    points = wells = 0
+    for well_id in sorted(candidates):
+        with transaction.atomic():
+            moved = _tier_well(well_id, boundary)
+        points += moved
+        wells += bool(moved)
+    return points, wells
+
+
+def thaw_cold(well_ids: Iterable[int], start: datetime, end: datetime) -> int:
+    """
+    Возвращает в строки TelemetryReading холодные точки скважин из [start, end).
+    Нужно перед записью поздних показаний в перенесенный месяц: свертки
+    пересчитываются по строкам. Файлы переписываются после фиксации транзакции,
+    при ее откате точки остаются в файлах.
+
+    Returns:
+        Количество возвращенных показаний
+    """
+    start_ts, end_ts = to_unix(start), to_unix(end)
+    readings = []
+    rewrites = []
+    for well_id in well_ids:
+        for _, path in _month_files(well_id, start, end):
+            month = read_month(path)
+            inside = slice_series(month, start_ts, end_ts)
+            if not len(inside['timestamps']):
+                continue
+            keep = (month['timestamps'] < start_ts) | (month['timestamps'] >= end_ts)
+            rewrites.append((path, {name: values[keep] for name, values in month.items()}))
+            for ts, *values in zip(inside['timestamps'].tolist(), *(inside[name].tolist() for name in PARAMETERS)):
+                timestamp = datetime.fromtimestamp(ts, tz=dt_timezone.utc)
+                readings.append(TelemetryReading(
+                    well_id=well_id,
+                    timestamp=timestamp,
+                    bucket=telemetry_bucket(timestamp),
+                    **dict(zip(PARAMETERS, values)),
+                ))
+    if readings:
+        TelemetryReading.objects.bulk_create(readings, batch_size=DELETE_CHUNK_SIZE, ignore_conflicts=True)
+        transaction.on_commit(lambda: [_write_month(path, month) for path, month in rewrites])
+    return len(readings)
+
+
+def drop_cold(well_id: int) -> None:
+    """Удаляет холодную историю скважины"""
+    shutil.rmtree(_well_dir(well_id), ignore_errors=True)
@@ -0,0 +1,344 @@
+"""
+Сжатое блочное хранение истории телеметрии.
+
+Старые показания скважины упаковываются в блоки TelemetryBlock по
+BLOCK_POINTS точек (compact_telemetry) - одна строка с бинарным полем
+вместо тысячи строк TelemetryReading с индексом по каждой.
+
+Формат блока (все числа little-endian):
+    заголовок           версия (1 байт), число точек (4 байта)
+    timestamps          первая метка, первый шаг (по 8 байт), ширина (1 байт);
+                        далее дельты второго порядка (delta-of-delta) -
+                        при равномерном шаге все нули и ширина 0 байт
+    параметр (×3)       вид кодирования (1), параметр (1), первое значение (8),
+                        ширина (1); далее разности соседних значений
+
+Значения с конечным числом знаков после запятой (≤ MAX_DECIMALS) хранятся
+целыми в масштабе 10^k, остальные (NaN, произвольные float) - XOR соседних
+значений в битах float64 (как в Gorilla), со сдвигом на общее для блока
+число младших нулевых бит. Разности переводятся в беззнаковые zigzag и
+пишутся фиксированной шириной 0/1/2/4/8 байт на блок, поэтому и кодирование,
+и декодирование векторизуются NumPy (cumsum / bitwise_xor.accumulate)
+без побитового разбора. Кодирование без потерь.
+"""
+import struct
+from datetime import datetime, timezone as dt_timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from django.db import transaction
+
+from wells.models import TelemetryBlock, TelemetryReading, telemetry_bucket
+
+
+PARAMETERS = ('temperature', 'pressure', 'flow_rate')
+
+FORMAT_VERSION = 1
+BLOCK_POINTS = 1024
+# Показания старше этого возраста упаковываются в блоки (compact_telemetry)
+COMPACT_AFTER_DAYS = 7
+MAX_DECIMALS = 6
+
+SCALED = 0
+XOR = 1
+
+_HEADER = struct.Struct('<BI')
+_TIMESTAMPS = struct.Struct('<qqB')
+_COLUMN = struct.Struct('<BbqB')
+_WIDTHS = (0, 1, 2, 4, 8)
+_DTYPES = {1: '<u1', 2: '<u2', 4: '<u4', 8: '<u8'}
+# Строк в одном DELETE ... WHERE id IN (...)
+DELETE_CHUNK_SIZE = 5000
+
+
+class BlockFormatError(ValueError):
+    """Поврежденный блок или неизвестная версия формата"""
+
+
+def _zigzag(values: np.ndarray) -> np.ndarray:
+    """int64 -> uint64: малые по модулю числа любого знака становятся малыми"""
+    return ((values << 1) ^ (values >> 63)).view(np.uint64)
+
+
+def _unzigzag(values: np.ndarray) -> np.ndarray:
+    return ((values >> np.uint64(1)) ^ (np.uint64(0) - (values & np.uint64(1)))).view(np.int64)
+
+
+def _pack(values: np.ndarray) -> Tuple[int, bytes]:
+    """Беззнаковые числа -> (ширина в байтах, упакованные данные)"""
+    top = int(values.max()) if len(values) else 0
+    width = next(width for width in _WIDTHS if top < 1 << (8 * width))
+    if not width:
+        return 0, b''
+    return width, values.astype(_DTYPES[width]).tobytes()
+
+
+def _unpack(data: bytes, offset: int, width: int, count: int) -> Tuple[np.ndarray, int]:
+    if not width:
+        return np.zeros(count, dtype=np.uint64), offset
+    size = width * count
+    if width not in _DTYPES or offset + size > len(data):
+        raise BlockFormatError('Блок телеметрии поврежден')
+    values = np.frombuffer(data, dtype=_DTYPES[width], count=count, offset=offset).astype(np.uint64)
+    return values, offset + size
+
+
+def _decimals(values: np.ndarray) -> Optional[int]:
+    """Наименьшее число знаков после запятой, при котором values хранятся целыми без потерь"""
+    for decimals in range(MAX_DECIMALS + 1):
+        scale = 10.0 ** decimals
+        scaled = np.round(values * scale)
+        if not np.all(np.abs(scaled) < 2 ** 53):
+            return None
+        # Сравнение по битам: NaN и -0.0 целыми не представимы
+        restored = scaled.astype(np.int64) / scale
+        if np.array_equal(restored.view(np.int64), values.view(np.int64)):
+            return decimals
+    return None
+
+
+def _encode_column(values: np.ndarray) -> bytes:
+    decimals = _decimals(values)
+    if decimals is not None:
+        integers = np.round(values * 10.0 ** decimals).astype(np.int64)
+        width, payload = _pack(_zigzag(np.diff(integers)))
+        return _COLUMN.pack(SCALED, decimals, int(integers[0]), width) + payload
+
+    bits = values.view(np.uint64)
+    xored = bits[1:] ^ bits[:-1]
+    # Общее число младших нулевых бит: у близких значений совпадают хвосты мантиссы
+    union = int(np.bitwise_or.reduce(xored)) if len(xored) else 0
+    shift = (union & -union).bit_length() - 1 if union else 0
+    width, payload = _pack(xored >> np.uint64(shift))
+    return _COLUMN.pack(XOR, shift, int(values[:1].view(np.int64)[0]), width) + payload
+
+
+def _decode_column(data: bytes, offset: int, count: int) -> Tuple[np.ndarray, int]:
+    kind, param, first, width = _COLUMN.unpack_from(data, offset)
+    deltas, offset = _unpack(data, offset + _COLUMN.size, width, count - 1)
+    if kind == SCALED:
+        integers = np.empty(count, dtype=np.int64)
+        integers[0] = first
+        np.cumsum(_unzigzag(deltas), out=integers[1:])
+        integers[1:] += first
+        return integers / 10.0 ** param, offset
+    if kind == XOR:
+        bits = np.empty(count, dtype=np.uint64)
+        bits[0] = np.array([first], dtype=np.int64).view(np.uint64)[0]
+        bits[1:] = deltas << np.uint64(param)
+        return np.bitwise_xor.accumulate(bits).view(np.float64), offset
+    raise BlockFormatError(f'Неизвестный вид кодирования: {kind}')
+
+
+def encode_block(series: Dict[str, np.ndarray]) -> bytes:
+    """
+    Упаковывает ряды в формате load_series (метки по возрастанию) в блок.
+    Пустые ряды не упаковываются.
+    """
+    timestamps = np.asarray(series['timestamps'], dtype=np.int64)
+    count = len(timestamps)
+    if not count:
+        raise ValueError('Пустой блок телеметрии')
+    deltas = np.diff(timestamps)
+    width, payload = _pack(_zigzag(np.diff(deltas)))
+    parts = [
+        _HEADER.pack(FORMAT_VERSION, count),
+        _TIMESTAMPS.pack(int(timestamps[0]), int(deltas[0]) if len(deltas) else 0, width),
+        payload,
+    ]
+    for name in PARAMETERS:
+        parts.append(_encode_column(np.asarray(series[name], dtype=np.float64)))
+    return b''.join(parts)
+
+
+def decode_block(data: bytes) -> Dict[str, np.ndarray]:
+    """Блок -> ряды в формате load_series"""
+    data = bytes(data)
+    try:
+        version, count = _HEADER.unpack_from(data)
+        if version != FORMAT_VERSION:
+            raise BlockFormatError(f'Неизвестная версия формата блока: {version}')
+        first, step, width = _TIMESTAMPS.unpack_from(data, _HEADER.size)
+        dods, offset = _unpack(data, _HEADER.size + _TIMESTAMPS.size, width, max(count - 2, 0))
+        deltas = np.empty(max(count - 1, 0), dtype=np.int64)
+        if len(deltas):
+            deltas[0] = step
+            np.cumsum(_unzigzag(dods), out=deltas[1:])
+            deltas[1:] += step
+        series = {'timestamps': np.r_[np.int64(first), first + np.cumsum(deltas)][:count]}
+        for name in PARAMETERS:
+            series[name], offset = _decode_column(data, offset, count)
+    except struct.error:
+        raise BlockFormatError('Блок телеметрии поврежден')
+    return series
+
+
+def _empty() -> Dict[str, np.ndarray]:
+    series = {'timestamps': np.empty(0, dtype=np.int64)}
+    for name in PARAMETERS:
+        series[name] = np.empty(0, dtype=np.float64)
+    return series
+
+
+def concat_series(parts: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """
+    Объединяет ряды одной скважины в один, упорядоченный по времени.
+    При совпадении меток остается точка из более позднего ряда в parts.
+    """
+    parts = [part for part in parts if len(part['timestamps'])]
+    if not parts:
+        return _empty()
+    if len(parts) == 1:
+        return parts[0]
+    series = {name: np.concatenate([part[name] for part in parts]) for name in ('timestamps',) + PARAMETERS}
+    timestamps = series['timestamps']
+    if np.all(timestamps[1:] > timestamps[:-1]):
+        return series
+    order = np.argsort(timestamps, kind='stable')
+    timestamps = timestamps[order]
+    # Последняя точка из каждой группы одинаковых меток
+    keep = order[np.r_[timestamps[1:] != timestamps[:-1], True]]
+    return {name: values[keep] for name, values in series.items()}
+
+
+def slice_series(series: Dict[str, np.ndarray], start: Optional[int], end: Optional[int]) -> Dict[str, np.ndarray]:
+    """Точки ряда в полуинтервале [start, end) unix-времени"""
+    timestamps = series['timestamps']
+    first = 0 if start is None else np.searchsorted(timestamps, start, side='left')
+    last = len(timestamps) if end is None else np.searchsorted(timestamps, end, side='left')
+    if first == 0 and last == len(timestamps):
+        return series
+    return {name: values[first:last] for name, values in series.items()}
+
+
+def to_unix(moment: Optional[datetime]) -> Optional[int]:
+    """Граница интервала в unix-времени: метки - целые секунды, дробная граница округляется вверх"""
+    if moment is None:
+        return None
+    return -int(-moment.timestamp() // 1)
+
+
+def _blocks(well_ids: Iterable[int], start: Optional[datetime], end: Optional[datetime]):
+    """Блоки скважин, пересекающие [start, end): остальные блоки не читаются вовсе"""
+    queryset = TelemetryBlock.objects.filter(well_id__in=list(well_ids))
+    if start is not None:
+        queryset = queryset.filter(end__gte=start)
+    if end is not None:
+        queryset = queryset.filter(start__lt=end)
+    return queryset
+
+
+def load_blocks(
+    well_ids: Iterable[int],
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+) -> Dict[int, Dict[str, np.ndarray]]:
+    """
+    Сжатая история скважин за [start, end).
+    Returns:
+        {id скважины: ряды в формате load_series} - только для скважин с блоками в интервале
+    """
+    rows = _blocks(well_ids, start, end).order_by('well_id', 'start').values_list('well_id', 'data')
+    parts = {}
+    for well_id, data in rows:
+        parts.setdefault(well_id, []).append(decode_block(data))
+    start_ts, end_ts = to_unix(start), to_unix(end)
+    return {
+        well_id: slice_series(concat_series(series), start_ts, end_ts)
+        for well_id, series in parts.items()
+    }
+
+
+def build_blocks(well_id: int, series: Dict[str, np.ndarray], block_points: int = BLOCK_POINTS) -> List[TelemetryBlock]:
+    """Блоки (не сохраненные) по block_points точек из ряда скважины"""
+    blocks = []
+    for first in range(0, len(series['timestamps']), block_points):
+        part = {name: values[first:first + block_points] for name, values in series.items()}
+        blocks.append(TelemetryBlock(
+            well_id=well_id,
+            start=datetime.fromtimestamp(int(part['timestamps'][0]), tz=dt_timezone.utc),
+            end=datetime.fromtimestamp(int(part['timestamps'][-1]), tz=dt_timezone.utc),
+            count=len(part['timestamps']),
+            data=encode_block(part),
+        ))
+    return blocks
+
+
+def _compact_well(well_id: int, before: datetime, block_points: int) -> Tuple[int, int]:
+    rows = list(
+        TelemetryReading.objects
+        .filter(well_id=well_id, timestamp__lt=before)
+        .order_by('timestamp')
+        .values_list('id', 'timestamp', *PARAMETERS)
+    )
+    if not rows:
+        return 0, 0
+    ids = [row[0] for row in rows]
+    values = np.array([row[2:] for row in rows], dtype=np.float64).reshape(-1, len(PARAMETERS))
+    series = {'timestamps': np.array([int(row[1].timestamp()) for row in rows], dtype=np.int64)}
+    for index, name in enumerate(PARAMETERS):
+        series[name] = values[:, index]
+
+    # Блоки, пересекающиеся с новыми точками (поздние данные), перепаковываются
+    # вместе с ними: блоки одной скважины не пересекаются по времени
+    overlapping = _blocks([well_id], rows[0][1], None).filter(start__lte=rows[-1][1]).order_by('start')
+    merged = [decode_block(data) for data in overlapping.values_list('data', flat=True)]
+    series = concat_series(merged + [series])
+    overlapping.delete()
+    blocks = build_blocks(well_id, series, block_points)
+    TelemetryBlock.objects.bulk_create(blocks)
+    # Удаляются только прочитанные строки: показания, записанные параллельно, остаются
+    for first in range(0, len(ids), DELETE_CHUNK_SIZE):
+        TelemetryReading.objects.filter(id__in=ids[first:first + DELETE_CHUNK_SIZE]).delete()
+    return len(ids), len(blocks)
+
+
+def compact_telemetry(
+    before: datetime,
+    well_ids: Optional[Iterable[int]] = None,
+    block_points: int = BLOCK_POINTS
+) -> Tuple[int, int]:
+    """
+    Упаковывает показания старше before (по умолчанию всех скважин) в блоки
+    и удаляет исходные строки. Свертки не меняются: данные те же.
+
+    Returns:
+        (упаковано показаний, записано блоков)
+    """
+    queryset = TelemetryReading.objects.filter(timestamp__lt=before, bucket__lte=telemetry_bucket(before))
+    if well_ids is not None:
+        queryset = queryset.filter(well_id__in=list(well_ids))
+    points = blocks = 0
+    for well_id in queryset.order_by().values_list('well_id', flat=True).distinct():
+        with transaction.atomic():
+            well_points, well_blocks = _compact_well(well_id, before, block_points)
+        points += well_points
+        blocks += well_blocks
+    return points, blocks
+
+
+def unpack_blocks(well_ids: Iterable[int], start: datetime, end: datetime) -> int:
+    """
+    Возвращает в строки TelemetryReading блоки скважин, пересекающие [start, end].
+    Нужно перед записью поздних показаний в уже упакованный интервал: свертки
+    пересчитываются по строкам, и упакованные точки в них не должны потеряться.
+
+    Returns:
+        Количество распакованных показаний
+    """
+    blocks = _blocks(well_ids, start, None).filter(start__lte=end)
+    readings = []
+    for well_id, data in blocks.values_list('well_id', 'data'):
+        series = decode_block(data)
+        for ts, *values in zip(series['timestamps'].tolist(), *(series[name].tolist() for name in PARAMETERS)):
+            timestamp = datetime.fromtimestamp(ts, tz=dt_timezone.utc)
+            readings.append(TelemetryReading(
+                well_id=well_id,
+                timestamp=timestamp,
+                bucket=telemetry_bucket(timestamp),
+                **dict(zip(PARAMETERS, values)),
+            ))
+    if readings:
+        TelemetryReading.objects.bulk_create(readings, batch_size=DELETE_CHUNK_SIZE, ignore_conflicts=True)
+        blocks.delete()
+    return len(readings)
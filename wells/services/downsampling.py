@@ -0,0 +1,124 @@
+"""
+Прореживание временных рядов телеметрии для графиков.
+
+Все функции работают с массивами NumPy и возвращают индексы или значения
+выбранных точек, так что размер ответа определяется запрошенным числом
+точек, а не количеством сохраненных замеров.
+
+Режимы:
+    lttb   - Largest-Triangle-Three-Buckets: сохраняет форму кривой;
+    minmax - минимум и максимум в каждом интервале: сохраняет пики;
+    avg    - среднее по интервалам: сглаживает шум.
+"""
+from typing import Dict
+
+import numpy as np
+
+
+MODES = ('lttb', 'minmax', 'avg')
+
+
+def _bucket_edges(start: int, stop: int, buckets: int) -> np.ndarray:
+    """Границы buckets примерно равных интервалов индексов [start, stop)"""
+    return np.linspace(start, stop, buckets + 1).astype(np.int64)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Индексы точек, выбранных алгоритмом LTTB.
+    Первая и последняя точки сохраняются всегда, внутренние делятся на
+    threshold - 2 интервала, из каждого берется точка, образующая
+    треугольник наибольшей площади с предыдущей выбранной точкой
+    и средним следующего интервала.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = x.astype(np.float64) - x[0]
+    y = y.astype(np.float64)
+    buckets = threshold - 2
+    edges = _bucket_edges(1, n - 1, buckets)
+    counts = np.diff(edges)
+
+    # Средние всех интервалов одним проходом; для последнего - последняя точка
+    next_x = np.append(np.add.reduceat(x[:n - 1], edges[:-1]) / counts, x[-1])[1:]
+    next_y = np.append(np.add.reduceat(y[:n - 1], edges[:-1]) / counts, y[-1])[1:]
+
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    previous = 0
+    for i in range(buckets):
+        lo, hi = edges[i], edges[i + 1]
+        ax, ay = x[previous], y[previous]
+        area = np.abs((ax - next_x[i]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (next_y[i] - ay))
+        previous = lo + int(area.argmax())
+        indices[i + 1] = previous
+    return indices
+
+
+def _first_match(mask: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """Для каждого интервала - первый индекс с mask == True (он всегда есть)"""
+    candidates = np.flatnonzero(mask)
+    return candidates[np.searchsorted(candidates, starts)]
+
+
+def minmax_indices(y: np.ndarray, threshold: int) -> np.ndarray:
+    """Индексы минимума и максимума в каждом из threshold // 2 интервалов, по возрастанию"""
+    n = len(y)
+    buckets = threshold // 2
+    if threshold >= n or buckets < 1:
+        return np.arange(n)
+
+    edges = _bucket_edges(0, n, buckets)
+    starts, counts = edges[:-1], np.diff(edges)
+    owner = np.repeat(np.arange(buckets), counts)
+    mins = np.minimum.reduceat(y, starts)
+    maxs = np.maximum.reduceat(y, starts)
+    return np.unique(np.concatenate([
+        _first_match(y == mins[owner], starts),
+        _first_match(y == maxs[owner], starts),
+    ]))
+
+
+def average_buckets(series: Dict[str, np.ndarray], threshold: int) -> Dict[str, np.ndarray]:
+    """Средние значения всех рядов (и меток времени) по threshold интервалам"""
+    n = len(series['timestamps'])
+    if threshold >= n or threshold < 1:
+        return series
+
+    edges = _bucket_edges(0, n, threshold)
+    starts, counts = edges[:-1], np.diff(edges)
+    result = {
+        name: np.round(np.add.reduceat(values.astype(np.float64), starts) / counts, 3)
+        for name, values in series.items()
+    }
+    result['timestamps'] = result['timestamps'].astype(np.int64)
+    return result
+
+
+def downsample(
+    series: Dict[str, np.ndarray],
+    points: int,
+    mode: str = 'lttb',
+    target: str = 'pressure'
+) -> Dict[str, np.ndarray]:
+    """
+    Прореживает колоночную телеметрию до points точек.
+
+    Args:
+        series: {"timestamps": ..., "temperature": ..., "pressure": ..., "flow_rate": ...}
+        points: Желаемое количество точек
+        mode: lttb, minmax или avg
+        target: Ряд, по форме которого выбираются точки в режимах lttb и minmax
+            (общие метки времени для всех рядов)
+    """
+    if mode == 'avg':
+        return average_buckets(series, points)
+    if mode == 'lttb':
+        indices = lttb_indices(series['timestamps'], series[target], points)
+    elif mode == 'minmax':
+        indices = minmax_indices(series[target], points)
+    else:
+        raise ValueError(f'Неизвестный режим прореживания: {mode}')
+    return {name: values[indices] for name, values in series.items()}
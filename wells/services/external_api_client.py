@@ -1,23 +1,33 @@
 from typing import List, Dict, Optional
+import json
 import logging
 
+try:
+    from .transport import HTTPTransport, TransportError
+except ImportError:  # запуск файла напрямую: python external_api_client.py
+    from transport import HTTPTransport, TransportError
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+
+# Максимум скважин в одном пакетном запросе телеметрии (ограничение внешнего API)
+TELEMETRY_BATCH_SIZE = 500
 
 
 class ExternalWellDataClient:
     """
     Клиент для получения данных скважин из внешней системы мониторинга.
-    Пока реализован как mock-сервис с тестовыми данными.
+    В режиме use_mock возвращает встроенные тестовые данные,
+    иначе обращается к API по HTTP (например, к mock_external_api).
     """
-    def __init__(self, api_url: str, api_key: str, timeout: int = 30):
-        self.api_url = api_url
+    def __init__(self, api_url: str, api_key: str, timeout: int = 30, use_mock: bool = True,
+                 params: Optional[Dict] = None):
+        self.api_url = api_url.rstrip('/')
         self.api_key = api_key
         self.timeout = timeout
+        self.use_mock = use_mock
+        # Параметры, добавляемые к каждому запросу (например, режим нагрузки mock API)
+        self.params = dict(params or {})
         self.logger = logging.getLogger(__name__)
+        self._transport = None
 
         # Mock-данные для тестирования (по ТЗ п.2.3)
         self.mock_wells_data = [
@@ -50,6 +60,34 @@ class ExternalWellDataClient:
             }
         ]
 
+    @property
+    def transport(self) -> HTTPTransport:
+        """HTTP-транспорт с пулом соединений, повторами и выключателем (создается при первом запросе)"""
+        if self._transport is None:
+            self._transport = HTTPTransport(
+                self.api_url,
+                headers={"Accept": "application/json", "X-API-Key": self.api_key},
+                timeout=self.timeout
+            )
+        return self._transport
+
+    def _get_json(self, path: str, params: Optional[Dict] = None) -> Optional[Dict]:
+        """
+        Выполняет GET-запрос к внешнему API и разбирает JSON-ответ.
+
+        Returns:
+            Тело ответа или None, если ресурс не найден (404)
+
+        Raises:
+            ConnectionError: Если API недоступно или вернуло ошибку
+        """
+        response = self.transport.request("GET", path, {**self.params, **(params or {})})
+        if response.status == 404:
+            return None
+        if response.status >= 400:
+            raise TransportError(f"Внешнее API вернуло {response.status} для {path}", status=response.status)
+        return json.loads(response.body)
+
     def get_wells_data(self) -> List[Dict]:
         """
         Получает данные всех скважин из внешнего API.
@@ -67,6 +105,20 @@ class ExternalWellDataClient:
                 {"well_id": "WELL-002", "temperature": 92.1, ...}
             ]
         """
+        if not self.use_mock:
+            self.logger.info("Запрос данных скважин из внешнего API")
+            wells, page = [], 1
+            # Постраничный список (mock API в режиме нагрузки): идем по страницам до конца
+            while True:
+                payload = self._get_json("/wells/", {"page": page} if page > 1 else None)
+                if not payload:
+                    return wells
+                wells.extend(payload["data"]["wells"])
+                pagination = payload["data"].get("pagination")
+                if not pagination or not pagination.get("has_next"):
+                    return wells
+                page += 1
+
         self.logger.info("Запрос данных скважин из внешнего API (mock)")
 
         try:
@@ -110,13 +162,17 @@ class ExternalWellDataClient:
         self.logger.warning(f"Скважина с ID {well_id} не найдена")
         return None
 
-    def get_well_telemetry(self, well_id: str) -> Optional[Dict[str, List[float]]]:
+    def get_well_telemetry(
+            self, well_id: str, hours: int = 24, points: int = 100
+    ) -> Optional[Dict[str, List[float]]]:
         """
         Получает исторические данные телеметрии скважины.
-        Пока генерирует случайные данные в реальном времени.
+        В режиме use_mock генерирует 10 случайных точек в реальном времени.
 
         Args:
             well_id: Уникальный идентификатор скважины
+            hours: За сколько последних часов нужны данные
+            points: Количество точек
 
         Returns:
             Словарь с временными рядами телеметрии или None если скважина не найдена
@@ -125,6 +181,11 @@ class ExternalWellDataClient:
         import random
         import time
 
+        if not self.use_mock:
+            self.logger.info(f"Запрос телеметрии скважины {well_id}")
+            payload = self._get_json(f"/wells/{well_id}/telemetry/", {"hours": hours, "points": points})
+            return payload["data"]["telemetry"] if payload else None
+
         well = self.get_well_by_id(well_id)
         if not well:
             return None
@@ -157,6 +218,33 @@ class ExternalWellDataClient:
         self.logger.debug(f"Сгенерирована телеметрия для скважины {well_id}")
         return telemetry
 
+    def get_wells_telemetry(
+            self, well_ids: List[str], hours: int = 24, points: int = 100,
+            batch_size: int = TELEMETRY_BATCH_SIZE
+    ) -> Dict[str, Dict[str, List[float]]]:
+        """
+        Получает телеметрию нескольких скважин пакетными запросами
+        (по batch_size скважин на запрос вместо запроса на каждую скважину).
+
+        Returns:
+            Словарь {well_id: телеметрия в формате get_well_telemetry};
+            скважины, не найденные во внешнем API, в него не попадают
+        """
+        if self.use_mock:
+            telemetry = {well_id: self.get_well_telemetry(well_id, hours, points) for well_id in well_ids}
+            return {well_id: data for well_id, data in telemetry.items() if data}
+
+        result = {}
+        for offset in range(0, len(well_ids), batch_size):
+            chunk = well_ids[offset:offset + batch_size]
+            self.logger.info(f"Запрос телеметрии {len(chunk)} скважин")
+            payload = self._get_json(
+                "/telemetry/", {"well_ids": ",".join(chunk), "hours": hours, "points": points}
+            )
+            if payload:
+                result.update(payload["data"]["telemetry"])
+        return result
+
     @classmethod
     def create_mock_client(cls) -> "ExternalWellDataClient":
         """
@@ -175,6 +263,25 @@ class ExternalWellDataClient:
             timeout=30
         )
 
+    @classmethod
+    def create_local_client(
+            cls, api_url: str = "http://127.0.0.1:8000/mock-external/api/v1"
+    ) -> "ExternalWellDataClient":
+        """
+        Фабричный метод для клиента, работающего по HTTP с mock_external_api
+        (или с любым сервисом с тем же форматом ответов).
+
+        Использование:
+            client = ExternalWellDataClient.create_local_client()
+            wells = client.get_wells_data()
+        """
+        return cls(
+            api_url=api_url,
+            api_key="test_api_key_12345",
+            timeout=30,
+            use_mock=False
+        )
+
     def check_health(self) -> Dict[str, any]:
         """
         Проверяет доступность и работоспособность внешнего API.
@@ -192,6 +299,15 @@ class ExternalWellDataClient:
 
         start_time = time.time()
 
+        if not self.use_mock:
+            payload = self._get_json("/health/") or {}
+            return {
+                "status": payload.get("status", "unknown"),
+                "response_time": round(time.time() - start_time, 3),
+                "version": payload.get("version"),
+                "timestamp": int(time.time())
+            }
+
         try:
             # Имитация проверки API (в реальности - HTTP HEAD запрос)
             time.sleep(0.1)  # Имитация сетевой задержки
@@ -227,6 +343,11 @@ if __name__ == "__main__":
     Пример использования ExternalWellDataClient.
     Запустите этот файл для тестирования: python external_api_client.py
     """
+    # В Django логирование настраивается в settings.LOGGING
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
     print("=== Тестирование ExternalWellDataClient ===")
 
     # 1. Создаем mock-клиент
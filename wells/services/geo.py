@@ -0,0 +1,129 @@
+"""
+Пространственные запросы по фонду скважин.
+
+Кандидаты отбираются по индексу geohash (диапазоны ячеек, покрывающих
+область), точное расстояние по формуле гаверсинусов считается векторно
+только для кандидатов - не для всех скважин фонда.
+"""
+import math
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+from django.db.models import FloatField, Q, QuerySet
+from django.db.models.functions import Cast
+
+from wells.geohash import cover
+from wells.models import Well
+
+
+EARTH_RADIUS_KM = 6371.0088
+# Поиск ближайших: начальный радиус и предел расширения
+NEAREST_START_KM = 5.0
+NEAREST_MAX_KM = 20038.0
+# Ячеек geohash на запрос: больше ячеек - точнее покрытие, но длиннее условие OR
+MAX_CELLS = 64
+
+
+@dataclass
+class GeoMatch:
+    """Скважина, найденная пространственным запросом"""
+    id: int
+    distance_km: Optional[float] = None
+
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Расстояния от точки (lat, lon) до массивов точек, км"""
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _base(queryset: Optional[QuerySet]) -> QuerySet:
+    return Well.objects.all() if queryset is None else queryset
+
+
+Box = Tuple[float, float, float, float]
+
+
+def _in_cells(queryset: QuerySet, boxes: List[Box]) -> QuerySet:
+    """Фильтр по диапазонам geohash, покрывающим прямоугольники (использует индекс)"""
+    condition = Q()
+    for box in boxes:
+        for start, stop in cover(*box, max_cells=MAX_CELLS // len(boxes)):
+            cell = Q(geohash__gte=start)
+            if stop is not None:
+                cell &= Q(geohash__lt=stop)
+            condition |= cell
+    return queryset.filter(condition)
+
+
+def _candidates(queryset: QuerySet, boxes: List[Box]) -> Tuple[np.ndarray, ...]:
+    """id, широты и долготы скважин в ячейках прямоугольников (одним запросом)"""
+    cells = _in_cells(queryset, boxes).order_by()
+    # Координаты читаются как float: преобразование в Decimal дороже самого запроса
+    rows = list(cells.values_list('id', Cast('latitude', FloatField()), Cast('longitude', FloatField())))
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0), np.empty(0)
+    ids, lats, lons = zip(*rows)
+    return np.array(ids, dtype=np.int64), np.array(lats, dtype=np.float64), np.array(lons, dtype=np.float64)
+
+
+def radius_bbox(lat: float, lon: float, radius_km: float) -> List[Box]:
+    """
+    Прямоугольники (min_lat, min_lon, max_lat, max_lon), покрывающие круг радиуса radius_km
+    на сфере. Если круг накрывает полюс - полная полоса долгот; если пересекает
+    180-й меридиан - два прямоугольника по разные стороны от него.
+    """
+    distance = radius_km / EARTH_RADIUS_KM
+    min_lat, max_lat = lat - math.degrees(distance), lat + math.degrees(distance)
+    if min_lat <= -90.0 or max_lat >= 90.0:
+        return [(max(-90.0, min_lat), -180.0, min(90.0, max_lat), 180.0)]
+    # Наибольшее отклонение по долготе - в точках касания меридианов, а не на широте центра
+    dlon = math.degrees(math.asin(min(1.0, math.sin(distance) / math.cos(math.radians(lat)))))
+    min_lon, max_lon = lon - dlon, lon + dlon
+    if min_lon < -180.0:
+        return [(min_lat, min_lon + 360.0, max_lat, 180.0), (min_lat, -180.0, max_lat, max_lon)]
+    if max_lon > 180.0:
+        return [(min_lat, min_lon, max_lat, 180.0), (min_lat, -180.0, max_lat, max_lon - 360.0)]
+    return [(min_lat, min_lon, max_lat, max_lon)]
+
+
+def within_bbox(
+        min_lat: float, min_lon: float, max_lat: float, max_lon: float,
+        queryset: Optional[QuerySet] = None
+) -> List[GeoMatch]:
+    """Скважины в прямоугольнике; ячейки geohash уточняются точной проверкой координат"""
+    ids, lats, lons = _candidates(_base(queryset), [(min_lat, min_lon, max_lat, max_lon)])
+    inside = (lats >= min_lat) & (lats <= max_lat) & (lons >= min_lon) & (lons <= max_lon)
+    return [GeoMatch(id=int(well_id)) for well_id in ids[inside]]
+
+
+def within_radius(
+        lat: float, lon: float, radius_km: float, queryset: Optional[QuerySet] = None
+) -> List[GeoMatch]:
+    """Скважины не дальше radius_km от точки, по возрастанию расстояния"""
+    ids, lats, lons = _candidates(_base(queryset), radius_bbox(lat, lon, radius_km))
+    distances = haversine_km(lat, lon, lats, lons)
+    inside = distances <= radius_km
+    ids, distances = ids[inside], distances[inside]
+    order = np.argsort(distances, kind='stable')
+    return [GeoMatch(id=int(ids[i]), distance_km=round(float(distances[i]), 3)) for i in order]
+
+
+def nearest(
+        lat: float, lon: float, count: int, queryset: Optional[QuerySet] = None
+) -> List[GeoMatch]:
+    """
+    count ближайших скважин к точке. Радиус поиска удваивается, пока в круге
+    не окажется count скважин: все они ближе любой скважины за его пределами.
+    """
+    if count < 0:
+        raise ValueError('count не может быть отрицательным')
+    radius_km = NEAREST_START_KM
+    while True:
+        matches = within_radius(lat, lon, radius_km, queryset)
+        if len(matches) >= count or radius_km >= NEAREST_MAX_KM:
+            return matches[:count]
+        radius_km = min(radius_km * 2, NEAREST_MAX_KM)
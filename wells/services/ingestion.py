@@ -0,0 +1,135 @@
+"""
+Синхронизация скважин и телеметрии из внешней системы мониторинга.
+
+Список скважин запрашивается одним вызовом, затем телеметрия загружается
+пакетными запросами (batch_size скважин на запрос) параллельно пулом потоков
+с ограниченным числом одновременных запросов. Сетевые вызовы выполняются
+в рабочих потоках, а запись в БД - только в вызывающем потоке, теми же пачками.
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+from django.utils import timezone
+
+from wells.cache import invalidate_wells
+from wells.models import Well
+from .anomaly import AnomalyDetector
+from .bulk_sync import CREATED, INVALID, UPDATED, sync_external_wells
+from .external_api_client import ExternalWellDataClient
+from .recommendations import refresh_recommendations
+from .rollups import deferred_field_rollups
+from .telemetry import ingest_telemetry_batch
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_BATCH_SIZE = 50
+
+SNAPSHOT_FIELDS = ['current_pressure', 'measured_flow_rate', 'temperature', 'last_data_update']
+
+
+@dataclass
+class SyncResult:
+    """Итоги синхронизации"""
+    wells: int = 0
+    readings: int = 0
+    alerts: int = 0
+    failed: List[str] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def wells_per_second(self) -> float:
+        return self.wells / self.elapsed if self.elapsed else 0.0
+
+
+def upsert_wells(records: List[Dict]) -> Dict[str, Well]:
+    """Создает или обновляет скважины из списка внешнего API"""
+    result = sync_external_wells(records)
+    for item in result.results:
+        if item['status'] == INVALID:
+            logger.warning(f"Некорректные данные скважины {item['well_id']}: {item['errors']}")
+    well_numbers = [item['well_id'] for item in result.results if item['status'] in (CREATED, UPDATED)]
+    return Well.objects.in_bulk(well_numbers, field_name='well_number')
+
+
+class WellSyncWorker:
+    """
+    Параллельная загрузка телеметрии всех скважин внешнего API.
+
+    Использование:
+        worker = WellSyncWorker(ExternalWellDataClient.create_local_client(), concurrency=10)
+        result = worker.run()
+    """
+
+    def __init__(
+            self,
+            client: ExternalWellDataClient,
+            concurrency: int = DEFAULT_CONCURRENCY,
+            batch_size: int = DEFAULT_BATCH_SIZE,
+            hours: int = 24,
+            points: int = 100
+    ):
+        self.client = client
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.hours = hours
+        self.points = points
+        self.detector = AnomalyDetector()
+
+    def run(self) -> SyncResult:
+        result = SyncResult()
+        started = time.perf_counter()
+
+        wells = upsert_wells(self.client.get_wells_data())
+        logger.info(f"Получено {len(wells)} скважин, загрузка телеметрии ({self.concurrency} потоков)")
+
+        # Телеметрия запрашивается пакетами по batch_size скважин: один запрос на пакет.
+        # Свертки месторождений пересчитываются один раз после всех пакетов
+        well_numbers = list(wells)
+        chunks = [well_numbers[i:i + self.batch_size] for i in range(0, len(well_numbers), self.batch_size)]
+        with deferred_field_rollups(), \
+                ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='sync-wells') as pool:
+            futures = {
+                pool.submit(self.client.get_wells_telemetry, chunk, self.hours, self.points): chunk
+                for chunk in chunks
+            }
+            for future in as_completed(futures):
+                chunk = futures[future]
+                try:
+                    telemetry = future.result()
+                except ConnectionError as e:
+                    logger.warning(f"Телеметрия {len(chunk)} скважин ({chunk[0]}...) не получена: {e}")
+                    result.failed.extend(chunk)
+                    continue
+
+                batch: List[Tuple[Well, Dict]] = [
+                    (wells[well_number], telemetry[well_number])
+                    for well_number in chunk
+                    if telemetry.get(well_number) and telemetry[well_number]['timestamps']
+                ]
+                if batch:
+                    self.flush(batch, result)
+
+        result.elapsed = time.perf_counter() - started
+        return result
+
+    def flush(self, batch: List[Tuple[Well, Dict]], result: SyncResult) -> None:
+        """Записывает пачку телеметрии и обновляет текущие показания скважин"""
+        result.readings += ingest_telemetry_batch(batch)
+
+        now = timezone.now()
+        for well, telemetry in batch:
+            well.current_pressure = telemetry['pressure'][-1]
+            well.measured_flow_rate = telemetry['flow_rate'][-1]
+            well.temperature = telemetry['temperature'][-1]
+            well.last_data_update = now
+        Well.objects.bulk_update([well for well, _ in batch], SNAPSHOT_FIELDS)
+        invalidate_wells([well.pk for well, _ in batch])
+        refresh_recommendations([well.pk for well, _ in batch])
+        result.alerts += len(self.detector.process_batch(batch))
+
+        result.wells += len(batch)
@@ -0,0 +1,224 @@
+"""
+Метрики процесса в текстовом формате Prometheus (без зависимостей,
+не требует Django - используется и транспортом внешнего API).
+
+Значения хранятся в памяти процесса: при нескольких рабочих процессах
+(gunicorn/uvicorn --workers) каждый отдает свои, Prometheus собирает
+их с каждого процесса как с отдельной цели.
+"""
+import bisect
+import re
+import threading
+from typing import Dict, List, Sequence, Tuple
+
+
+# Границы корзин гистограмм: время, с, и количество запросов к БД
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+# Возраст данных скважины, с: от минуты до суток
+STALENESS_BUCKETS = (30, 60, 120, 300, 600, 900, 1800, 3600, 7200, 14400, 86400)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Общая часть метрик: имя, описание, метки и блокировка"""
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """Монотонно растущий счетчик"""
+    kind = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return self.header() + [
+            f'{self.name}{_format_labels(self.labels, labels)} {_format_number(value)}' for labels, value in values
+        ]
+
+
+class Gauge(Metric):
+    """Текущее значение (может уменьшаться)"""
+    kind = 'gauge'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return self.header() + [
+            f'{self.name}{_format_labels(self.labels, labels)} {_format_number(value)}' for labels, value in values
+        ]
+
+
+class Histogram(Metric):
+    """Гистограмма с фиксированными корзинами (как prometheus_client.Histogram)"""
+    kind = 'histogram'
+
+    def __init__(self, *args, buckets: Sequence[float] = LATENCY_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(buckets)
+        # метки -> [счетчики по корзинам (+Inf последней), сумма]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def count(self, *labels: str) -> int:
+        state = self._values.get(labels)
+        return sum(state[0]) if state else 0
+
+    def sum(self, *labels: str) -> float:
+        state = self._values.get(labels)
+        return state[1] if state else 0.0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._values.items())
+        lines = self.header()
+        for labels, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float('inf')), counts):
+                cumulative += count
+                le = 'le="' + _format_number(float(bound)) + '"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.labels, labels, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labels, labels)} {_format_number(total)}')
+            lines.append(f'{self.name}_count{_format_labels(self.labels, labels)} {cumulative}')
+        return lines
+
+
+class Registry:
+    """Набор метрик процесса"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f'Метрика {metric.name} уже зарегистрирована')
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Все метрики в текстовом формате Prometheus 0.0.4"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+# Запросы к нашему API (см. wells.instrumentation.MetricsMiddleware)
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'wells_http_request_duration_seconds', 'Время обработки запроса до ответа', ['view', 'method', 'status']
+))
+HTTP_DB_QUERIES = REGISTRY.register(Histogram(
+    'wells_http_db_queries', 'Запросов к БД на один HTTP-запрос', ['view'], buckets=COUNT_BUCKETS
+))
+HTTP_DB_SECONDS = REGISTRY.register(Histogram(
+    'wells_http_db_duration_seconds', 'Суммарное время запросов к БД на один HTTP-запрос', ['view']
+))
+HTTP_RENDER_SECONDS = REGISTRY.register(Histogram(
+    'wells_http_render_duration_seconds', 'Время сериализации ответа (рендеринг DRF/шаблона)', ['view']
+))
+
+# Обращения к внешнему API (см. transport.HTTPTransport, async_client.AsyncHTTPTransport)
+UPSTREAM_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'wells_upstream_request_duration_seconds', 'Время одной попытки запроса к внешнему API',
+    ['endpoint', 'method', 'outcome']
+))
+UPSTREAM_RETRIES = REGISTRY.register(Counter(
+    'wells_upstream_retries_total', 'Повторы запросов к внешнему API', ['endpoint']
+))
+UPSTREAM_FAILURES = REGISTRY.register(Counter(
+    'wells_upstream_failures_total', 'Запросы к внешнему API, завершившиеся ошибкой после повторов',
+    ['endpoint', 'reason']
+))
+
+# Планировщик опроса телеметрии (см. services.scheduler.PollingScheduler)
+SCHEDULER_POLLS = REGISTRY.register(Counter(
+    'wells_scheduler_polls_total', 'Обновлений телеметрии скважин планировщиком', ['status']
+))
+SCHEDULER_REQUESTS = REGISTRY.register(Counter(
+    'wells_scheduler_upstream_requests_total', 'Запросов планировщика к внешнему API', ['kind']
+))
+SCHEDULER_BUDGET_EXHAUSTED = REGISTRY.register(Counter(
+    'wells_scheduler_budget_exhausted_total', 'Циклов, в которых скважины ждали из-за бюджета запросов'
+))
+SCHEDULER_STALENESS_SECONDS = REGISTRY.register(Histogram(
+    'wells_scheduler_staleness_seconds', 'Возраст данных скважины к моменту ее обновления', ['status'],
+    buckets=STALENESS_BUCKETS
+))
+SCHEDULER_MAX_STALENESS = REGISTRY.register(Gauge(
+    'wells_scheduler_max_staleness_seconds', 'Наибольший текущий возраст данных среди скважин', ['status']
+))
+SCHEDULER_INTERVAL = REGISTRY.register(Gauge(
+    'wells_scheduler_interval_seconds', 'Средний интервал опроса скважин', ['status']
+))
+
+_ID_SEGMENT = re.compile(r'/[^/]*\d[^/]*')
+
+
+def upstream_endpoint(path: str) -> str:
+    """Шаблон пути для метки: /wells/WELL-001/telemetry/ -> /wells/{id}/telemetry/"""
+    return _ID_SEGMENT.sub('/{id}', path.split('?', 1)[0])
+
+
+def upstream_outcome(status=None) -> str:
+    """Метка результата попытки: класс HTTP-статуса или error (нет ответа)"""
+    return 'error' if status is None else f'{status // 100}xx'
@@ -0,0 +1,298 @@
+"""
+Рассылка изменений скважин подписчикам потока событий (SSE, см.
+async_views.well_events).
+
+Телеметрию загружает отдельный процесс (sync_wells), поэтому изменения
+берутся из БД: один цикл на процесс раз в TICK_SECONDS читает ленту
+изменений скважин (changes_since) и новые показания телеметрии (по
+возрастанию id) и раздает их всем подписчикам. Стоимость опроса не
+зависит от числа подписчиков.
+
+id показаний выдаются при вставке, а видимыми строки становятся при
+фиксации: в PostgreSQL параллельные записи фиксируются не в порядке id,
+и строка с меньшим id может появиться после уже прочитанных. Поэтому
+граница чтения показаний отстает на READINGS_LOOKBACK_SECONDS: строки
+выше нее перечитываются (только id, по первичному ключу), уже
+разосланные пропускаются. Транзакции записи телеметрии короче этого окна.
+
+Изменения сливаются: у подписчика копятся последний снимок каждой скважины
+и новые точки телеметрии, поток отправляет накопленное одним кадром.
+Всплеск из 10 тысяч обновлений - это один-два кадра, а медленный клиент
+получает меньше кадров, а не растущую очередь.
+"""
+import asyncio
+import logging
+import time
+import weakref
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from asgiref.sync import sync_to_async
+from django.db import DatabaseError, connection
+from django.db.models import Max
+from django.utils import timezone
+
+from wells.models import TelemetryReading, Well
+from .changes import SETTLE_SECONDS, ChangeSet, changes_since, encode_cursor
+from .telemetry import TELEMETRY_PARAMETERS
+
+logger = logging.getLogger(__name__)
+
+
+TICK_SECONDS = 1.0
+# Предел чтения за один цикл: при большем потоке остаток переходит в следующий
+TICK_CHANGES_LIMIT = 5000
+TICK_MAX_PAGES = 20
+TICK_MAX_READINGS = 50000
+# Окно повторного чтения показаний (см. описание модуля), с
+READINGS_LOOKBACK_SECONDS = 10
+# Точек телеметрии одной скважины в очереди подписчика (старые отбрасываются)
+MAX_PENDING_POINTS = 1000
+# Кэш "скважина -> месторождение" для фильтра подписок по месторождению
+MAX_CACHED_FIELDS = 100000
+
+
+@dataclass
+class Tick:
+    """Изменения за один цикл опроса"""
+    cursor: str
+    wells: List[Dict] = field(default_factory=list)
+    deleted: List[Dict] = field(default_factory=list)
+    # id скважины -> колоночный словарь новых точек (формат series_to_lists)
+    telemetry: Dict[int, Dict[str, List]] = field(default_factory=dict)
+    # Месторождения скважин из telemetry и deleted, если известны
+    fields: Dict[int, str] = field(default_factory=dict)
+
+    def __bool__(self):
+        return bool(self.wells or self.deleted or self.telemetry)
+
+    @classmethod
+    def from_changes(cls, changes: ChangeSet) -> 'Tick':
+        return cls(cursor=changes.cursor, wells=changes.updated, deleted=changes.deleted)
+
+
+def _empty_series() -> Dict[str, List]:
+    return {'timestamps': [], **{name: [] for name in TELEMETRY_PARAMETERS}}
+
+
+class Subscription:
+    """
+    Подписка одного клиента: фильтр по скважинам и месторождениям
+    и накопленные с последнего кадра изменения.
+    """
+
+    def __init__(self, well_ids: Iterable[int] = (), fields: Iterable[str] = ()):
+        self.well_ids: Optional[Set[int]] = set(well_ids) or None
+        self.fields: Optional[Set[str]] = set(fields) or None
+        self.cursor: Optional[str] = None
+        # Курсор последнего разосланного цикла: с него подписчик переподключается без потерь
+        self.published: Optional[str] = None
+        self.ready = asyncio.Event()
+        self._wells: Dict[int, Dict] = {}
+        self._deleted: Dict[int, Dict] = {}
+        self._telemetry: Dict[int, Dict[str, List]] = {}
+
+    def matches(self, well_id: int, well_field: Optional[str]) -> bool:
+        """Удовлетворяет ли скважина фильтру (неизвестное месторождение не отсекается)"""
+        if self.well_ids is not None and well_id not in self.well_ids:
+            return False
+        if self.fields is not None and well_field is not None and well_field not in self.fields:
+            return False
+        return True
+
+    def push(self, tick: Tick) -> None:
+        """Добавляет изменения цикла к накопленным (последний снимок скважины заменяет прежний)"""
+        for snapshot in tick.wells:
+            if self.matches(snapshot['id'], snapshot['field']):
+                self._wells[snapshot['id']] = snapshot
+                self._deleted.pop(snapshot['id'], None)
+        for item in tick.deleted:
+            if self.matches(item['id'], tick.fields.get(item['id'])):
+                self._deleted[item['id']] = item
+                self._wells.pop(item['id'], None)
+                self._telemetry.pop(item['id'], None)
+        for well_id, series in tick.telemetry.items():
+            if not self.matches(well_id, tick.fields.get(well_id)):
+                continue
+            pending = self._telemetry.setdefault(well_id, _empty_series())
+            for name, values in series.items():
+                pending[name].extend(values)
+                del pending[name][:-MAX_PENDING_POINTS]
+        self.cursor = tick.cursor
+        if self._wells or self._deleted or self._telemetry:
+            self.ready.set()
+
+    def take(self) -> Dict:
+        """Накопленные изменения одним кадром; очередь очищается"""
+        frame = {
+            'cursor': self.cursor,
+            'wells': list(self._wells.values()),
+            'deleted': list(self._deleted.values()),
+            'telemetry': {str(well_id): series for well_id, series in self._telemetry.items()},
+        }
+        self._wells, self._deleted, self._telemetry = {}, {}, {}
+        self.ready.clear()
+        return frame
+
+
+def _start_cursor() -> str:
+    """Позиция ленты изменений "с текущего момента" (с запасом SETTLE_SECONDS)"""
+    return encode_cursor((timezone.now() - timedelta(seconds=SETTLE_SECONDS), 0))
+
+
+class UpdateHub:
+    """
+    Общий для процесса (цикла событий) опрос изменений. Запускается при
+    первой подписке и останавливается, когда подписчиков не осталось.
+    """
+
+    def __init__(self, tick_seconds: float = TICK_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self.tick_seconds = tick_seconds
+        self.clock = clock
+        self.subscriptions: Set[Subscription] = set()
+        self.task: Optional[asyncio.Task] = None
+        self.cursor: Optional[str] = None
+        # Показания с id не выше reading_floor уже разосланы; выше - разосланные из reading_seen
+        self.reading_floor: Optional[int] = None
+        self.reading_seen: Set[int] = set()
+        # (время цикла, наибольший прочитанный id): граница догоняет их через окно
+        self._reading_marks: Deque[Tuple[float, int]] = deque()
+        # Изменения, уже разосланные в пределах окна SETTLE_SECONDS (лента отдает их повторно)
+        self._recent: Set = set()
+        self._fields: Dict[int, str] = {}
+
+    def subscribe(self, subscription: Subscription) -> None:
+        self.subscriptions.add(subscription)
+        if self.task is None or self.task.done():
+            # Позиция старта известна подписчику еще до первого цикла
+            self.cursor = self.published = _start_cursor()
+            self.task = asyncio.get_running_loop().create_task(self._run())
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self.subscriptions.discard(subscription)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while self.subscriptions:
+                started = loop.time()
+                try:
+                    tick = await sync_to_async(self.poll)()
+                except DatabaseError:
+                    logger.exception('Ошибка опроса изменений скважин')
+                    tick = None
+                if tick:
+                    for subscription in list(self.subscriptions):
+                        subscription.push(tick)
+                if tick is not None:
+                    self.published = tick.cursor
+                await asyncio.sleep(max(0.0, self.tick_seconds - (loop.time() - started)))
+        finally:
+            # Следующий запуск начнет с текущего момента, а не с давно устаревшей позиции
+            self.cursor = self.published = None
+            self.reading_floor = None
+            self.reading_seen = set()
+            self._reading_marks.clear()
+            self._recent = set()
+
+    def poll(self) -> Tick:
+        """Изменения скважин и новые показания с прошлого цикла (синхронно, через ORM)"""
+        if self.cursor is None:
+            self.cursor = _start_cursor()
+        if self.reading_floor is None:
+            self.reading_floor = TelemetryReading.objects.aggregate(last=Max('id'))['last'] or 0
+
+        wells: Dict[int, Dict] = {}
+        deleted: Dict[int, Dict] = {}
+        seen = set()
+        for _ in range(TICK_MAX_PAGES):
+            changes = changes_since(self.cursor, TICK_CHANGES_LIMIT)
+            self.cursor = changes.cursor
+            for snapshot in changes.updated:
+                key = (snapshot['id'], snapshot['last_data_update'])
+                seen.add(key)
+                if key not in self._recent:
+                    wells[snapshot['id']] = snapshot
+                    deleted.pop(snapshot['id'], None)
+            for item in changes.deleted:
+                key = ('deleted', item['id'])
+                seen.add(key)
+                if key not in self._recent:
+                    deleted[item['id']] = item
+                    wells.pop(item['id'], None)
+            if not changes.has_more:
+                break
+        self._recent = seen
+
+        tick = Tick(cursor=self.cursor, wells=list(wells.values()), deleted=list(deleted.values()))
+        tick.telemetry = self._new_readings()
+        for snapshot in tick.wells:
+            self._fields[snapshot['id']] = snapshot['field']
+        tick.fields = self._well_fields([*tick.telemetry, *deleted])
+        return tick
+
+    def _new_readings(self) -> Dict[int, Dict[str, List]]:
+        now = self.clock()
+        ids = (
+            TelemetryReading.objects
+            .filter(id__gt=self.reading_floor)
+            .order_by('id')
+            .values_list('id', flat=True)[:TICK_MAX_READINGS + len(self.reading_seen)]
+        )
+        new_ids = [reading_id for reading_id in ids if reading_id not in self.reading_seen][:TICK_MAX_READINGS]
+        if new_ids:
+            self.reading_seen.update(new_ids)
+            self._reading_marks.append((now, new_ids[-1]))
+        # Граница сдвигается к id, прочитанным не позже окна назад
+        floor = self.reading_floor
+        while self._reading_marks and self._reading_marks[0][0] <= now - READINGS_LOOKBACK_SECONDS:
+            floor = max(floor, self._reading_marks.popleft()[1])
+        if floor != self.reading_floor:
+            self.reading_floor = floor
+            self.reading_seen = {reading_id for reading_id in self.reading_seen if reading_id > floor}
+        if not new_ids:
+            return {}
+
+        rows = []
+        batch_size = connection.features.max_query_params or len(new_ids)
+        for start in range(0, len(new_ids), batch_size):
+            rows.extend(
+                TelemetryReading.objects
+                .filter(id__in=new_ids[start:start + batch_size])
+                .values_list('id', 'well_id', 'timestamp', *TELEMETRY_PARAMETERS)
+            )
+        rows.sort()
+        telemetry: Dict[int, Dict[str, List]] = {}
+        for _, well_id, timestamp, *values in rows:
+            series = telemetry.setdefault(well_id, _empty_series())
+            series['timestamps'].append(int(timestamp.timestamp()))
+            for name, value in zip(TELEMETRY_PARAMETERS, values):
+                series[name].append(value)
+        return telemetry
+
+    def _well_fields(self, well_ids: List[int]) -> Dict[int, str]:
+        """Месторождения скважин (из кэша, недостающие - одним запросом)"""
+        missing = [well_id for well_id in well_ids if well_id not in self._fields]
+        if missing:
+            if len(self._fields) + len(missing) > MAX_CACHED_FIELDS:
+                self._fields.clear()
+            batch_size = connection.features.max_query_params or len(missing)
+            for start in range(0, len(missing), batch_size):
+                self._fields.update(
+                    Well.objects.filter(id__in=missing[start:start + batch_size]).values_list('id', 'field')
+                )
+        return {well_id: self._fields[well_id] for well_id in well_ids if well_id in self._fields}
+
+
+_hubs: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, UpdateHub]' = weakref.WeakKeyDictionary()
+
+
+def get_hub() -> UpdateHub:
+    """Опрос изменений текущего цикла событий (один на ASGI-процесс)"""
+    loop = asyncio.get_running_loop()
+    hub = _hubs.get(loop)
+    if hub is None:
+        hub = _hubs[loop] = UpdateHub()
+    return hub
@@ -0,0 +1,212 @@
+"""
+Движок рекомендаций по фонду скважин.
+
+Снимки скважин (Well) и базовые значения из суточных сверток телеметрии
+загружаются в массивы NumPy, и каждое правило вычисляется одной векторной
+операцией сразу для всех скважин. Python-цикл идет только по скважинам,
+для которых правило сработало (формирование текста).
+
+Пересчет инкрементальный: refresh_recommendations(well_ids) обновляет
+рекомендации только переданных скважин (например, пачки синхронизации).
+"""
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Callable, Iterable, List, Optional, Tuple
+
+import numpy as np
+from django.db import transaction
+from django.db.models import F, FloatField, Sum
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from wells.models import Recommendation, TelemetryRollup, TelemetryStats, Well
+
+
+# Период базового уровня давления и дебита, суток
+BASELINE_DAYS = 7
+# Падение давления относительно базового уровня
+PRESSURE_DROP_RATIO = 0.15
+# Падение дебита относительно базового уровня и минимальный дебит, м³/сут
+FLOW_COLLAPSE_RATIO = 0.5
+FLOW_MIN = 1.0
+# Ожидаемая температура пласта: поверхность + геотермический градиент × глубина
+SURFACE_TEMPERATURE = 15.0
+GEOTHERMAL_GRADIENT = 0.03  # °C на метр
+TEMPERATURE_BAND = 20.0
+
+
+@dataclass
+class Fleet:
+    """Снимок фонда скважин в виде колонок NumPy (NaN - нет данных)"""
+    ids: np.ndarray
+    well_numbers: np.ndarray
+    status: np.ndarray
+    depth: np.ndarray
+    pressure: np.ndarray
+    flow_rate: np.ndarray
+    temperature: np.ndarray
+    baseline_pressure: np.ndarray
+    baseline_flow_rate: np.ndarray
+
+    def __len__(self):
+        return len(self.ids)
+
+
+@dataclass(frozen=True)
+class Rule:
+    code: str
+    type: str
+    priority: str
+    title: str
+    # Маска сработавших скважин
+    check: Callable[[Fleet], np.ndarray]
+    # (описание, экономический эффект) для скважины с индексом i
+    describe: Callable[[Fleet, int], Tuple[str, str]]
+
+
+def _expected_temperature(fleet):
+    return SURFACE_TEMPERATURE + GEOTHERMAL_GRADIENT * fleet.depth
+
+
+RULES = [
+    Rule(
+        code='pressure_drop',
+        type='maintenance',
+        priority='high',
+        title='Падение пластового давления',
+        check=lambda f: f.pressure < f.baseline_pressure * (1 - PRESSURE_DROP_RATIO),
+        describe=lambda f, i: (
+            f'Давление {f.pressure[i]:.1f} атм ниже среднего за {BASELINE_DAYS} сут '
+            f'({f.baseline_pressure[i]:.1f} атм) на {100 * (1 - f.pressure[i] / f.baseline_pressure[i]):.0f}%. '
+            f'Рекомендуется проверить герметичность и режим работы насоса',
+            ''
+        ),
+    ),
+    Rule(
+        code='flow_collapse',
+        type='emergency',
+        priority='critical',
+        title='Резкое падение дебита',
+        check=lambda f: (f.status == 'active') & (
+            (f.flow_rate < FLOW_MIN) | (f.flow_rate < f.baseline_flow_rate * FLOW_COLLAPSE_RATIO)
+        ),
+        describe=lambda f, i: (
+            f'Скважина в работе, но дебит {f.flow_rate[i]:.1f} м³/сут '
+            f'(среднее за {BASELINE_DAYS} сут: {np.nan_to_num(f.baseline_flow_rate[i]):.1f} м³/сут)',
+            f'Потери добычи до {max(np.nan_to_num(f.baseline_flow_rate[i]) - f.flow_rate[i], 0):.0f} м³/сут'
+        ),
+    ),
+    Rule(
+        code='temperature_band',
+        type='optimization',
+        priority='medium',
+        title='Температура вне нормы для глубины',
+        check=lambda f: np.abs(f.temperature - _expected_temperature(f)) > TEMPERATURE_BAND,
+        describe=lambda f, i: (
+            f'Температура {f.temperature[i]:.1f} °C при ожидаемой {_expected_temperature(f)[i]:.1f} °C '
+            f'для глубины {f.depth[i]:.0f} м',
+            ''
+        ),
+    ),
+]
+
+
+def _weighted_avg(name):
+    return Sum(F(f'{name}_avg') * F('count'), output_field=FloatField()) / Cast(Sum('count'), FloatField())
+
+
+def load_fleet(well_ids: Optional[List[int]] = None) -> Fleet:
+    """Снимки скважин и базовые уровни за BASELINE_DAYS суток (два запроса)"""
+    wells = Well.objects.order_by('id')
+    if well_ids is not None:
+        wells = wells.filter(id__in=well_ids)
+    rows = list(wells.values_list(
+        'id', 'well_number', 'status', 'depth', 'current_pressure', 'measured_flow_rate', 'temperature'
+    ))
+    columns = list(zip(*rows)) or [()] * 7
+    ids = np.array(columns[0], dtype=np.int64)
+
+    rollups = TelemetryRollup.objects.filter(
+        granularity=TelemetryStats.DAY,
+        bucket_start__gte=timezone.now() - timedelta(days=BASELINE_DAYS)
+    )
+    if well_ids is not None:
+        rollups = rollups.filter(well_id__in=well_ids)
+    baseline = list(
+        rollups
+        .order_by()
+        .values('well_id')
+        .annotate(pressure=_weighted_avg('pressure'), flow_rate=_weighted_avg('flow_rate'))
+        .values_list('well_id', 'pressure', 'flow_rate')
+    )
+    baseline_pressure = np.full(len(ids), np.nan)
+    baseline_flow_rate = np.full(len(ids), np.nan)
+    if baseline and len(ids):
+        baseline_ids, pressure, flow_rate = (np.array(column, dtype=np.float64) for column in zip(*baseline))
+        positions = np.searchsorted(ids, baseline_ids)
+        found = (positions < len(ids)) & (ids[np.minimum(positions, len(ids) - 1)] == baseline_ids)
+        baseline_pressure[positions[found]] = pressure[found]
+        baseline_flow_rate[positions[found]] = flow_rate[found]
+
+    return Fleet(
+        ids=ids,
+        well_numbers=np.array(columns[1], dtype=object),
+        status=np.array(columns[2], dtype=object),
+        depth=np.array(columns[3], dtype=np.float64),
+        pressure=np.array(columns[4], dtype=np.float64),
+        flow_rate=np.array(columns[5], dtype=np.float64),
+        temperature=np.array(columns[6], dtype=np.float64),
+        baseline_pressure=baseline_pressure,
+        baseline_flow_rate=baseline_flow_rate,
+    )
+
+
+def evaluate(fleet: Fleet) -> List[Recommendation]:
+    """Рекомендации (не сохраненные) по всем сработавшим правилам"""
+    recommendations = []
+    with np.errstate(invalid='ignore'):
+        for rule in RULES:
+            for index in np.flatnonzero(rule.check(fleet)):
+                description, economic_effect = rule.describe(fleet, index)
+                recommendations.append(Recommendation(
+                    well_id=int(fleet.ids[index]),
+                    rule=rule.code,
+                    type=rule.type,
+                    priority=rule.priority,
+                    title=rule.title,
+                    description=description,
+                    economic_effect=economic_effect,
+                ))
+    return recommendations
+
+
+def refresh_recommendations(well_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Пересчитывает рекомендации для скважин well_ids (None - весь фонд).
+    Сработавшие правила создаются или обновляются (статус рассмотрения
+    сохраняется), несработавшие нерассмотренные рекомендации удаляются.
+
+    Returns:
+        Количество актуальных рекомендаций по этим скважинам
+    """
+    well_ids = list(well_ids) if well_ids is not None else None
+    started = timezone.now()
+    recommendations = evaluate(load_fleet(well_ids))
+
+    with transaction.atomic():
+        if recommendations:
+            Recommendation.objects.bulk_create(
+                recommendations,
+                update_conflicts=True,
+                unique_fields=['well', 'rule'],
+                update_fields=['type', 'priority', 'title', 'description', 'economic_effect', 'updated_at'],
+            )
+        stale = Recommendation.objects.filter(
+            rule__in=[rule.code for rule in RULES],
+            status='pending',
+            updated_at__lt=started
+        )
+        if well_ids is not None:
+            stale = stale.filter(well_id__in=well_ids)
+        stale.delete()
+    return len(recommendations)
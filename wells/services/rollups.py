@@ -0,0 +1,304 @@
+"""
+Свертки телеметрии по часам и суткам для скважин и месторождений.
+
+Свертки обновляются инкрементально: после записи пачки телеметрии
+пересчитываются только затронутые ею интервалы. Часовые свертки скважин
+считаются по сырым замерам, суточные - по часовым, свертки месторождений -
+по сверткам его скважин. Средние объединяются с весом по числу замеров.
+
+Свертки месторождения пересчитываются целиком за интервал (удаление и
+вставка), поэтому удаление скважины или ее перенос на другое месторождение
+тоже отражаются. Синхронизация пишет телеметрию пачками, и пересчет сверток
+месторождений после каждой пачки повторял бы одни и те же интервалы:
+внутри deferred_field_rollups он откладывается и выполняется один раз.
+
+plan_granularity выбирает самую грубую таблицу, которой достаточно для
+запрошенного числа точек на графике.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Avg, Count, F, FloatField, Max, Min, Sum
+from django.db.models.functions import Cast, Trunc
+
+from wells.models import FieldTelemetryRollup, TelemetryReading, TelemetryRollup, TelemetryStats, Well
+
+
+RAW = 'raw'
+HOUR = TelemetryStats.HOUR
+DAY = TelemetryStats.DAY
+GRANULARITY_STEP = {HOUR: timedelta(hours=1), DAY: timedelta(days=1)}
+
+PARAMETERS = ('temperature', 'pressure', 'flow_rate')
+STAT_FIELDS = ['count'] + [f'{name}_{stat}' for name in PARAMETERS for stat in ('min', 'max', 'avg')]
+
+
+def floor_bucket(moment: datetime, granularity: str) -> datetime:
+    """Начало интервала (UTC), содержащего moment"""
+    moment = moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+    if granularity == DAY:
+        moment = moment.replace(hour=0)
+    return moment
+
+
+def _trunc(expression: str, granularity: str) -> Trunc:
+    return Trunc(expression, granularity, tzinfo=dt_timezone.utc)
+
+
+# Префикс имен агрегатов: они не должны совпадать с полями сверток,
+# по которым сами же и считаются
+AGG = 'agg_'
+
+
+def _raw_aggregates() -> Dict:
+    """Агрегаты по сырым замерам"""
+    aggregates = {f'{AGG}count': Count('id')}
+    for name in PARAMETERS:
+        aggregates[f'{AGG}{name}_min'] = Min(name)
+        aggregates[f'{AGG}{name}_max'] = Max(name)
+        aggregates[f'{AGG}{name}_avg'] = Avg(name)
+    return aggregates
+
+
+def _combined_aggregates() -> Dict:
+    """Агрегаты по сверткам: средние взвешиваются количеством замеров"""
+    aggregates = {f'{AGG}count': Sum('count')}
+    for name in PARAMETERS:
+        aggregates[f'{AGG}{name}_min'] = Min(f'{name}_min')
+        aggregates[f'{AGG}{name}_max'] = Max(f'{name}_max')
+        aggregates[f'{AGG}{name}_avg'] = (
+            Sum(F(f'{name}_avg') * F('count'), output_field=FloatField()) / Cast(Sum('count'), FloatField())
+        )
+    return aggregates
+
+
+def _stats(row: Dict) -> Dict:
+    """Значения агрегатов строки под именами полей свертки"""
+    return {name: row[f'{AGG}{name}'] for name in STAT_FIELDS}
+
+
+def _upsert(model, objects, unique_fields) -> None:
+    if objects:
+        model.objects.bulk_create(
+            objects,
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=STAT_FIELDS,
+        )
+
+
+def _ranges(start: datetime, end: datetime) -> Dict[str, Tuple[datetime, datetime]]:
+    """Интервалы [начало, конец) сверток каждой детализации, покрывающие [start, end]"""
+    return {
+        granularity: (floor_bucket(start, granularity), floor_bucket(end, granularity) + step)
+        for granularity, step in GRANULARITY_STEP.items()
+    }
+
+
+# Отложенный пересчет сверток месторождений: {месторождение: (start, end)}
+_deferred_fields: ContextVar[Optional[Dict[str, Tuple[datetime, datetime]]]] = ContextVar(
+    'deferred_field_rollups', default=None
+)
+
+
+def refresh_field_rollups(fields: Iterable[str], start: datetime, end: datetime) -> None:
+    """Пересчитывает свертки месторождений fields, затронутые интервалом [start, end]"""
+    fields = list(set(fields))
+    if not fields:
+        return
+    with transaction.atomic():
+        for granularity, (bucket_from, bucket_to) in _ranges(start, end).items():
+            # Удаление и вставка, а не upsert: интервалы без замеров (скважины
+            # удалены или перенесены на другое месторождение) исчезают
+            FieldTelemetryRollup.objects.filter(
+                field__in=fields, granularity=granularity, bucket_start__gte=bucket_from, bucket_start__lt=bucket_to
+            ).delete()
+            rows = (
+                TelemetryRollup.objects
+                .filter(
+                    well__field__in=fields,
+                    granularity=granularity,
+                    bucket_start__gte=bucket_from,
+                    bucket_start__lt=bucket_to
+                )
+                .order_by()
+                .values('well__field', 'bucket_start')
+                .annotate(**_combined_aggregates())
+            )
+            FieldTelemetryRollup.objects.bulk_create([
+                FieldTelemetryRollup(
+                    field=row['well__field'], granularity=granularity, bucket_start=row['bucket_start'], **_stats(row)
+                )
+                for row in rows
+            ])
+
+
+def schedule_field_rollups(fields: Iterable[str], start: datetime, end: datetime) -> None:
+    """
+    Пересчитывает свертки месторождений сразу или, внутри deferred_field_rollups,
+    запоминает интервал до выхода из него.
+    """
+    pending = _deferred_fields.get()
+    if pending is None:
+        refresh_field_rollups(fields, start, end)
+        return
+    for field in fields:
+        if field in pending:
+            first, last = pending[field]
+            pending[field] = (min(first, start), max(last, end))
+        else:
+            pending[field] = (start, end)
+
+
+@contextmanager
+def deferred_field_rollups() -> Iterator[None]:
+    """
+    Откладывает пересчет сверток месторождений до выхода из блока: каждое
+    затронутое месторождение пересчитывается один раз за объединенный интервал.
+    Вложенные блоки пересчитываются при выходе из внешнего.
+    """
+    if _deferred_fields.get() is not None:
+        yield
+        return
+    pending: Dict[str, Tuple[datetime, datetime]] = {}
+    token = _deferred_fields.set(pending)
+    try:
+        yield
+    finally:
+        _deferred_fields.reset(token)
+        # Пачки, записанные до ошибки, уже зафиксированы - их свертки тоже нужны
+        intervals: Dict[Tuple[datetime, datetime], list] = {}
+        for field, interval in pending.items():
+            intervals.setdefault(interval, []).append(field)
+        for (start, end), fields in intervals.items():
+            refresh_field_rollups(fields, start, end)
+
+
+def well_rollup_range(well_ids: Iterable[int]) -> Optional[Tuple[datetime, datetime]]:
+    """Первый и последний час со свертками скважин well_ids; None - сверток нет"""
+    bounds = TelemetryRollup.objects.filter(well_id__in=list(well_ids), granularity=HOUR).aggregate(
+        first=Min('bucket_start'), last=Max('bucket_start')
+    )
+    if bounds['first'] is None:
+        return None
+    return bounds['first'], bounds['last']
+
+
+def refresh_moved_wells(well_ids: Iterable[int], fields: Iterable[str]) -> None:
+    """
+    Пересчитывает свертки месторождений после переноса скважин well_ids:
+    fields - их прежние и новые месторождения.
+    """
+    bounds = well_rollup_range(well_ids)
+    if bounds is not None:
+        schedule_field_rollups(fields, *bounds)
+
+
+def refresh_rollups(well_ids: Iterable[int], start: datetime, end: datetime) -> None:
+    """
+    Пересчитывает свертки, затронутые замерами скважин well_ids в интервале [start, end].
+    """
+    well_ids = list(set(well_ids))
+    if not well_ids:
+        return
+    ranges = _ranges(start, end)
+
+    with transaction.atomic():
+        # Часовые свертки скважин - по сырым замерам
+        rows = (
+            TelemetryReading.objects
+            .filter(well_id__in=well_ids)
+            .in_range(*ranges[HOUR])
+            .annotate(period=_trunc('timestamp', HOUR))
+            .order_by()
+            .values('well_id', 'period')
+            .annotate(**_raw_aggregates())
+        )
+        _upsert(TelemetryRollup, [
+            TelemetryRollup(well_id=row['well_id'], granularity=HOUR, bucket_start=row['period'], **_stats(row))
+            for row in rows
+        ], ['well', 'granularity', 'bucket_start'])
+
+        # Суточные свертки скважин - по часовым
+        day_start, day_end = ranges[DAY]
+        rows = (
+            TelemetryRollup.objects
+            .filter(well_id__in=well_ids, granularity=HOUR, bucket_start__gte=day_start, bucket_start__lt=day_end)
+            .annotate(period=_trunc('bucket_start', DAY))
+            .order_by()
+            .values('well_id', 'period')
+            .annotate(**_combined_aggregates())
+        )
+        _upsert(TelemetryRollup, [
+            TelemetryRollup(well_id=row['well_id'], granularity=DAY, bucket_start=row['period'], **_stats(row))
+            for row in rows
+        ], ['well', 'granularity', 'bucket_start'])
+
+        # Свертки месторождений - по сверткам всех их скважин за те же интервалы
+        fields = Well.objects.filter(id__in=well_ids).values_list('field', flat=True).distinct()
+        schedule_field_rollups(list(fields), start, end)
+
+
+def plan_granularity(start: datetime, end: datetime, points: int, allow_raw: bool = True) -> str:
+    """
+    Самая грубая детализация, дающая не меньше points точек за [start, end).
+    Для месторождений и всего фонда сырые данные не используются (allow_raw=False).
+    """
+    step = (end - start) / max(points, 1)
+    if step >= GRANULARITY_STEP[DAY]:
+        return DAY
+    if step >= GRANULARITY_STEP[HOUR] or not allow_raw:
+        return HOUR
+    return RAW
+
+
+def _to_series(rows) -> Dict[str, np.ndarray]:
+    """Строки (bucket_start, *STAT_FIELDS) -> колоночные массивы NumPy"""
+    rows = list(rows)
+    series = {'timestamps': np.array([int(row[0].timestamp()) for row in rows], dtype=np.int64)}
+    values = np.array([row[1:] for row in rows], dtype=np.float64).reshape(-1, len(STAT_FIELDS))
+    for index, name in enumerate(STAT_FIELDS):
+        series[name] = values[:, index]
+    series['count'] = series['count'].astype(np.int64)
+    return series
+
+
+def load_well_rollup(well: Well, granularity: str, start: datetime, end: datetime) -> Dict[str, np.ndarray]:
+    """Свертка телеметрии скважины за [start, end)"""
+    return _to_series(
+        TelemetryRollup.objects
+        .filter(
+            well=well,
+            granularity=granularity,
+            bucket_start__gte=floor_bucket(start, granularity),
+            bucket_start__lt=end
+        )
+        .order_by('bucket_start')
+        .values_list('bucket_start', *STAT_FIELDS)
+    )
+
+
+def load_field_rollup(
+    field: Optional[str], granularity: str, start: datetime, end: datetime
+) -> Dict[str, np.ndarray]:
+    """Свертка телеметрии месторождения за [start, end); field=None - весь фонд скважин"""
+    queryset = FieldTelemetryRollup.objects.filter(
+        granularity=granularity,
+        bucket_start__gte=floor_bucket(start, granularity),
+        bucket_start__lt=end
+    )
+    if field is not None:
+        rows = queryset.filter(field=field).order_by('bucket_start').values_list('bucket_start', *STAT_FIELDS)
+    else:
+        rows = (
+            queryset
+            .order_by('bucket_start')
+            .values('bucket_start')
+            .annotate(**_combined_aggregates())
+            .values_list('bucket_start', *[f'{AGG}{name}' for name in STAT_FIELDS])
+        )
+    return _to_series(rows)
@@ -0,0 +1,387 @@
+"""
+Адаптивный опрос телеметрии скважин из внешнего API.
+
+WellSyncWorker загружает весь фонд за один проход, поэтому все скважины
+обновляются с одной частотой. Планировщик вместо этого держит для каждой
+скважины свой интервал опроса и очередь (кучу) по времени следующего
+обновления:
+
+- диапазон интервала задается статусом (STATUS_INTERVALS): аварийные
+  скважины опрашиваются каждые полминуты-две, остановленные - раз в час-два;
+- внутри диапазона интервал сокращается вдвое, если последние показания
+  колеблются (коэффициент вариации выше VOLATILE_CV), и растет в 1.5 раза,
+  если они стабильны (ниже STABLE_CV);
+- смена статуса (по списку скважин, он перечитывается раз в
+  WELL_LIST_INTERVAL) ставит скважину в очередь немедленно.
+
+Готовые к обновлению скважины запрашиваются пакетами (один запрос
+телеметрии на batch_size скважин) в пределах общего бюджета запросов к
+внешнему API (RequestBudget). При нехватке бюджета первыми обновляются
+скважины, дольше всех ждущие своей очереди.
+
+Достигнутая свежесть данных - в метриках wells_scheduler_* и в stats().
+"""
+import heapq
+import itertools
+import logging
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from wells.models import Well
+from .external_api_client import ExternalWellDataClient
+from .ingestion import DEFAULT_BATCH_SIZE, DEFAULT_CONCURRENCY, SyncResult, WellSyncWorker, upsert_wells
+from .metrics import (
+    SCHEDULER_BUDGET_EXHAUSTED, SCHEDULER_INTERVAL, SCHEDULER_MAX_STALENESS, SCHEDULER_POLLS, SCHEDULER_REQUESTS,
+    SCHEDULER_STALENESS_SECONDS
+)
+from .rollups import deferred_field_rollups
+from .telemetry import TELEMETRY_PARAMETERS
+
+
+logger = logging.getLogger(__name__)
+
+# Границы интервала опроса по статусу скважины, с: (минимум, максимум)
+STATUS_INTERVALS = {
+    'emergency': (30, 120),
+    'active': (60, 900),
+    'maintenance': (600, 3600),
+    'inactive': (1800, 7200),
+}
+# Интервал при равномерном опросе (adaptive=False) и начальный для active
+BASE_INTERVAL = 300
+# Коэффициент вариации показаний: выше - скважина "живая", ниже - стабильная
+VOLATILE_CV = 0.05
+STABLE_CV = 0.01
+SHORTEN_FACTOR = 0.5
+LENGTHEN_FACTOR = 1.5
+# Неполный пакет дополняется скважинами, чья очередь подойдет в пределах этого времени, с:
+# те же запросы обновляют больше скважин
+COALESCE_SECONDS = 60
+# Повтор после сбоя запроса, с
+RETRY_DELAY = 60
+# Перечитывание списка скважин (статусы, новые и удаленные скважины), с
+WELL_LIST_INTERVAL = 900
+# Страница списка скважин внешнего API: сколько запросов стоит перечитывание
+WELL_LIST_PAGE_SIZE = 100
+# Шаг точек телеметрии во внешнем API, с
+TELEMETRY_STEP = 300
+# Бюджет по умолчанию: запросов к внешнему API в минуту
+DEFAULT_BUDGET_PER_MINUTE = 60
+# Пауза цикла, когда ничего не готово, не более и не менее, с
+MAX_IDLE_SLEEP = 5.0
+MIN_IDLE_SLEEP = 0.01
+
+
+class RequestBudget:
+    """
+    Бюджет запросов к внешнему API (token bucket): per_minute запросов в минуту,
+    не более burst подряд. Списание сверх остатка (charge) уходит в долг,
+    который погашается пополнением.
+    """
+
+    def __init__(self, per_minute: float, burst: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.rate = per_minute / 60
+        self.burst = burst if burst is not None else max(per_minute / 6, 1)
+        self.clock = clock
+        self.tokens = self.burst
+        self.updated = clock()
+        self.spent = 0
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self) -> int:
+        self._refill()
+        return max(0, math.floor(self.tokens))
+
+    def charge(self, count: int = 1) -> None:
+        self._refill()
+        self.tokens -= count
+        self.spent += count
+
+    def wait_time(self) -> float:
+        """Через сколько секунд будет доступен один запрос"""
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+
+@dataclass
+class WellSchedule:
+    """Состояние опроса одной скважины"""
+    well: Well
+    status: str
+    interval: float
+    due: float
+    last_polled: Optional[float] = None
+    volatility: Optional[float] = None
+    polls: int = 0
+
+
+def volatility(telemetry: Dict[str, List]) -> Optional[float]:
+    """Наибольший по параметрам коэффициент вариации (std / |mean|) последних показаний"""
+    ratios = []
+    for name in TELEMETRY_PARAMETERS:
+        values = np.asarray(telemetry.get(name) or [], dtype=np.float64)
+        if len(values) < 2:
+            continue
+        mean = abs(values.mean())
+        ratios.append(values.std() / mean if mean > 1e-9 else 0.0)
+    return max(ratios) if ratios else None
+
+
+class PollingScheduler:
+    """
+    Адаптивный опрос телеметрии (см. описание модуля).
+
+    Использование:
+        scheduler = PollingScheduler(client, RequestBudget(per_minute=60))
+        scheduler.run(duration=3600)
+
+    clock и sleep подменяются для моделирования (бенчмарк scheduler).
+    adaptive=False - равномерный опрос всех скважин раз в BASE_INTERVAL (для сравнения).
+    """
+
+    def __init__(
+            self,
+            client: ExternalWellDataClient,
+            budget: RequestBudget,
+            batch_size: int = DEFAULT_BATCH_SIZE,
+            concurrency: int = DEFAULT_CONCURRENCY,
+            adaptive: bool = True,
+            clock: Callable[[], float] = time.time,
+            sleep: Callable[[float], None] = time.sleep
+    ):
+        self.client = client
+        self.budget = budget
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.adaptive = adaptive
+        self.clock = clock
+        self.sleep = sleep
+        self.writer = WellSyncWorker(client, batch_size=batch_size)
+        self.result = SyncResult()
+        self.wells: Dict[str, WellSchedule] = {}
+        self.started: Optional[float] = None
+        self.list_refreshed: Optional[float] = None
+        # Следующее перечитывание списка скважин (после сбоя - через RETRY_DELAY)
+        self.list_due = float('-inf')
+        # (время, порядковый номер, номер скважины); устаревшие записи пропускаются при извлечении
+        self._queue: List[Tuple[float, int, str]] = []
+        self._sequence = itertools.count()
+
+    def _push(self, schedule: WellSchedule, due: float) -> None:
+        schedule.due = due
+        heapq.heappush(self._queue, (due, next(self._sequence), schedule.well.well_number))
+
+    def initial_interval(self, status: str) -> float:
+        if not self.adaptive:
+            return BASE_INTERVAL
+        low, high = STATUS_INTERVALS.get(status, STATUS_INTERVALS['active'])
+        return min(max(BASE_INTERVAL, low), high)
+
+    def next_interval(self, schedule: WellSchedule) -> float:
+        """Интервал до следующего опроса по статусу и колебаниям последних показаний"""
+        if not self.adaptive:
+            return BASE_INTERVAL
+        low, high = STATUS_INTERVALS.get(schedule.status, STATUS_INTERVALS['active'])
+        interval = schedule.interval
+        if schedule.volatility is not None:
+            if schedule.volatility > VOLATILE_CV:
+                interval *= SHORTEN_FACTOR
+            elif schedule.volatility < STABLE_CV:
+                interval *= LENGTHEN_FACTOR
+        return min(max(interval, low), high)
+
+    def refresh_wells(self) -> None:
+        """Перечитывает список скважин: новые ставит в очередь, удаленные убирает, смена статуса - опрос сразу"""
+        now = self.clock()
+        records = self.client.get_wells_data()
+        pages = max(1, math.ceil(len(records) / WELL_LIST_PAGE_SIZE))
+        self.budget.charge(pages)
+        SCHEDULER_REQUESTS.inc('wells', amount=pages)
+        wells = upsert_wells(records)
+        self.list_refreshed = now
+        self.list_due = now + WELL_LIST_INTERVAL
+
+        for well_number in set(self.wells) - set(wells):
+            del self.wells[well_number]
+        for well_number, well in wells.items():
+            schedule = self.wells.get(well_number)
+            if schedule is None:
+                interval = self.initial_interval(well.status)
+                self.wells[well_number] = schedule = WellSchedule(well, well.status, interval, now)
+                self._push(schedule, now)
+                continue
+            schedule.well = well
+            if well.status != schedule.status:
+                logger.info(f'{well_number}: статус {schedule.status} -> {well.status}, внеочередной опрос')
+                schedule.status = well.status
+                if self.adaptive:
+                    schedule.interval = STATUS_INTERVALS.get(well.status, STATUS_INTERVALS['active'])[0]
+                    self._push(schedule, now)
+
+    def _due_batches(self, now: float, limit: int) -> List[List[WellSchedule]]:
+        """
+        Не более limit пакетов скважин, чья очередь подошла (дольше ждущие - первыми);
+        последний неполный пакет дополняется скважинами, которым скоро в очередь.
+        """
+        batches: List[List[WellSchedule]] = []
+        batch: List[WellSchedule] = []
+        while self._queue and self._queue[0][0] <= now and len(batches) < limit:
+            due, _, well_number = heapq.heappop(self._queue)
+            schedule = self.wells.get(well_number)
+            if schedule is None or schedule.due != due:
+                continue
+            batch.append(schedule)
+            if len(batch) == self.batch_size:
+                batches.append(batch)
+                batch = []
+        while batch and len(batch) < self.batch_size and self._queue and self._queue[0][0] <= now + COALESCE_SECONDS:
+            due, _, well_number = heapq.heappop(self._queue)
+            schedule = self.wells.get(well_number)
+            if schedule is not None and schedule.due == due:
+                batch.append(schedule)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _fetch(self, batch: List[WellSchedule], now: float) -> Dict[str, Dict]:
+        # Окно телеметрии покрывает время с прошлого опроса самой давно обновленной скважины пакета
+        window = max(now - (schedule.last_polled or now - schedule.interval) for schedule in batch)
+        hours = max(1, math.ceil(window / 3600))
+        points = hours * 3600 // TELEMETRY_STEP
+        return self.client.get_wells_telemetry(
+            [schedule.well.well_number for schedule in batch], hours, points, batch_size=len(batch)
+        )
+
+    def step(self) -> int:
+        """Опрашивает скважины, чья очередь подошла, в пределах бюджета; возвращает число обновленных"""
+        now = self.clock()
+        if self.started is None:
+            self.started = now
+        if now >= self.list_due:
+            try:
+                self.refresh_wells()
+            except ConnectionError as e:
+                # Опрос телеметрии продолжается по прежнему списку
+                logger.warning(f'Список скважин не получен, повтор через {RETRY_DELAY} с: {e}')
+                self.budget.charge()
+                SCHEDULER_REQUESTS.inc('wells')
+                self.list_due = now + RETRY_DELAY
+
+        allowed = self.budget.available()
+        batches = self._due_batches(now, allowed)
+        if self._queue and self._queue[0][0] <= now and len(batches) >= allowed:
+            SCHEDULER_BUDGET_EXHAUSTED.inc()
+        if not batches:
+            return 0
+
+        self.budget.charge(len(batches))
+        SCHEDULER_REQUESTS.inc('telemetry', amount=len(batches))
+        polled = 0
+        # Свертки месторождений - один пересчет на шаг, а не на каждый пакет
+        with deferred_field_rollups(), \
+                ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='poll-wells') as pool:
+            futures = [(batch, pool.submit(self._fetch, batch, now)) for batch in batches]
+            for batch, future in futures:
+                try:
+                    telemetry = future.result()
+                except ConnectionError as e:
+                    logger.warning(f'Телеметрия {len(batch)} скважин ({batch[0].well.well_number}...) не получена: {e}')
+                    for schedule in batch:
+                        self._push(schedule, now + min(RETRY_DELAY, schedule.interval))
+                    continue
+                polled += self._apply(batch, telemetry, now)
+        return polled
+
+    def _apply(self, batch: List[WellSchedule], telemetry: Dict[str, Dict], now: float) -> int:
+        """Записывает полученную телеметрию и планирует следующий опрос скважин пакета"""
+        received = []
+        for schedule in batch:
+            data = telemetry.get(schedule.well.well_number)
+            if data and data['timestamps']:
+                received.append((schedule.well, data))
+                schedule.volatility = volatility(data)
+                SCHEDULER_STALENESS_SECONDS.observe(now - (schedule.last_polled or self.started), schedule.status)
+                SCHEDULER_POLLS.inc(schedule.status)
+                schedule.last_polled = now
+                schedule.polls += 1
+            schedule.interval = self.next_interval(schedule)
+            self._push(schedule, now + schedule.interval)
+        if received:
+            self.writer.flush(received, self.result)
+        return len(received)
+
+    def run(self, duration: Optional[float] = None, report_every: float = 60) -> SyncResult:
+        """Цикл опроса (duration секунд или бесконечно); раз в report_every секунд пишет сводку в лог"""
+        started = self.clock()
+        reported = started
+        while duration is None or self.clock() - started < duration:
+            self.step()
+            now = self.clock()
+            if now - reported >= report_every:
+                reported = now
+                stats = self.stats()
+                logger.info(f"Опрос скважин: {stats['polls']} обновлений, {self.budget.spent} запросов; "
+                            f"возраст данных по статусам: {stats['statuses']}")
+            waits = [MAX_IDLE_SLEEP]
+            if self._queue:
+                # Очередь подошла - ждем пополнения бюджета, иначе - ближайшего срока
+                due = self._queue[0][0]
+                waits.append(self.budget.wait_time() if due <= now else due - now)
+            if duration is not None:
+                waits.append(max(0.0, started + duration - now))
+            delay = min(waits)
+            if delay > 0:
+                # Бюджет пополняется дробно: без нижней границы цикл крутился бы микропаузами
+                self.sleep(max(delay, MIN_IDLE_SLEEP))
+        self.result.elapsed = self.clock() - started
+        return self.result
+
+    def staleness(self) -> Dict[str, float]:
+        """Возраст данных каждой скважины сейчас, с (никогда не опрошенные - с запуска)"""
+        now = self.clock()
+        return {
+            well_number: now - (schedule.last_polled if schedule.last_polled is not None else self.started or now)
+            for well_number, schedule in self.wells.items()
+        }
+
+    def stats(self, top: int = 10) -> Dict:
+        """Сводка по статусам (интервал, возраст данных p50/p95/max) и самые устаревшие скважины"""
+        ages = self.staleness()
+        by_status: Dict[str, List[WellSchedule]] = {}
+        for schedule in self.wells.values():
+            by_status.setdefault(schedule.status, []).append(schedule)
+
+        statuses = {}
+        for status, schedules in sorted(by_status.items()):
+            values = np.array([ages[schedule.well.well_number] for schedule in schedules])
+            intervals = [schedule.interval for schedule in schedules]
+            statuses[status] = {
+                'wells': len(schedules),
+                'interval_s': round(float(np.mean(intervals)), 1),
+                'staleness_p50_s': round(float(np.percentile(values, 50)), 1),
+                'staleness_p95_s': round(float(np.percentile(values, 95)), 1),
+                'staleness_max_s': round(float(values.max()), 1),
+            }
+            SCHEDULER_MAX_STALENESS.set(statuses[status]['staleness_max_s'], status)
+            SCHEDULER_INTERVAL.set(statuses[status]['interval_s'], status)
+
+        stalest = sorted(ages.items(), key=lambda item: item[1], reverse=True)[:top]
+        return {
+            'wells': len(self.wells),
+            'polls': sum(schedule.polls for schedule in self.wells.values()),
+            'requests': self.budget.spent,
+            'statuses': statuses,
+            'stalest': [
+                {'well_id': well_number, 'status': self.wells[well_number].status, 'staleness_s': round(age, 1)}
+                for well_number, age in stalest
+            ],
+        }
@@ -0,0 +1,272 @@
+"""
+Хранилище истории телеметрии скважин.
+
+Внешнее API отдаёт телеметрию в колоночном виде:
+    {"timestamps": [...], "temperature": [...], "pressure": [...], "flow_rate": [...]}
+Здесь этот формат разворачивается в строки TelemetryReading и пишется
+пачками через bulk_create, а при чтении собирается обратно в колонки.
+Старая история хранится сжатыми блоками (см. compression), самая старая -
+в файлах на диске (см. cold_storage); чтение объединяет все три уровня.
+"""
+import csv
+import heapq
+from datetime import datetime, timezone as dt_timezone
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from django.db import transaction
+
+from wells.models import TelemetryReading, Well, telemetry_bucket
+from .cold_storage import load_cold, thaw_cold
+from .compression import concat_series, load_blocks, unpack_blocks
+from .rollups import HOUR, GRANULARITY_STEP, floor_bucket, refresh_rollups
+
+
+# Параметры телеметрии в порядке колонок
+TELEMETRY_PARAMETERS = ('temperature', 'pressure', 'flow_rate')
+TELEMETRY_UNITS = {'temperature': '°C', 'pressure': 'атм', 'flow_rate': 'м³/сут'}
+
+# Размер пачки для bulk_create: укладывается в лимит параметров SQLite
+# (6 колонок × 5000 строк) и не раздувает память при больших загрузках
+INGEST_CHUNK_SIZE = 5000
+READ_CHUNK_SIZE = 10000
+
+
+def _iter_readings(well: Well, telemetry: Dict[str, List]) -> Iterator[TelemetryReading]:
+    """Разворачивает колоночную телеметрию одной скважины в строки"""
+    columns = zip(
+        telemetry['timestamps'],
+        telemetry['temperature'],
+        telemetry['pressure'],
+        telemetry['flow_rate'],
+    )
+    for ts, temperature, pressure, flow_rate in columns:
+        timestamp = datetime.fromtimestamp(ts, tz=dt_timezone.utc)
+        yield TelemetryReading(
+            well_id=well.pk,
+            timestamp=timestamp,
+            bucket=telemetry_bucket(timestamp),
+            temperature=temperature,
+            pressure=pressure,
+            flow_rate=flow_rate,
+        )
+
+
+def ingest_telemetry_batch(
+    items: Iterable[Tuple[Well, Dict[str, List]]],
+    chunk_size: int = INGEST_CHUNK_SIZE
+) -> int:
+    """
+    Сохраняет телеметрию нескольких скважин одной транзакцией.
+
+    Args:
+        items: Пары (скважина, телеметрия в формате внешнего API)
+        chunk_size: Количество строк в одном INSERT
+
+    Returns:
+        Количество переданных на запись показаний.
+        Повторно загруженные точки (та же скважина и время) пропускаются.
+        Свертки (часовые и суточные) пересчитываются для затронутых интервалов.
+    """
+    items = [(well, telemetry) for well, telemetry in items if telemetry['timestamps']]
+    if not items:
+        return 0
+    well_ids = [well.pk for well, _ in items]
+    start = datetime.fromtimestamp(min(min(telemetry['timestamps']) for _, telemetry in items), tz=dt_timezone.utc)
+    end = datetime.fromtimestamp(max(max(telemetry['timestamps']) for _, telemetry in items), tz=dt_timezone.utc)
+    readings = (
+        reading
+        for well, telemetry in items
+        for reading in _iter_readings(well, telemetry)
+    )
+    total = 0
+    with transaction.atomic():
+        # Поздние показания в уже упакованный интервал: часовые свертки считаются
+        # по строкам, поэтому затронутые часы целиком возвращаются в строки
+        hours = (floor_bucket(start, HOUR), floor_bucket(end, HOUR) + GRANULARITY_STEP[HOUR])
+        unpack_blocks(well_ids, *hours)
+        thaw_cold(well_ids, *hours)
+        while True:
+            chunk = list(islice(readings, chunk_size))
+            if not chunk:
+                break
+            TelemetryReading.objects.bulk_create(chunk, ignore_conflicts=True)
+            total += len(chunk)
+
+        refresh_rollups(well_ids, start, end)
+    return total
+
+
+def ingest_telemetry(well: Well, telemetry: Dict[str, List], chunk_size: int = INGEST_CHUNK_SIZE) -> int:
+    """Сохраняет телеметрию одной скважины (см. ingest_telemetry_batch)"""
+    return ingest_telemetry_batch([(well, telemetry)], chunk_size=chunk_size)
+
+
+def _load_archive(
+    well_ids: List[int],
+    start: Optional[datetime],
+    end: Optional[datetime]
+) -> Dict[int, Dict[str, np.ndarray]]:
+    """Холодная история и сжатые блоки скважин за [start, end), только для скважин с данными"""
+    archive = load_cold(well_ids, start, end)
+    for well_id, series in load_blocks(well_ids, start, end).items():
+        archive[well_id] = concat_series([archive.get(well_id, _empty_series()), series])
+    return archive
+
+
+def load_series(
+    well: Well,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Читает историю телеметрии скважины за период [start, end) в массивы NumPy:
+    строки, сжатые блоки и холодные файлы, пересекающие период.
+
+    Returns:
+        {"timestamps": int64 (unix-время, с), "temperature"/"pressure"/"flow_rate": float64}
+    """
+    rows = (
+        TelemetryReading.objects
+        .filter(well=well)
+        .in_range(start, end)
+        .order_by('timestamp')
+        .values_list('timestamp', *TELEMETRY_PARAMETERS)
+    )
+    timestamps = []
+    values = []
+    for timestamp, *row in rows.iterator(chunk_size=READ_CHUNK_SIZE):
+        timestamps.append(timestamp.timestamp())
+        values.append(row)
+
+    columns = np.array(values, dtype=np.float64).reshape(-1, len(TELEMETRY_PARAMETERS))
+    series = {'timestamps': np.array(timestamps, dtype=np.int64)}
+    for index, name in enumerate(TELEMETRY_PARAMETERS):
+        series[name] = columns[:, index]
+    archive = _load_archive([well.pk], start, end).get(well.pk)
+    if archive is None:
+        return series
+    return concat_series([archive, series])
+
+
+def _empty_series() -> Dict[str, np.ndarray]:
+    series = {'timestamps': np.empty(0, dtype=np.int64)}
+    for name in TELEMETRY_PARAMETERS:
+        series[name] = np.empty(0, dtype=np.float64)
+    return series
+
+
+def load_series_batch(
+    well_ids: Iterable[int],
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+) -> Dict[int, Dict[str, np.ndarray]]:
+    """
+    Читает историю телеметрии нескольких скважин одним запросом
+    (в порядке уникального индекса well, timestamp) и делит результат по скважинам.
+    Сжатые блоки читаются вторым запросом, холодные файлы - с диска;
+    все объединяется со строками.
+
+    Returns:
+        {id скважины: ряды в формате load_series}; скважины без данных - пустые ряды
+    """
+    well_ids = list(well_ids)
+    rows = (
+        TelemetryReading.objects
+        .filter(well_id__in=well_ids)
+        .in_range(start, end)
+        .order_by('well_id', 'timestamp')
+        .values_list('well_id', 'timestamp', *TELEMETRY_PARAMETERS)
+    )
+    owners = []
+    timestamps = []
+    values = []
+    for well_id, timestamp, *row in rows.iterator(chunk_size=READ_CHUNK_SIZE):
+        owners.append(well_id)
+        timestamps.append(timestamp.timestamp())
+        values.append(row)
+
+    result = {well_id: _empty_series() for well_id in well_ids}
+    result.update(_load_archive(well_ids, start, end))
+    if not owners:
+        return result
+
+    owners = np.array(owners, dtype=np.int64)
+    timestamps = np.array(timestamps, dtype=np.int64)
+    columns = np.array(values, dtype=np.float64)
+    # Строки отсортированы по скважине: границы групп - места смены well_id
+    starts = np.flatnonzero(np.r_[True, owners[1:] != owners[:-1]])
+    stops = np.r_[starts[1:], len(owners)]
+    for first, last in zip(starts, stops):
+        series = {'timestamps': timestamps[first:last]}
+        for index, name in enumerate(TELEMETRY_PARAMETERS):
+            series[name] = columns[first:last, index]
+        well_id = int(owners[first])
+        result[well_id] = concat_series([result[well_id], series])
+    return result
+
+
+def series_to_lists(series: Dict[str, np.ndarray]) -> Dict[str, List]:
+    """Массивы NumPy -> колоночный словарь списков для JSON-ответа"""
+    return {name: values.tolist() for name, values in series.items()}
+
+
+def read_telemetry(
+    well: Well,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+) -> Dict[str, List]:
+    """
+    Читает историю телеметрии скважины за период [start, end).
+
+    Returns:
+        Колоночный словарь в формате внешнего API, timestamps - unix-время в секундах
+    """
+    return series_to_lists(load_series(well, start, end))
+
+
+class _Echo:
+    """Псевдофайл для csv.writer: возвращает записанную строку вместо буферизации"""
+
+    def write(self, value):
+        return value
+
+
+def iter_telemetry_csv(
+    well: Well,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    chunk_size: int = READ_CHUNK_SIZE
+) -> Iterator[str]:
+    """
+    История телеметрии скважины в CSV, частями по chunk_size строк.
+    Строки читаются серверным итератором и не накапливаются в памяти;
+    точки сжатых блоков и холодных файлов сливаются с ними по времени.
+    """
+    writer = csv.writer(_Echo())
+    yield writer.writerow(('timestamp',) + TELEMETRY_PARAMETERS)
+
+    rows = (
+        TelemetryReading.objects
+        .filter(well=well)
+        .in_range(start, end)
+        .order_by('timestamp')
+        .values_list('timestamp', *TELEMETRY_PARAMETERS)
+        .iterator(chunk_size=chunk_size)
+    )
+    archive = _load_archive([well.pk], start, end).get(well.pk)
+    if archive is not None:
+        packed = zip(
+            (datetime.fromtimestamp(ts, tz=dt_timezone.utc) for ts in archive['timestamps'].tolist()),
+            *(archive[name].tolist() for name in TELEMETRY_PARAMETERS)
+        )
+        rows = heapq.merge(packed, rows, key=lambda row: row[0])
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        yield ''.join(
+            writer.writerow((timestamp.astimezone(dt_timezone.utc).isoformat(), *values))
+            for timestamp, *values in chunk
+        )
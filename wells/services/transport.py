@@ -0,0 +1,368 @@
+"""
+HTTP-транспорт для обращений к внешнему API.
+
+- пул keep-alive соединений, общий для всех транспортов одного хоста;
+- повторы с экспоненциальной задержкой и случайным разбросом (full jitter);
+- бюджет повторов: доля повторов ограничена относительно числа запросов,
+  чтобы при деградации внешнего API не умножать на него нагрузку;
+- соблюдение заголовка Retry-After;
+- автоматический выключатель (circuit breaker): после серии ошибок запросы
+  сразу завершаются ошибкой, пока не истечет время восстановления.
+"""
+import http.client
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+try:
+    from .metrics import (
+        UPSTREAM_FAILURES, UPSTREAM_REQUEST_SECONDS, UPSTREAM_RETRIES, upstream_endpoint, upstream_outcome
+    )
+except ImportError:  # запуск external_api_client.py напрямую
+    from metrics import (
+        UPSTREAM_FAILURES, UPSTREAM_REQUEST_SECONDS, UPSTREAM_RETRIES, upstream_endpoint, upstream_outcome
+    )
+
+
+logger = logging.getLogger(__name__)
+
+# Ошибки, после которых соединение из пула могло быть закрыто сервером
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError)
+
+
+class TransportError(ConnectionError):
+    """Запрос к внешнему API завершился ошибкой"""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class CircuitOpenError(TransportError):
+    """Выключатель разомкнут: внешнее API считается недоступным"""
+
+
+@dataclass
+class Response:
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+
+
+@dataclass
+class RetryPolicy:
+    """Параметры повторов запроса"""
+    max_retries: int = 3
+    backoff_base: float = 0.2
+    backoff_max: float = 5.0
+    # Если сервер просит подождать дольше, повтор бессмысленен - сразу ошибка
+    max_retry_after: float = 10.0
+    retry_statuses: Tuple[int, ...] = (429, 500, 502, 503, 504)
+
+    def backoff(self, attempt: int) -> float:
+        """Задержка перед повтором номер attempt (с нуля), full jitter"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+
+class RetryBudget:
+    """
+    Бюджет повторов (token bucket).
+    Каждый запрос пополняет бюджет на ratio, каждый повтор расходует единицу.
+    Дополнительно бюджет пополняется на min_per_second в секунду, чтобы
+    при малом трафике повторы оставались возможны.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_per_second: float = 1.0, capacity: float = 10.0):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, amount: float) -> None:
+        now = time.monotonic()
+        amount += (now - self._updated) * self.min_per_second
+        self._updated = now
+        self._tokens = min(self.capacity, self._tokens + amount)
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._refill(self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            self._refill(0)
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class CircuitBreaker:
+    """
+    Автоматический выключатель.
+    closed - запросы проходят; после failure_threshold ошибок подряд -> open.
+    open - запросы сразу отклоняются; через reset_timeout -> half_open.
+    half_open - проходит один пробный запрос: успех -> closed, ошибка -> open.
+    """
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_request(self) -> None:
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    raise CircuitOpenError('Внешнее API недоступно (выключатель разомкнут)')
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN:
+                if self._probe_in_flight:
+                    raise CircuitOpenError('Внешнее API недоступно (идет пробный запрос)')
+                self._probe_in_flight = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning('Выключатель внешнего API разомкнут')
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+
+class ConnectionPool:
+    """Пул keep-alive соединений к одному хосту"""
+
+    def __init__(self, scheme: str, host: str, port: Optional[int], maxsize: int = 10):
+        self.connection_class = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+        self.host = host
+        self.port = port
+        self.maxsize = maxsize
+        self._idle: List[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: float) -> Tuple[http.client.HTTPConnection, bool]:
+        """Возвращает (соединение, взято ли оно из пула повторно)"""
+        with self._lock:
+            if self._idle:
+                connection = self._idle.pop()
+                connection.timeout = timeout
+                if connection.sock is not None:
+                    connection.sock.settimeout(timeout)
+                return connection, True
+        return self.connection_class(self.host, self.port, timeout=timeout), False
+
+    def release(self, connection: http.client.HTTPConnection) -> None:
+        with self._lock:
+            if len(self._idle) < self.maxsize:
+                self._idle.append(connection)
+                return
+        connection.close()
+
+    def clear(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+
+_pools: Dict[Tuple[str, str, Optional[int]], ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(scheme: str, host: str, port: Optional[int], maxsize: int = 10) -> ConnectionPool:
+    """Общий пул соединений для хоста"""
+    key = (scheme, host, port)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(scheme, host, port, maxsize=maxsize)
+        return _pools[key]
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Значение Retry-After в секундах (число секунд или HTTP-дата)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_delay(
+        retry: RetryPolicy,
+        budget: RetryBudget,
+        message: str,
+        attempt: int,
+        status: Optional[int],
+        retry_after: Optional[float]
+) -> float:
+    """
+    Задержка перед повтором номер attempt неудачного запроса.
+
+    Raises:
+        TransportError: Если повторять нельзя (повторы или бюджет исчерпаны, Retry-After слишком велик)
+    """
+    if attempt >= retry.max_retries:
+        raise TransportError(f"{message} (повторы исчерпаны)", status=status)
+    if retry_after is not None and retry_after > retry.max_retry_after:
+        raise TransportError(f"{message} (Retry-After {retry_after:.0f} с)", status=status)
+    if not budget.withdraw():
+        raise TransportError(f"{message} (бюджет повторов исчерпан)", status=status)
+
+    delay = max(retry.backoff(attempt), retry_after or 0)
+    logger.info(f"{message}, повтор через {delay:.2f} с")
+    return delay
+
+
+class RequestMetrics:
+    """Метрики одного запроса к внешнему API: время попыток, повторы, итоговая ошибка"""
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.endpoint = upstream_endpoint(path)
+        self._started = 0.0
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+
+    def attempt(self, status: Optional[int]) -> None:
+        UPSTREAM_REQUEST_SECONDS.observe(
+            time.perf_counter() - self._started, self.endpoint, self.method, upstream_outcome(status)
+        )
+
+    def retried(self) -> None:
+        UPSTREAM_RETRIES.inc(self.endpoint)
+
+    def failed(self, reason: str) -> None:
+        UPSTREAM_FAILURES.inc(self.endpoint, reason)
+
+
+class HTTPTransport:
+    """
+    Выполняет запросы к внешнему API через общий пул соединений
+    с повторами, бюджетом повторов и автоматическим выключателем.
+
+    Использование:
+        transport = HTTPTransport("http://127.0.0.1:8000/mock-external/api/v1")
+        response = transport.request("GET", "/wells/")
+    """
+
+    def __init__(
+            self,
+            base_url: str,
+            headers: Optional[Dict[str, str]] = None,
+            timeout: float = 30,
+            pool_size: int = 10,
+            retry: Optional[RetryPolicy] = None,
+            budget: Optional[RetryBudget] = None,
+            breaker: Optional[CircuitBreaker] = None,
+            sleep: Callable[[float], None] = time.sleep
+    ):
+        parts = urlsplit(base_url)
+        self.base_path = parts.path.rstrip('/')
+        self.headers = {'Connection': 'keep-alive', **(headers or {})}
+        self.timeout = timeout
+        self.pool = get_pool(parts.scheme, parts.hostname, parts.port, maxsize=pool_size)
+        self.host_header = parts.netloc
+        self.retry = retry or RetryPolicy()
+        self.budget = budget or RetryBudget()
+        self.breaker = breaker or CircuitBreaker()
+        self.sleep = sleep
+
+    def _send(self, method: str, url: str) -> Response:
+        """Один HTTP-обмен через пул; соединение возвращается в пул, если его можно переиспользовать"""
+        connection, reused = self.pool.acquire(self.timeout)
+        try:
+            connection.request(method, url, headers={'Host': self.host_header, **self.headers})
+            raw = connection.getresponse()
+            body = raw.read()
+        except STALE_CONNECTION_ERRORS:
+            connection.close()
+            if not reused:
+                raise
+            # Сервер закрыл простаивающее соединение - это не сбой API
+            return self._send(method, url)
+        except BaseException:
+            connection.close()
+            raise
+
+        if raw.will_close:
+            connection.close()
+        else:
+            self.pool.release(connection)
+        return Response(status=raw.status, headers={k.lower(): v for k, v in raw.getheaders()}, body=body)
+
+    def request(self, method: str, path: str, params: Optional[Dict] = None) -> Response:
+        """
+        Выполняет запрос с повторами.
+
+        Returns:
+            Ответ с любым статусом, кроме повторяемых (см. RetryPolicy.retry_statuses)
+
+        Raises:
+            CircuitOpenError: Если выключатель разомкнут
+            TransportError: Если запрос не удался после всех допустимых повторов
+        """
+        url = f"{self.base_path}{path}"
+        if params:
+            url = f"{url}?{urlencode(params)}"
+
+        metrics = RequestMetrics(method, path)
+        self.budget.deposit()
+        attempt = 0
+        while True:
+            try:
+                self.breaker.before_request()
+            except CircuitOpenError:
+                metrics.failed('circuit_open')
+                raise
+            retry_after = None
+            metrics.start()
+            try:
+                response = self._send(method, url)
+            except (OSError, http.client.HTTPException) as e:
+                status, error = None, f"{type(e).__name__}: {e}"
+            else:
+                status = response.status
+                if status not in self.retry.retry_statuses:
+                    metrics.attempt(status)
+                    self.breaker.record_success()
+                    return response
+                error = f"HTTP {status}"
+                retry_after = parse_retry_after(response.headers.get('retry-after'))
+            metrics.attempt(status)
+
+            self.breaker.record_failure()
+            try:
+                delay = retry_delay(self.retry, self.budget, f"{method} {path}: {error}", attempt, status, retry_after)
+            except TransportError:
+                metrics.failed('retries_exhausted')
+                raise
+            metrics.retried()
+            self.sleep(delay)
+            attempt += 1
@@ -0,0 +1,81 @@
+from django.db.backends.signals import connection_created
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .cache import invalidate_wells
+from .instrumentation import install_query_counter
+from .models import Well, WellTombstone
+from .services.cold_storage import drop_cold
+from .services.rollups import refresh_moved_wells, schedule_field_rollups, well_rollup_range
+
+
+@receiver(post_save, sender=Well)
+@receiver(post_delete, sender=Well)
+def invalidate_well_cache(sender, instance, **kwargs):
+    invalidate_wells([instance.pk])
+
+
+@receiver(post_delete, sender=Well)
+def record_well_tombstone(sender, instance, **kwargs):
+    # Удаление через QuerySet.delete() тоже отправляет post_delete по каждой скважине
+    WellTombstone.objects.create(well_id=instance.pk, well_number=instance.well_number)
+
+
+@receiver(post_delete, sender=Well)
+def drop_cold_telemetry(sender, instance, **kwargs):
+    # Строки и блоки удаляет каскад, файлы холодного хранилища - после фиксации удаления
+    well_id = instance.pk
+    transaction.on_commit(lambda: drop_cold(well_id))
+
+
+@receiver(post_save, sender=Well)
+def refresh_moved_well_rollups(sender, instance, created, update_fields=None, **kwargs):
+    previous = getattr(instance, '_loaded_field', None)
+    if created or previous is None or previous == instance.field:
+        return
+    if update_fields is not None and 'field' not in update_fields:
+        return
+    # Свертки скважины переходят к новому месторождению: пересчитываются оба
+    refresh_moved_wells([instance.pk], [previous, instance.field])
+    instance._loaded_field = instance.field
+
+
+@receiver(pre_delete, sender=Well)
+def remember_rollup_range(sender, instance, **kwargs):
+    # Свертки скважины удалит каскад: интервал для пересчета месторождения запоминается до него
+    instance._rollup_range = well_rollup_range([instance.pk])
+
+
+@receiver(post_delete, sender=Well)
+def refresh_deleted_well_rollups(sender, instance, **kwargs):
+    bounds = getattr(instance, '_rollup_range', None)
+    if bounds is not None:
+        schedule_field_rollups([instance.field], *bounds)
+
+
+# PRAGMA для SQLite (профиль разработки): WAL позволяет читать во время записи,
+# synchronous=NORMAL в режиме WAL безопасен и заметно ускоряет фиксацию транзакций
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA busy_timeout=20000',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-20000',
+    'PRAGMA mmap_size=134217728',
+)
+
+
+@receiver(connection_created)
+def count_request_queries(sender, connection, **kwargs):
+    # Запросы к БД в метриках HTTP-запросов (см. wells.instrumentation)
+    install_query_counter(connection)
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
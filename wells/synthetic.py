@@ -0,0 +1,228 @@
+"""
+Синтетические данные для бенчмарков (python manage.py bench) и ручного
+профилирования: фонд скважин и история телеметрии заданного размера.
+
+Строки собираются колонками NumPy и пишутся executemany в обход моделей:
+1 млн скважин - десятки секунд вместо десятков минут через bulk_create
+экземпляров. Сигналы и auto_now при этом не срабатывают - время изменения
+и geohash выставляются явно.
+
+Значения детерминированы номером строки: повторный запуск дает те же
+данные, и результаты бенчмарков сравнимы между запусками.
+"""
+import time
+from datetime import datetime, timezone as dt_timezone
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+from django.db import connection, transaction
+from django.utils import timezone
+
+from mock_external_api.views import MockConfig, generate_mock_well, well_telemetry_data
+
+from .geohash import encode_many
+from .models import TelemetryReading, Well
+from .services.rollups import refresh_rollups
+
+
+# Типовые размеры фонда: --scale команды bench
+FLEET_SIZES = {'1k': 1_000, '100k': 100_000, '1m': 1_000_000}
+
+FIELD_NAMES = ('Северное', 'Южное', 'Западное')
+STATUS_CYCLE = ('active', 'active', 'active', 'maintenance', 'inactive')
+TELEMETRY_STEP = 300
+
+# Строк в одном executemany: ограничивает память при генерации миллионов строк
+INSERT_CHUNK_SIZE = 20_000
+
+
+def bench_well_number(index: int) -> str:
+    return f'BENCH-{index:07d}'
+
+
+def _insert(model, columns: Sequence[str], rows: Iterator[tuple]) -> int:
+    """Пишет строки в таблицу модели пачками INSERT (executemany); возвращает число строк"""
+    table = connection.ops.quote_name(model._meta.db_table)
+    names = ', '.join(connection.ops.quote_name(model._meta.get_field(name).column) for name in columns)
+    placeholders = ', '.join(['%s'] * len(columns))
+    sql = f'INSERT INTO {table} ({names}) VALUES ({placeholders})'
+    total = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= INSERT_CHUNK_SIZE:
+                cursor.executemany(sql, chunk)
+                total += len(chunk)
+                chunk = []
+        if chunk:
+            cursor.executemany(sql, chunk)
+            total += len(chunk)
+    return total
+
+
+def _well_rows(first: int, count: int, updated) -> Iterator[tuple]:
+    for start in range(first, first + count, INSERT_CHUNK_SIZE):
+        i = np.arange(start, min(start + INSERT_CHUNK_SIZE, first + count))
+        latitude = 55 + (i % 1000) / 1000
+        longitude = 37 + (i // 1000 % 1000) / 1000
+        yield from zip(
+            [bench_well_number(index) for index in i.tolist()],
+            [FIELD_NAMES[index] for index in (i % 3).tolist()],
+            latitude.tolist(),
+            longitude.tolist(),
+            encode_many(latitude, longitude),
+            (2000 + i % 1500).astype(float).tolist(),
+            [STATUS_CYCLE[index] for index in (i % 5).tolist()],
+            (30 + i % 25).astype(float).tolist(),
+            (50 + i % 150).astype(float).tolist(),
+            (80 + i % 25).astype(float).tolist(),
+            [updated] * len(i),
+        )
+
+
+def create_wells(count: int) -> int:
+    """
+    Создает count скважин с номерами BENCH-0000000..., продолжая нумерацию.
+    Месторождение, статус и показания циклически повторяются по номеру
+    (на них рассчитаны выборки бенчмарка filters), координаты - сетка
+    1000×1000 точек с шагом 0.001° от (55, 37).
+    """
+    first = Well.objects.count()
+    updated = connection.ops.adapt_datetimefield_value(timezone.now())
+    columns = [
+        'well_number', 'field', 'latitude', 'longitude', 'geohash', 'depth', 'status',
+        'current_pressure', 'measured_flow_rate', 'temperature', 'last_data_update',
+    ]
+    return _insert(Well, columns, _well_rows(first, count, updated))
+
+
+def ensure_wells(count: int) -> None:
+    """Дополняет фонд синтетическими скважинами до count"""
+    existing = Well.objects.count()
+    if existing < count:
+        create_wells(count - existing)
+
+
+def _telemetry_rows(well_ids: List[int], timestamps: np.ndarray, seed: int) -> Iterator[tuple]:
+    adapt = connection.ops.adapt_datetimefield_value
+    moments = [adapt(datetime.fromtimestamp(ts, tz=dt_timezone.utc)) for ts in timestamps.tolist()]
+    # Месяц ГГГГММ (см. telemetry_bucket) по всем меткам сразу
+    months = timestamps.astype('datetime64[s]').astype('datetime64[M]').astype(np.int64)
+    buckets = ((1970 + months // 12) * 100 + months % 12 + 1).tolist()
+    points = len(timestamps)
+    for well_id in well_ids:
+        rng = np.random.default_rng([seed, well_id])
+        noise = rng.normal(0, 1, (3, points)).round(1)
+        yield from zip(
+            [well_id] * points,
+            moments,
+            buckets,
+            (85 + noise[0]).tolist(),
+            (40 + noise[1] * 0.5).tolist(),
+            (120 + noise[2] * 3).tolist(),
+        )
+
+
+def create_telemetry(
+        well_ids: Sequence[int],
+        points: int,
+        step: int = TELEMETRY_STEP,
+        end: Optional[datetime] = None,
+        seed: int = 0,
+        rollups: bool = True
+) -> int:
+    """
+    Пишет каждой скважине points показаний с шагом step секунд, заканчивая
+    моментом end (по умолчанию - текущий, выровненный по шагу). Уровни постоянны,
+    шум детерминирован по seed и id скважины. rollups - пересчитать свертки.
+    Возвращает число записанных показаний.
+    """
+    end_ts = int((end or timezone.now()).timestamp()) // step * step
+    timestamps = np.arange(end_ts - (points - 1) * step, end_ts + 1, step, dtype=np.int64)
+    columns = ['well', 'timestamp', 'bucket', 'temperature', 'pressure', 'flow_rate']
+    total = _insert(TelemetryReading, columns, _telemetry_rows(list(well_ids), timestamps, seed))
+    if rollups and total:
+        refresh_rollups(
+            well_ids,
+            datetime.fromtimestamp(int(timestamps[0]), tz=dt_timezone.utc),
+            datetime.fromtimestamp(int(timestamps[-1]), tz=dt_timezone.utc),
+        )
+    return total
+
+
+def telemetry_payload(points: int, start: int, step: int = TELEMETRY_STEP, seed: int = 0) -> Dict[str, List]:
+    """Колоночная телеметрия в формате внешнего API: шум вокруг постоянных уровней"""
+    rng = np.random.default_rng(seed)
+    return {
+        'timestamps': list(range(start, start + points * step, step)),
+        'temperature': rng.normal(85, 1, points).round(1).tolist(),
+        'pressure': rng.normal(40, 0.5, points).round(1).tolist(),
+        'flow_rate': rng.normal(120, 3, points).round(1).tolist(),
+    }
+
+
+class SyntheticExternalClient:
+    """
+    Внешнее API без сети: те же данные, что у mock_external_api в режиме
+    нагрузки (load_test), но без задержек и сбоев. Подставляется в
+    WellSyncWorker вместо ExternalWellDataClient - бенчмарк синхронизации
+    измеряет разбор и запись, а не ожидание ответов.
+
+    emergency_every=N - каждая N-я скважина аварийная, с сильными колебаниями
+    показаний (для бенчмарка планировщика опроса). requests - число вызовов API.
+    """
+
+    def __init__(self, fleet_size: int, seed: int = 42, emergency_every: int = 0):
+        self.config = MockConfig(
+            load_test=True, fleet_size=fleet_size, seed=seed,
+            latency=False, failure_rate=0.0, page_size=fleet_size
+        )
+        self.emergency_every = emergency_every
+        self.requests = 0
+
+    def is_emergency(self, number: int) -> bool:
+        return bool(self.emergency_every) and number % self.emergency_every == 0
+
+    def get_wells_data(self) -> List[Dict]:
+        self.requests += 1
+        wells = []
+        for number in range(1, self.config.fleet_size + 1):
+            well = generate_mock_well(number, self.config.well_rng(number), deterministic=True)
+            if self.is_emergency(number):
+                well['status'] = 'emergency'
+            wells.append(well)
+        return wells
+
+    def get_wells_telemetry(
+            self, well_ids: List[str], hours: int = 24, points: int = 100, batch_size: Optional[int] = None
+    ) -> Dict[str, Dict]:
+        self.requests += 1
+        result = {}
+        for well_id in well_ids:
+            number = int(well_id.split('-')[1])
+            telemetry = well_telemetry_data(self.config, number, hours, points)
+            if self.is_emergency(number):
+                for name in ('temperature', 'pressure', 'flow_rate'):
+                    values = np.asarray(telemetry[name])
+                    telemetry[name] = np.round(values.mean() + (values - values.mean()) * 10, 1).tolist()
+            result[well_id] = telemetry
+        return result
+
+
+def external_records(count: int, seed: int = 42) -> List[Dict]:
+    """Записи скважин в формате внешнего API (для массовой синхронизации)"""
+    return SyntheticExternalClient(count, seed).get_wells_data()
+
+
+class VirtualClock:
+    """Модельное время (для PollingScheduler): sleep сдвигает часы без ожидания"""
+
+    def __init__(self, start: Optional[float] = None):
+        self.now = start if start is not None else time.time()
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
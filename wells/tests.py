@@ -1,3 +1,1439 @@
-from django.test import TestCase
+import asyncio
+import json
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Sum
+from django.http import HttpResponse
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+import httpx
+import numpy as np
+from rest_framework.renderers import JSONRenderer
+
+from .async_views import EVENTS_RETRY_MS
+from .filters import prefix_upper_bound
+from .models import (
+    FieldTelemetryRollup, Recommendation, TelemetryBlock, TelemetryReading, TelemetryRollup, Well, telemetry_bucket
+)
+from .serializers import WellSerializer
+from .instrumentation import MetricsMiddleware
+from .services.metrics import HTTP_DB_QUERIES, HTTP_REQUEST_SECONDS, upstream_endpoint
+from .services.cold_storage import tier_telemetry
+from .services.geo import haversine_km, nearest, radius_bbox, within_radius
+from .services.compression import compact_telemetry, decode_block, encode_block
+from .services.downsampling import average_buckets, downsample, lttb_indices, minmax_indices
+from .services import rollups
+from .services.async_client import AsyncHTTPTransport
+from .services.anomaly import AnomalyDetector, SeriesState, WellDetector
+from .services.bulk_sync import DEFAULT_FIELD, sync_external_wells
+from .services.changes import TOMBSTONE_RETENTION, encode_cursor
+from .services.ingestion import WellSyncWorker
+from .services.recommendations import refresh_recommendations
+from .services.push import READINGS_LOOKBACK_SECONDS, Subscription, Tick, UpdateHub
+from .services.scheduler import (
+    RETRY_DELAY, STATUS_INTERVALS, WELL_LIST_INTERVAL, PollingScheduler, RequestBudget, WellSchedule
+)
+from .services.transport import (
+    CircuitBreaker, CircuitOpenError, HTTPTransport, RetryBudget, RetryPolicy, TransportError, parse_retry_after
+)
+from .services.telemetry import ingest_telemetry, iter_telemetry_csv, load_series, load_series_batch
+from .synthetic import (
+    SyntheticExternalClient, VirtualClock, create_telemetry, create_wells, external_records, telemetry_payload
+)
+
+
+class WellFastListTests(TestCase):
+    """Быстрый список скважин совпадает с WellSerializer"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Well.objects.create(
+            well_number='WELL-001', field='Северное', latitude=Decimal('55.755800'),
+            longitude=Decimal('37.617300'), depth=2450.0, status='active',
+            current_pressure=45.2, measured_flow_rate=120.3, temperature=85.5
+        )
+        Well.objects.create(
+            well_number='WELL-002', field='Южное', latitude=Decimal('-0.000001'),
+            longitude=Decimal('0'), depth=1800, status='emergency'
+        )
+
+    def expected(self, fields=None):
+        context = {'request': None}
+        data = WellSerializer(Well.objects.order_by('well_number'), many=True, context=context).data
+        data = json.loads(JSONRenderer().render(data))
+        if fields:
+            data = [{name: row[name] for name in fields} for row in data]
+        return data
+
+    def test_matches_well_serializer(self):
+        response = self.client.get('/api/wells/fast/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), self.expected())
+
+    def test_sparse_fields(self):
+        fields = ['well_number', 'status_display', 'latitude']
+        response = self.client.get('/api/wells/fast/?fields=' + ','.join(fields))
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), self.expected(fields))
+
+
+class ResponseCacheTests(TestCase):
+    """Кэш ответов и ETag: 304 до изменения скважины, после - новый ответ"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.well = Well.objects.create(
+            well_number='CACHE-1', field='Северное', latitude=55, longitude=37, depth=2000, status='active'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_etag_cycle(self):
+        url = f'/api/wells/{self.well.pk}/'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        for header in (etag, f'"other", {etag}', f'W/{etag}', '*'):
+            with self.subTest(header=header):
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=header).status_code, 304)
+        # Тег, лишь содержащий ETag как подстроку, - другой тег
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=f'"x{etag[1:]}').status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Well.objects.get(pk=self.well.pk).save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_versions_expire(self):
+        # Без общего кэша чужая инвалидация не видна: версия живет не дольше ответа
+        with mock.patch.object(cache, 'add', wraps=cache.add) as add:
+            self.client.get('/api/wells/')
+        self.assertEqual(add.call_args.kwargs['timeout'], settings.WELLS_CACHE_TIMEOUT)
+
+
+class WellOrderingTests(TestCase):
+    """Сортировка списка с курсором: скважины без значения поля не теряются"""
+
+    @classmethod
+    def setUpTestData(cls):
+        for index in range(23):
+            Well.objects.create(
+                well_number=f'ORD-{index:02d}', field='Северное', latitude=55, longitude=37,
+                depth=2000 + index % 3, status='active',
+                current_pressure=None if index % 4 == 0 else float(40 + index % 5)
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def walk(self, url, key):
+        numbers = []
+        while url:
+            data = self.client.get(url).json()
+            numbers += [row['well_number'] for row in data['results']]
+            url = data[key]
+        return numbers, data
+
+    def test_pages_cover_nulls_both_directions(self):
+        wells = list(Well.objects.all())
+        for ordering in ('current_pressure', '-current_pressure', 'depth', '-depth'):
+            with self.subTest(ordering=ordering):
+                name = ordering.lstrip('-')
+                present = sorted(
+                    (well for well in wells if getattr(well, name) is not None),
+                    key=lambda well: (getattr(well, name) * (-1 if ordering[0] == '-' else 1), well.well_number)
+                )
+                expected = [well.well_number for well in present]
+                expected += sorted(well.well_number for well in wells if getattr(well, name) is None)
+
+                numbers, last = self.walk(f'/api/wells/?page_size=5&ordering={ordering}', 'next')
+                self.assertEqual(numbers, expected)
+                # Назад от последней страницы: все предыдущие страницы в том же порядке
+                back = []
+                url = last['previous']
+                while url:
+                    data = self.client.get(url).json()
+                    back = [row['well_number'] for row in data['results']] + back
+                    url = data['previous']
+                self.assertEqual(back + [row['well_number'] for row in last['results']], expected)
+
+    def test_invalid_cursor(self):
+        cursor = 'cD1hYmM='  # p=abc
+        self.assertEqual(self.client.get(f'/api/wells/?ordering=depth&cursor={cursor}').status_code, 404)
+
+    def test_prefix_upper_bound(self):
+        self.assertEqual(prefix_upper_bound('ORD-0'), 'ORD-1')
+        self.assertEqual(prefix_upper_bound('A\U0010ffff'), 'B')
+        self.assertIsNone(prefix_upper_bound('\U0010ffff'))
+        self.assertEqual(prefix_upper_bound('\ud7ff'), '\ue000')
+        for prefix in ('\U0010ffff', 'ORD-\ud7ff', 'ORD-1'):
+            with self.subTest(prefix=prefix):
+                response = self.client.get('/api/wells/', {'search': prefix})
+                self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.client.get('/api/wells/', {'search': 'ORD-1'}).json()['results']), 10)
+
+
+class GeoTests(TestCase):
+    """Поиск по радиусу и ближайших совпадает с перебором всех скважин по гаверсинусам"""
+    CENTERS = [(55.7, 37.6), (0.0, 179.9), (-10.0, -179.95), (89.7, 20.0), (-89.9, -100.0), (70.0, 0.0)]
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = np.random.default_rng(7)
+        points = [(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(300)]
+        # Скопления вокруг центров: рядом с Москвой, у 180-го меридиана и у полюсов
+        for lat, lon in cls.CENTERS:
+            for _ in range(40):
+                point_lat = float(np.clip(lat + rng.normal(0, 1.5), -90, 90))
+                point_lon = (lon + rng.normal(0, 3) + 180) % 360 - 180
+                points.append((point_lat, point_lon))
+        wells = []
+        for index, (lat, lon) in enumerate(points):
+            well = Well(
+                well_number=f'GEO-{index:04d}', field='Северное', depth=1000, status='active',
+                latitude=Decimal(f'{lat:.6f}'), longitude=Decimal(f'{lon:.6f}')
+            )
+            well.update_geohash()
+            wells.append(well)
+        Well.objects.bulk_create(wells)
+        rows = list(Well.objects.values_list('id', 'latitude', 'longitude'))
+        cls.ids = np.array([row[0] for row in rows])
+        cls.lats = np.array([float(row[1]) for row in rows])
+        cls.lons = np.array([float(row[2]) for row in rows])
+
+    def brute_force(self, lat, lon):
+        return haversine_km(lat, lon, self.lats, self.lons)
+
+    def test_radius_matches_brute_force(self):
+        for lat, lon in self.CENTERS:
+            distances = self.brute_force(lat, lon)
+            for radius_km in (50, 300, 1500, 6000):
+                with self.subTest(lat=lat, lon=lon, radius_km=radius_km):
+                    found = {match.id for match in within_radius(lat, lon, radius_km)}
+                    self.assertEqual(found, set(self.ids[distances <= radius_km].tolist()))
+
+    def test_nearest_matches_brute_force(self):
+        for lat, lon in self.CENTERS + [(0.0, 0.0)]:
+            with self.subTest(lat=lat, lon=lon):
+                # Сравниваются расстояния: у скважин на самом полюсе они совпадают
+                expected = np.sort(self.brute_force(lat, lon))[:15].round(3).tolist()
+                self.assertEqual([match.distance_km for match in nearest(lat, lon, 15)], expected)
+
+    def test_bbox_splits_and_poles(self):
+        self.assertEqual(len(radius_bbox(0, 179.9, 100)), 2)
+        self.assertEqual(len(radius_bbox(0, -179.9, 100)), 2)
+        (box,) = radius_bbox(89.5, 10, 100)
+        self.assertEqual((box[1], box[2], box[3]), (-180.0, 90.0, 180.0))
+        # На широте 60° долготный охват круга шире, чем radius / (111.32 * cos(lat))
+        (box,) = radius_bbox(60, 0, 2000)
+        self.assertGreater(box[3], 2000 / (111.32 * 0.5))
+
+    def test_negative_count_rejected(self):
+        for url in ('/api/wells/geo/nearest/?lat=0&lon=0&n=-1', '/api/wells/geo/radius/?lat=0&lon=0&radius_km=5&limit=-1'):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 400)
+        with self.assertRaises(ValueError):
+            nearest(0, 0, -1)
+
+    def test_well_deleted_after_search(self):
+        matches = within_radius(55.7, 37.6, 300)[:5]
+        Well.objects.filter(id=matches[0].id).delete()
+        with mock.patch('wells.views.within_radius', return_value=matches):
+            response = self.client.get('/api/wells/geo/radius/?lat=55.7&lon=37.6&radius_km=300')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.json()['results']], [match.id for match in matches[1:]])
+
+
+class WellChangesTests(TestCase):
+    """Лента изменений: обновления, удаления и продвижение курсора"""
+
+    def create_well(self, number):
+        return Well.objects.create(
+            well_number=number, field='Северное', latitude=Decimal('55.7'),
+            longitude=Decimal('37.6'), depth=2000, status='active'
+        )
+
+    def get_changes(self, since=None, **params):
+        if since:
+            params['since'] = since
+        response = self.client.get('/api/wells/changes/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    @mock.patch('wells.services.changes.SETTLE_SECONDS', 0)
+    def test_updates_and_deletes_after_cursor(self):
+        first = self.create_well('WELL-001')
+        second = self.create_well('WELL-002')
+        initial = self.get_changes()
+        self.assertEqual([row['well_number'] for row in initial['updated']], ['WELL-001', 'WELL-002'])
+        self.assertEqual(self.get_changes(initial['cursor'])['updated'], [])
+
+        first.status = 'maintenance'
+        first.save()
+        second.delete()
+        changes = self.get_changes(initial['cursor'])
+        self.assertEqual([(row['id'], row['status']) for row in changes['updated']], [(first.id, 'maintenance')])
+        self.assertEqual([row['well_number'] for row in changes['deleted']], ['WELL-002'])
+        self.assertFalse(changes['has_more'])
+
+    def test_pages_follow_cursor(self):
+        for number in range(5):
+            self.create_well(f'WELL-{number:03d}')
+        seen, cursor = [], None
+        while True:
+            changes = self.get_changes(cursor, page_size=2, fields='well_number')
+            seen += [row['well_number'] for row in changes['updated']]
+            cursor = changes['cursor']
+            if not changes['has_more']:
+                break
+        self.assertEqual(seen, [f'WELL-{number:03d}' for number in range(5)])
+
+    def test_old_wells_page_through_bootstrap(self):
+        for number in range(5):
+            self.create_well(f'WELL-{number:03d}')
+        # Скважины не менялись дольше срока хранения удалений
+        Well.objects.update(last_data_update=datetime.now(dt_timezone.utc) - timedelta(days=60))
+        seen, cursor = [], None
+        while True:
+            changes = self.get_changes(cursor, page_size=2, fields='well_number')
+            seen += [row['well_number'] for row in changes['updated']]
+            cursor = changes['cursor']
+            if not changes['has_more']:
+                break
+        self.assertEqual(len(seen), 5)
+
+    def test_expired_cursor(self):
+        old = datetime.now(dt_timezone.utc) - TOMBSTONE_RETENTION - timedelta(days=1)
+        for cursor in (encode_cursor((old, 0)), encode_cursor((old, 1), synced=old)):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.client.get('/api/wells/changes/', {'since': cursor}).status_code, 410)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get('/api/wells/changes/?since=%%%').status_code, 400)
+
+
+class SubscriptionTests(TestCase):
+    """Подписка на поток событий сливает изменения и фильтрует по месторождению"""
+
+    def test_coalesces_and_filters(self):
+        subscription = Subscription(fields=['Северное'])
+        for pressure in (1.0, 2.0):
+            subscription.push(Tick(cursor=str(pressure), wells=[
+                {'id': 1, 'field': 'Северное', 'current_pressure': pressure},
+                {'id': 2, 'field': 'Южное', 'current_pressure': pressure},
+            ], telemetry={1: {'timestamps': [int(pressure)], 'pressure': [pressure]}}, fields={1: 'Северное'}))
+
+        frame = subscription.take()
+        self.assertEqual(frame['cursor'], '2.0')
+        self.assertEqual(frame['wells'], [{'id': 1, 'field': 'Северное', 'current_pressure': 2.0}])
+        self.assertEqual(frame['telemetry']['1']['pressure'], [1.0, 2.0])
+        self.assertFalse(subscription.ready.is_set())
+
+
+class UpdateHubReadingsTests(TestCase):
+    """Новые показания для потока событий: строки, зафиксированные не в порядке id, не теряются"""
+
+    def setUp(self):
+        self.well = Well.objects.create(well_number='HUB-1', field='Северное', latitude=55, longitude=37, depth=2000)
+        self.clock = VirtualClock(start=0)
+        self.hub = UpdateHub(clock=self.clock)
+        self.hub.poll()
+        self.floor = self.hub.reading_floor
+
+    def reading(self, offset, minute):
+        return TelemetryReading.objects.create(
+            id=self.floor + offset, well=self.well, timestamp=datetime(2024, 1, 1, 0, minute, tzinfo=dt_timezone.utc),
+            temperature=80, pressure=40, flow_rate=120
+        )
+
+    def timestamps(self):
+        return self.hub.poll().telemetry.get(self.well.pk, {}).get('timestamps', [])
+
+    def test_late_commit_within_window(self):
+        self.reading(2, 2)
+        self.assertEqual(self.timestamps(), [1704067320])
+        # Строка с меньшим id стала видимой позже (параллельная транзакция)
+        self.clock.sleep(READINGS_LOOKBACK_SECONDS / 2)
+        self.reading(1, 1)
+        self.assertEqual(self.timestamps(), [1704067260])
+        self.assertEqual(self.timestamps(), [])
+
+        # За окном граница догоняет прочитанные id, повторов нет
+        self.clock.sleep(READINGS_LOOKBACK_SECONDS)
+        self.assertEqual(self.timestamps(), [])
+        self.assertEqual(self.hub.reading_floor, self.floor + 2)
+        self.assertEqual(self.hub.reading_seen, set())
+        self.reading(3, 3)
+        self.assertEqual(self.timestamps(), [1704067380])
+
+
+class ScriptedUpstream(ThreadingHTTPServer):
+    """Локальный HTTP-сервер, отвечающий по списку (статус, заголовки); считает запросы и соединения"""
+    daemon_threads = True
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = 0
+        self.connections = 0
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(handler):
+                super().setup()
+                self.connections += 1
+
+            def do_GET(handler):
+                self.requests += 1
+                status, headers = self.responses.pop(0) if self.responses else (200, {})
+                body = b'{}'
+                handler.send_response(status)
+                for name, value in {'Content-Length': str(len(body)), **headers}.items():
+                    handler.send_header(name, value)
+                handler.end_headers()
+                handler.wfile.write(body)
+
+            def log_message(handler, *args):
+                pass
+
+        super().__init__(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}/api'
+
+
+class TransportTests(TestCase):
+    """HTTP-транспорт: повторы с задержкой, Retry-After, бюджет повторов, выключатель"""
+
+    def upstream(self, *responses):
+        server = ScriptedUpstream(responses)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def transport(self, server, **options):
+        self.delays = []
+        options.setdefault('retry', RetryPolicy(max_retries=3, backoff_base=0.1, backoff_max=0.4))
+        transport = HTTPTransport(server.url, timeout=5, sleep=self.delays.append, **options)
+        self.addCleanup(transport.pool.clear)
+        return transport
+
+    def test_retries_with_backoff_over_keep_alive(self):
+        server = self.upstream((503, {}), (500, {}), (200, {}))
+        with mock.patch('wells.services.transport.random.uniform', side_effect=lambda low, high: high):
+            response = self.transport(server).request('GET', '/wells/')
+        self.assertEqual(response.status, 200)
+        self.assertEqual(server.requests, 3)
+        # Экспоненциальная задержка (верхняя граница full jitter)
+        self.assertEqual(self.delays, [0.1, 0.2])
+        self.assertEqual(server.connections, 1)
+
+    def test_backoff_capped(self):
+        policy = RetryPolicy(backoff_base=0.1, backoff_max=0.4)
+        for attempt in range(8):
+            self.assertLessEqual(policy.backoff(attempt), 0.4)
+
+    def test_retry_after(self):
+        server = self.upstream((503, {'Retry-After': '2'}), (200, {}))
+        self.transport(server).request('GET', '/wells/')
+        self.assertEqual(len(self.delays), 1)
+        self.assertGreaterEqual(self.delays[0], 2)
+
+        # Ждать дольше max_retry_after бессмысленно: сразу ошибка
+        server = self.upstream((503, {'Retry-After': '30'}), (200, {}))
+        with self.assertRaises(TransportError) as raised:
+            self.transport(server).request('GET', '/wells/')
+        self.assertEqual((raised.exception.status, server.requests), (503, 1))
+
+        moment = datetime.now(dt_timezone.utc) + timedelta(seconds=60)
+        self.assertAlmostEqual(parse_retry_after(format_datetime(moment, usegmt=True)), 60, delta=2)
+        self.assertIsNone(parse_retry_after('soon'))
+
+    def test_retries_exhausted(self):
+        server = self.upstream(*[(500, {})] * 5)
+        with self.assertRaises(TransportError) as raised:
+            self.transport(server).request('GET', '/wells/')
+        self.assertEqual((raised.exception.status, server.requests), (500, 4))
+
+    def test_retry_budget(self):
+        budget = RetryBudget(ratio=0, min_per_second=0, capacity=1)
+        server = self.upstream(*[(503, {})] * 5)
+        with self.assertRaisesRegex(TransportError, 'бюджет'):
+            self.transport(server, budget=budget).request('GET', '/wells/')
+        self.assertEqual(server.requests, 2)
+
+    def test_circuit_breaker(self):
+        now = [1000.0]
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+        server = self.upstream((500, {}), (500, {}), (200, {}))
+        transport = self.transport(server, breaker=breaker, retry=RetryPolicy(max_retries=0))
+        with mock.patch('wells.services.transport.time.monotonic', lambda: now[0]):
+            for _ in range(2):
+                with self.assertRaises(TransportError):
+                    transport.request('GET', '/wells/')
+            self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+            with self.assertRaises(CircuitOpenError):
+                transport.request('GET', '/wells/')
+            self.assertEqual(server.requests, 2)
+
+            # После reset_timeout проходит один пробный запрос
+            now[0] += 30
+            breaker.before_request()
+            self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+            with self.assertRaises(CircuitOpenError):
+                breaker.before_request()
+            breaker.record_failure()
+            self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+            now[0] += 30
+            self.assertEqual(transport.request('GET', '/wells/').status, 200)
+            self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+
+class AsyncTransportParityTests(TestCase):
+    """AsyncHTTPTransport ведет себя как HTTPTransport на тех же ответах внешнего API"""
+    SCENARIOS = {
+        'success_after_retries': [(503, {}), (500, {}), (200, {})],
+        'retry_after': [(429, {'Retry-After': '1'}), (200, {})],
+        'retry_after_too_long': [(503, {'Retry-After': '60'})],
+        'exhausted': [(500, {})] * 5,
+        'not_retried': [(404, {}), (200, {})],
+    }
+
+    def outcome(self, request):
+        try:
+            return request().status
+        except TransportError as e:
+            return ('error', e.status)
+
+    def run_sync(self, responses):
+        server = ScriptedUpstream(responses)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        delays = []
+        transport = HTTPTransport(server.url, timeout=5, sleep=delays.append, budget=RetryBudget())
+        self.addCleanup(transport.pool.clear)
+        return self.outcome(lambda: transport.request('GET', '/wells/')), server.requests, delays
+
+    async def run_async(self, responses):
+        responses = list(responses)
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            status, headers = responses.pop(0) if responses else (200, {})
+            return httpx.Response(status, headers=headers, content=b'{}')
+
+        delays = []
+
+        async def sleep(delay):
+            delays.append(delay)
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url='http://upstream/api') as client:
+            transport = AsyncHTTPTransport(client, budget=RetryBudget(), sleep=sleep)
+            try:
+                outcome = (await transport.request('GET', '/wells/')).status
+            except TransportError as e:
+                outcome = ('error', e.status)
+        return outcome, len(requests), delays
+
+    def test_parity(self):
+        for name, responses in self.SCENARIOS.items():
+            with self.subTest(scenario=name), \
+                    mock.patch('wells.services.transport.random.uniform', side_effect=lambda low, high: high):
+                self.assertEqual(async_to_sync(self.run_async)(responses), self.run_sync(responses))
+
+    def test_shared_breaker(self):
+        breaker = CircuitBreaker(failure_threshold=1)
+        breaker.record_failure()
+
+        async def request():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(lambda r: httpx.Response(200))) as client:
+                await AsyncHTTPTransport(client, breaker=breaker).request('GET', 'http://upstream/wells/')
+
+        with self.assertRaises(CircuitOpenError):
+            async_to_sync(request)()
+
+
+class AsyncViewTests(TestCase):
+    """Async-представления: список и карточка через async ORM, живая телеметрия внешнего API"""
+
+    @classmethod
+    def setUpTestData(cls):
+        for number in range(5):
+            Well.objects.create(
+                well_number=f'AS-{number}', field='Северное', latitude=55, longitude=37, depth=2000,
+                current_pressure=40 + number
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    async def test_list_pages(self):
+        numbers, url = [], '/api/async/wells/?page_size=2&fields=well_number,current_pressure'
+        while url:
+            response = await self.async_client.get(url)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            self.assertEqual(set(data['results'][0]), {'well_number', 'current_pressure'})
+            numbers += [row['well_number'] for row in data['results']]
+            url = data['next']
+        self.assertEqual(numbers, [f'AS-{number}' for number in range(5)])
+
+    async def test_detail_matches_sync_view(self):
+        well = await Well.objects.aget(well_number='AS-3')
+        response = await self.async_client.get(f'/api/async/wells/{well.pk}/')
+        sync_response = await sync_to_async(self.client.get)(f'/api/wells/{well.pk}/')
+        self.assertEqual(response.json(), sync_response.json())
+        self.assertEqual((await self.async_client.get('/api/async/wells/999999/')).status_code, 404)
+
+    async def test_errors(self):
+        for url, status in (
+            ('/api/async/wells/?page_size=0', 400),
+            ('/api/async/wells/?fields=secret', 400),
+            ('/api/async/wells/live/?ids=1,x', 400),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual((await self.async_client.get(url)).status_code, status)
+        self.assertEqual((await self.async_client.post('/api/async/wells/')).status_code, 405)
+
+    def test_events_require_asgi(self):
+        self.assertEqual(self.client.get('/api/async/wells/events/').status_code, 501)
+
+    async def read_events(self, count, url='/api/async/wells/events/', since=None):
+        """Первые count кадров потока событий; опрос изменений в фоне не идет"""
+        hub = UpdateHub(tick_seconds=3600)
+        hub.poll = lambda: Tick(cursor=hub.cursor)
+        with mock.patch('wells.async_views.get_hub', return_value=hub):
+            response = await self.async_client.get(url, headers={'Last-Event-ID': since} if since else {})
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+            stream = aiter(response.streaming_content)
+            try:
+                frames = [(await anext(stream)).decode() for _ in range(count)]
+            finally:
+                await stream.aclose()
+        cursor = hub.published
+        hub.task.cancel()
+        await asyncio.gather(hub.task, return_exceptions=True)
+        return cursor, frames
+
+    async def test_events_send_cursor_before_first_update(self):
+        with mock.patch('wells.async_views.EVENTS_HEARTBEAT_SECONDS', 0.01):
+            cursor, frames = await self.read_events(2)
+        self.assertTrue(cursor)
+        self.assertEqual(frames, [f'retry: {EVENTS_RETRY_MS}\nid: {cursor}\n\n', f'id: {cursor}\n: ping\n\n'])
+
+    async def test_events_catch_up_from_last_event_id(self):
+        well = await Well.objects.aget(well_number='AS-2')
+        since = encode_cursor((datetime.now(dt_timezone.utc) - timedelta(minutes=1), 0))
+        _, frames = await self.read_events(2, f'/api/async/wells/events/?ids={well.pk}', since=since)
+        self.assertEqual(frames[0], f'retry: {EVENTS_RETRY_MS}\n\n')
+        event_id, event, data = frames[1].strip().split('\n')
+        self.assertEqual(event, 'event: update')
+        frame = json.loads(data.removeprefix('data: '))
+        self.assertEqual(event_id, f"id: {frame['cursor']}")
+        self.assertEqual([row['well_number'] for row in frame['wells']], ['AS-2'])
+
+    async def test_events_resync(self):
+        expired = encode_cursor((datetime.now(dt_timezone.utc) - TOMBSTONE_RETENTION - timedelta(days=1), 0))
+        behind = encode_cursor((datetime.now(dt_timezone.utc) - timedelta(minutes=1), 0))
+        for since in (expired, behind, 'garbage'):
+            with self.subTest(since=since), mock.patch('wells.async_views.EVENTS_CATCHUP_LIMIT', 2):
+                cursor, frames = await self.read_events(2, since=since)
+                self.assertEqual(frames[1], f'id: {cursor}\nevent: resync\ndata: {{}}\n\n')
+
+    def fake_client(self, telemetry=None, error=None):
+        class FakeClient:
+            def __init__(self, *args, **kwargs):
+                pass
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc_info):
+                pass
+
+            async def get_wells_telemetry(self, well_numbers, hours, points, batch_size):
+                if error:
+                    raise error
+                return {number: telemetry for number in well_numbers}
+
+        return mock.patch('wells.async_views.AsyncExternalWellDataClient', FakeClient)
+
+    async def test_live(self):
+        well = await Well.objects.aget(well_number='AS-1')
+        telemetry = telemetry_payload(3, 1_700_000_000)
+        with self.fake_client(telemetry):
+            data = (await self.async_client.get(f'/api/async/wells/live/?ids={well.pk}&fields=well_number')).json()
+        self.assertEqual(data['upstream']['status'], 'ok')
+        [row] = data['results']
+        self.assertEqual(row['well_number'], 'AS-1')
+        self.assertEqual(row['live']['timestamp'], telemetry['timestamps'][-1])
+        self.assertEqual(row['live']['latest']['pressure'], telemetry['pressure'][-1])
+
+        # Внешнее API недоступно: данные из БД, live = null
+        with self.fake_client(error=ConnectionError('down')):
+            data = (await self.async_client.get('/api/async/wells/live/?page_size=2')).json()
+        self.assertEqual(data['upstream']['status'], 'unavailable')
+        self.assertEqual([row['live'] for row in data['results']], [None, None])
+
+
+class MetricsTests(TestCase):
+    """Метрики запросов в формате Prometheus на /metrics"""
+
+    def test_request_recorded(self):
+        before = HTTP_REQUEST_SECONDS.count('well-list', 'GET', '200')
+        self.client.get('/api/wells/')
+        self.assertEqual(HTTP_REQUEST_SECONDS.count('well-list', 'GET', '200'), before + 1)
+
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'wells_http_request_duration_seconds_bucket{view="well-list",method="GET",status="200",le="+Inf"}',
+            response.content.decode()
+        )
+
+    def test_db_queries_counted(self):
+        well = Well.objects.create(well_number='M-1', field='Северное', latitude=55, longitude=37, depth=2000)
+        cache.clear()
+        before = HTTP_DB_QUERIES.sum('well-detail')
+        self.client.get(f'/api/wells/{well.pk}/')
+        self.assertEqual(HTTP_DB_QUERIES.sum('well-detail'), before + 1)
+
+    async def test_async_chain(self):
+        async def get_response(request):
+            return HttpResponse()
+        self.assertTrue(iscoroutinefunction(MetricsMiddleware(get_response)))
+        self.assertFalse(iscoroutinefunction(MetricsMiddleware(lambda request: HttpResponse())))
+
+        # Запросы async ORM выполняются в потоке sync_to_async - они тоже учитываются
+        well = await Well.objects.acreate(
+            well_number='M-2', field='Северное', latitude=55, longitude=37, depth=2000
+        )
+        before = HTTP_DB_QUERIES.sum('async-well-detail')
+        response = await self.async_client.get(f'/api/async/wells/{well.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(HTTP_DB_QUERIES.sum('async-well-detail'), before + 1)
+
+    def test_upstream_endpoint(self):
+        self.assertEqual(upstream_endpoint('/wells/WELL-001/telemetry/?hours=1'), '/wells/{id}/telemetry/')
+
+
+class RecommendationTests(TestCase):
+    """Правила рекомендаций по снимку скважин и базовым уровням из суточных сверток"""
+
+    @classmethod
+    def setUpTestData(cls):
+        def well(number, **values):
+            defaults = dict(
+                field='Северное', latitude=55, longitude=37, depth=2000, status='active',
+                current_pressure=40, measured_flow_rate=120, temperature=75
+            )
+            return Well.objects.create(well_number=number, **{**defaults, **values})
+
+        cls.normal = well('REC-1')
+        cls.pressure = well('REC-2', current_pressure=30)
+        cls.flow = well('REC-3', measured_flow_rate=10)
+        cls.stopped = well('REC-4', status='maintenance', measured_flow_rate=0)
+        cls.hot = well('REC-5', depth=1000, temperature=120)
+        # Базовый уровень за неделю: давление ~40 атм, дебит ~120 м³/сут
+        create_telemetry([w.pk for w in (cls.normal, cls.pressure, cls.flow, cls.stopped, cls.hot)], 288)
+
+    def fired(self):
+        return set(Recommendation.objects.values_list('well__well_number', 'rule'))
+
+    def test_rules(self):
+        self.assertEqual(refresh_recommendations(), 3)
+        self.assertEqual(self.fired(), {
+            ('REC-2', 'pressure_drop'), ('REC-3', 'flow_collapse'), ('REC-5', 'temperature_band'),
+        })
+        recommendation = Recommendation.objects.get(rule='flow_collapse')
+        self.assertEqual((recommendation.type, recommendation.priority), ('emergency', 'critical'))
+
+    def test_refresh_keeps_review_and_drops_resolved(self):
+        refresh_recommendations()
+        Recommendation.objects.filter(rule='temperature_band').update(status='accepted')
+        Well.objects.filter(pk=self.pressure.pk).update(current_pressure=40)
+
+        refresh_recommendations([self.pressure.pk, self.hot.pk])
+        self.assertEqual(self.fired(), {('REC-3', 'flow_collapse'), ('REC-5', 'temperature_band')})
+        self.assertEqual(Recommendation.objects.get(rule='temperature_band').status, 'accepted')
+
+    def test_api_filter_by_well(self):
+        refresh_recommendations()
+        response = self.client.get(f'/api/recommendations/?well={self.flow.pk}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['rule'] for row in response.json()], ['flow_collapse'])
+        for value in ('abc', '0', str(2 ** 70)):
+            with self.subTest(well=value):
+                self.assertEqual(self.client.get(f'/api/recommendations/?well={value}').status_code, 400)
+
+
+class BulkSyncTests(TestCase):
+    """Массовая синхронизация скважин: создание, обновление, ошибки по записям, постоянное число запросов"""
+    URL = '/api/wells/bulk/'
+
+    def setUp(self):
+        cache.clear()
+
+    def post(self, records):
+        return self.client.post(self.URL, records, content_type='application/json')
+
+    def test_create_and_update(self):
+        records = external_records(3)
+        response = self.post(records)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data['created'], data['updated'], data['failed']), (3, 0, 0))
+        well = Well.objects.get(well_number=records[0]['well_id'])
+        self.assertEqual(well.field, DEFAULT_FIELD)
+        self.assertEqual(well.measured_flow_rate, records[0]['flow_rate'])
+        self.assertTrue(well.geohash)
+
+        records[0].update(flow_rate=1.5, field_name='Южное', coordinates={'lat': 60, 'lon': 70})
+        # Без field_name месторождение существующей скважины не меняется
+        Well.objects.filter(well_number=records[1]['well_id']).update(field='Западное')
+        data = self.post({'wells': records[:2]}).json()
+        self.assertEqual([item['status'] for item in data['results']], ['updated', 'updated'])
+        well.refresh_from_db()
+        self.assertEqual((well.measured_flow_rate, well.field, float(well.latitude)), (1.5, 'Южное', 60))
+        self.assertEqual(Well.objects.get(well_number=records[1]['well_id']).field, 'Западное')
+
+    def test_invalid_and_duplicate_records(self):
+        first, second = external_records(2)
+        repeated = {**first, 'depth': 1234.0}
+        data = self.post([first, {'well_id': 'BAD', 'depth': -1}, repeated, 'oops', second]).json()
+        self.assertEqual([item['status'] for item in data['results']],
+                         ['duplicate', 'invalid', 'created', 'invalid', 'created'])
+        self.assertIn('depth', data['results'][1]['errors'])
+        # При повторе применяется последняя запись
+        self.assertEqual(Well.objects.get(well_number=first['well_id']).depth, 1234.0)
+
+    def test_deleted_well_recreated_and_others_untouched(self):
+        records = external_records(3)
+        self.post(records)
+        deleted = Well.objects.get(well_number=records[0]['well_id'])
+        self.assertEqual(self.client.delete(f'/api/wells/{deleted.pk}/').status_code, 204)
+
+        # Синхронизация - upsert: скважины вне запроса не удаляются, удаленная создается заново
+        data = self.post(records[:1]).json()
+        self.assertEqual(data['results'][0]['status'], 'created')
+        self.assertEqual(Well.objects.count(), 3)
+        self.assertNotEqual(Well.objects.get(well_number=records[0]['well_id']).pk, deleted.pk)
+
+    def test_constant_queries(self):
+        def queries(records):
+            with CaptureQueriesContext(connection) as context:
+                sync_external_wells(records)
+            return len(context)
+
+        # В пределах пачки INSERT (лимит параметров СУБД) число запросов не зависит от числа записей
+        records = external_records(85)
+        self.assertEqual(queries(records[:5]), queries(records[5:]))
+        self.assertEqual(queries(records), queries(records[:5]))
+
+    def test_request_validation(self):
+        self.assertEqual(self.post({'wells': 'x'}).status_code, 400)
+        with mock.patch('wells.views.WellBulkSyncAPIView.max_records', 2):
+            self.assertEqual(self.post(external_records(3)).status_code, 400)
+
+
+class RollupTests(TestCase):
+    """Свертки месторождений: пересчет один раз за синхронизацию, удаление и перенос скважин"""
+
+    def setUp(self):
+        cache.clear()
+
+    def well(self, number, field):
+        return Well.objects.create(well_number=number, field=field, latitude=55, longitude=37, depth=2000)
+
+    def assertFieldRollupsConsistent(self):
+        expected = {
+            (row['well__field'], row['granularity'], row['bucket_start']): row['total']
+            for row in TelemetryRollup.objects.order_by().values('well__field', 'granularity', 'bucket_start')
+            .annotate(total=Sum('count'))
+        }
+        actual = {
+            (row.field, row.granularity, row.bucket_start): row.count for row in FieldTelemetryRollup.objects.all()
+        }
+        self.assertTrue(expected)
+        self.assertEqual(actual, expected)
+
+    def field_count(self, field):
+        return FieldTelemetryRollup.objects.filter(field=field, granularity='day').aggregate(total=Sum('count'))['total']
+
+    def test_sync_refreshes_field_rollups_once(self):
+        worker = WellSyncWorker(SyntheticExternalClient(6), concurrency=1, batch_size=2)
+        with mock.patch.object(rollups, 'refresh_field_rollups', wraps=rollups.refresh_field_rollups) as refresh:
+            worker.run()
+        self.assertEqual(refresh.call_count, 1)
+        self.assertEqual(FieldTelemetryRollup.objects.values('field').distinct().count(),
+                         Well.objects.values('field').distinct().count())
+        self.assertFieldRollupsConsistent()
+
+    def test_delete_well(self):
+        first, second = self.well('ROLL-1', 'Северное'), self.well('ROLL-2', 'Северное')
+        create_telemetry([first.pk, second.pk], 24)
+        self.assertEqual(self.field_count('Северное'), 48)
+        second.delete()
+        self.assertEqual(self.field_count('Северное'), 24)
+        first.delete()
+        self.assertFalse(FieldTelemetryRollup.objects.exists())
+
+    def test_move_well(self):
+        well = self.well('ROLL-1', 'Северное')
+        self.well('ROLL-2', 'Южное')
+        create_telemetry(Well.objects.values_list('id', flat=True), 24)
+
+        well = Well.objects.get(pk=well.pk)
+        well.field = 'Западное'
+        well.save()
+        self.assertIsNone(self.field_count('Северное'))
+        self.assertEqual(self.field_count('Западное'), 24)
+        self.assertFieldRollupsConsistent()
+
+        record = {
+            'well_id': 'ROLL-1', 'field_name': 'Южное', 'coordinates': {'lat': 55, 'lon': 37}, 'depth': 2000,
+            'status': 'active'
+        }
+        sync_external_wells([record])
+        self.assertIsNone(self.field_count('Западное'))
+        self.assertEqual(self.field_count('Южное'), 48)
+        self.assertFieldRollupsConsistent()
+
+    def test_plan_granularity(self):
+        start = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+        cases = [
+            (timedelta(days=365), 100, True, 'day'),
+            (timedelta(days=7), 100, True, 'hour'),
+            (timedelta(hours=6), 100, True, 'raw'),
+            (timedelta(hours=6), 100, False, 'hour'),
+            (timedelta(days=1), 24, True, 'hour'),
+            (timedelta(days=1), 0, True, 'day'),
+        ]
+        for span, points, allow_raw, granularity in cases:
+            with self.subTest(span=span, points=points, allow_raw=allow_raw):
+                self.assertEqual(rollups.plan_granularity(start, start + span, points, allow_raw), granularity)
+
+
+class AnomalyTests(TestCase):
+    """EWMA/CUSUM-детектор: выбросы, сдвиги уровня, сохранение состояния и тревог"""
+
+    def setUp(self):
+        cache.clear()
+        self.well = Well.objects.create(
+            well_number='AN-1', field='Северное', latitude=55, longitude=37, depth=2000, status='active'
+        )
+
+    @staticmethod
+    def steady(level, points):
+        """Ровный ряд с колебаниями на шаг округления телеметрии (σ = MIN_STD)"""
+        return [level + 0.2 * (index % 2) for index in range(points)]
+
+    @staticmethod
+    def telemetry(start, temperature):
+        points = len(temperature)
+        return {
+            'timestamps': list(range(start, start + points * 300, 300)),
+            'temperature': temperature, 'pressure': [40.0] * points, 'flow_rate': [120.0] * points,
+        }
+
+    def test_spike(self):
+        values = self.steady(80, 50)
+        values[40] = 82
+        anomalies = SeriesState().update(values)
+        # Выброс не засчитывается следующим точкам как сдвиг уровня
+        self.assertEqual([(index, kind) for index, kind, _ in anomalies], [(40, 'spike')])
+        self.assertGreater(anomalies[0][2], 6)
+
+    def test_no_alerts_during_warmup(self):
+        self.assertEqual(SeriesState().update([80, 80, 80, 200, 80]), [])
+
+    def test_level_shift(self):
+        # Медленный рост на 1σ за точку - ниже порога выброса, его находит CUSUM
+        values = self.steady(80, 40) + [80.1 + 0.1 * index for index in range(40)]
+        anomalies = SeriesState().update(values)
+        self.assertEqual([kind for _, kind, _ in anomalies], ['shift'])
+        self.assertGreater(anomalies[0][0], 40)
+
+    def test_split_batches_match_single_pass(self):
+        values = self.steady(80, 60) + [80.1 + 0.1 * index for index in range(40)]
+        whole, parts = SeriesState(), SeriesState()
+        whole.update(values)
+        parts.update(values[:37])
+        parts.update(values[37:])
+        self.assertEqual(
+            [getattr(parts, name) for name in SeriesState.__slots__],
+            [getattr(whole, name) for name in SeriesState.__slots__]
+        )
+
+    def test_state_persisted_between_runs(self):
+        history = self.telemetry(1_700_000_000, self.steady(80, 50))
+        AnomalyDetector().process_batch([(self.well, history)])
+
+        detector = AnomalyDetector()
+        # Повторно присланные точки пропускаются: состояние загружено из БД
+        self.assertEqual(detector.process_batch([(self.well, history)]), [])
+        state = detector.detectors[self.well.pk]
+        self.assertEqual(WellDetector.unpack(state.pack()).pack(), state.pack())
+        self.assertEqual(state.series[0].count, 50)
+
+        spike = self.telemetry(history['timestamps'][-1] + 300, [120.0])
+        alerts = detector.process_batch([(self.well, spike)])
+        self.assertEqual([(alert.parameter, alert.kind, alert.critical) for alert in alerts],
+                         [('temperature', 'spike', True)])
+        recommendation = Recommendation.objects.get(well=self.well)
+        self.assertEqual((recommendation.rule, recommendation.priority), ('anomaly_temperature', 'critical'))
+
+    @override_settings(ANOMALY_ESCALATE_EMERGENCY=True)
+    def test_emergency_held_while_alert_open(self):
+        start = 1_700_000_000
+        detector = AnomalyDetector()
+        detector.process_batch([(self.well, self.telemetry(start, self.steady(80, 50) + [120.0]))])
+        self.assertEqual(Well.objects.get(pk=self.well.pk).status, 'emergency')
+
+        record = {
+            'well_id': 'AN-1', 'coordinates': {'lat': 55, 'lon': 37}, 'depth': 2000, 'status': 'active'
+        }
+        sync_external_wells([record])
+        self.assertEqual(Well.objects.get(pk=self.well.pk).status, 'emergency')
+
+        # Отклоненная тревога снимает удержание
+        Recommendation.objects.filter(well=self.well).update(status='rejected')
+        sync_external_wells([record])
+        self.assertEqual(Well.objects.get(pk=self.well.pk).status, 'active')
+
+        # Аномалия вернулась: тревога открыта снова
+        detector.process_batch([(self.well, self.telemetry(start + 51 * 300, self.steady(80, 30) + [20.0]))])
+        recommendation = Recommendation.objects.get(well=self.well)
+        self.assertEqual(recommendation.status, 'pending')
+        self.assertEqual(Well.objects.get(pk=self.well.pk).status, 'emergency')
+
+
+class EndpointBudgetTests(TestCase):
+    """
+    Бюджеты эндпоинтов на синтетическом фонде из 1000 скважин: точное число
+    запросов к БД и верхняя граница времени ответа (с запасом на медленную машину).
+    Рост числа запросов (N+1) или времени на порядок - регрессия.
+    Ответы читаются без кэша: он очищается перед каждым запросом.
+    """
+    # URL -> (запросов к БД, мс)
+    BUDGETS = {
+        '/api/wells/?page_size=100': (1, 250),
+        '/api/wells/?page_size=100&status=maintenance&ordering=-current_pressure': (1, 250),
+        '/api/wells/?page_size=100&search=BENCH-00001': (1, 250),
+        '/api/wells/{id}/': (1, 100),
+        '/api/wells/changes/?page_size=500': (2, 300),
+        '/api/wells/fast/': (1, 300),
+        '/api/wells/export.ndjson': (1, 300),
+        '/api/wells/geo/nearest/?lat=55.5&lon=37.5&n=10': (5, 200),
+        '/api/wells/{id}/telemetry/?hours=24&points=100': (3, 150),
+        '/api/wells/{id}/telemetry/rollup/': (3, 150),
+        '/api/wells/telemetry/batch/?ids={ids}&hours=24&points=100': (3, 400),
+        '/api/recommendations/': (1, 100),
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        create_wells(1000)
+        cls.well_ids = list(Well.objects.order_by('id').values_list('id', flat=True)[:10])
+        create_telemetry(cls.well_ids, 288)
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, url):
+        response = self.client.get(url)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, 200, url)
+
+    def test_budgets(self):
+        ids = ','.join(map(str, self.well_ids))
+        for template, (queries, budget_ms) in self.BUDGETS.items():
+            url = template.format(id=self.well_ids[0], ids=ids)
+            with self.subTest(url=url):
+                cache.clear()
+                with self.assertNumQueries(queries):
+                    self.get(url)
+                timings = []
+                for _ in range(3):
+                    cache.clear()
+                    started = time.perf_counter()
+                    self.get(url)
+                    timings.append((time.perf_counter() - started) * 1000)
+                self.assertLess(min(timings), budget_ms, f'{url}: {min(timings):.1f} мс')
+
+
+class TelemetryStoreTests(TestCase):
+    """История телеметрии: запись пачками, месяц (bucket), чтение по периоду"""
+
+    def setUp(self):
+        cache.clear()
+        self.well = Well.objects.create(well_number='TS-1', field='Северное', latitude=55, longitude=37, depth=2000)
+        self.other = Well.objects.create(well_number='TS-2', field='Северное', latitude=55, longitude=37, depth=2000)
+        # 12 точек через 5 минут, последние три - уже в феврале
+        self.start = int(datetime(2024, 2, 1, tzinfo=dt_timezone.utc).timestamp()) - 9 * 300
+        self.payload = telemetry_payload(12, self.start)
+
+    def moment(self, index):
+        return datetime.fromtimestamp(self.start + index * 300, tz=dt_timezone.utc)
+
+    def test_bucket(self):
+        self.assertEqual(telemetry_bucket(datetime(2024, 1, 31, 23, 59, tzinfo=dt_timezone.utc)), 202401)
+        # Месяц - по UTC, а не по локальному времени
+        moscow = dt_timezone(timedelta(hours=3))
+        self.assertEqual(telemetry_bucket(datetime(2024, 2, 1, 2, 0, tzinfo=moscow)), 202401)
+        reading = TelemetryReading(well=self.well, timestamp=self.moment(11), temperature=1, pressure=1, flow_rate=1)
+        reading.save()
+        self.assertEqual(reading.bucket, 202402)
+
+    def test_ingest_chunks_and_skips_duplicates(self):
+        self.assertEqual(ingest_telemetry(self.well, self.payload, chunk_size=5), 12)
+        buckets = list(TelemetryReading.objects.order_by('timestamp').values_list('bucket', flat=True))
+        self.assertEqual(buckets, [202401] * 9 + [202402] * 3)
+
+        # Повторная загрузка пересекающегося окна не дублирует строки
+        ingest_telemetry(self.well, telemetry_payload(6, self.start + 9 * 300))
+        self.assertEqual(TelemetryReading.objects.filter(well=self.well).count(), 15)
+        hourly = TelemetryRollup.objects.filter(well=self.well, granularity='hour').aggregate(total=Sum('count'))
+        self.assertEqual(hourly['total'], 15)
+
+    def test_range_reads(self):
+        ingest_telemetry(self.well, self.payload)
+        series = load_series(self.well, self.moment(2), self.moment(10))
+        self.assertEqual(series['timestamps'].tolist(), [self.start + i * 300 for i in range(2, 10)])
+        self.assertEqual(series['pressure'].tolist(), self.payload['pressure'][2:10])
+
+        batch = load_series_batch([self.well.pk, self.other.pk], self.moment(9))
+        self.assertEqual(len(batch[self.well.pk]['timestamps']), 3)
+        self.assertEqual(len(batch[self.other.pk]['timestamps']), 0)
+
+        lines = ''.join(iter_telemetry_csv(self.well, end=self.moment(2), chunk_size=1)).splitlines()
+        self.assertEqual(lines[0], 'timestamp,temperature,pressure,flow_rate')
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[1].startswith(self.moment(0).isoformat()))
+
+    def test_in_range_filters_bucket(self):
+        sql = str(TelemetryReading.objects.in_range(self.moment(0), self.moment(11)).query)
+        self.assertIn('"bucket" >= 202401', sql)
+        self.assertIn('"bucket" <= 202402', sql)
+
+
+def reference_lttb(x, y, threshold):
+    """LTTB по описанию алгоритма, поточечно - эталон для векторной версии"""
+    n = len(x)
+    every = (n - 2) / (threshold - 2)
+    selected, previous = [0], 0
+    for i in range(threshold - 2):
+        lo, hi = int(i * every) + 1, int((i + 1) * every) + 1
+        next_lo, next_hi = hi, min(int((i + 2) * every) + 1, n)
+        if i == threshold - 3:
+            avg_x, avg_y = x[-1], y[-1]
+        else:
+            avg_x = sum(x[next_lo:next_hi]) / (next_hi - next_lo)
+            avg_y = sum(y[next_lo:next_hi]) / (next_hi - next_lo)
+        best, best_area = lo, -1
+        for j in range(lo, hi):
+            area = abs((x[previous] - avg_x) * (y[j] - y[previous]) - (x[previous] - x[j]) * (avg_y - y[previous]))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        previous = best
+    return selected + [n - 1]
+
+
+class DownsamplingTests(TestCase):
+    """Прореживание рядов: LTTB, min/max и средние по интервалам, включая граничные размеры"""
+
+    def series(self, n, seed=0):
+        rng = np.random.default_rng(seed)
+        return {
+            'timestamps': np.arange(n, dtype=np.int64) * 300 + 1_700_000_000,
+            'pressure': rng.normal(40, 1, n).round(1),
+            'temperature': rng.normal(80, 1, n).round(1),
+        }
+
+    def test_at_or_below_threshold_returns_everything(self):
+        for n in (0, 1, 2, 10):
+            series = self.series(n)
+            for mode in ('lttb', 'minmax', 'avg'):
+                with self.subTest(n=n, mode=mode):
+                    result = downsample(series, n, mode)
+                    self.assertEqual(result['timestamps'].tolist(), series['timestamps'].tolist())
+                    self.assertEqual(downsample(series, n + 5, mode)['pressure'].tolist(), series['pressure'].tolist())
+
+    def test_degenerate_thresholds(self):
+        series = self.series(10)
+        self.assertEqual(lttb_indices(series['timestamps'], series['pressure'], 2).tolist(), list(range(10)))
+        self.assertEqual(minmax_indices(series['pressure'], 1).tolist(), list(range(10)))
+        self.assertIs(average_buckets(series, 0), series)
+
+    def test_lttb_matches_reference(self):
+        series = self.series(1000)
+        x, y = series['timestamps'], series['pressure']
+        for threshold in (3, 4, 50, 999):
+            with self.subTest(threshold=threshold):
+                indices = lttb_indices(x, y, threshold)
+                self.assertEqual(indices.tolist(), reference_lttb((x - x[0]).tolist(), y.tolist(), threshold))
+                self.assertEqual(len(downsample(series, threshold)['timestamps']), threshold)
+
+    def test_lttb_keeps_spike(self):
+        series = self.series(500)
+        series['pressure'][:] = 40
+        series['pressure'][321] = 90
+        result = downsample(series, 20)
+        self.assertIn(90, result['pressure'].tolist())
+        self.assertEqual(result['timestamps'][[0, -1]].tolist(), series['timestamps'][[0, -1]].tolist())
+
+    def test_minmax(self):
+        series = self.series(1001)
+        indices = minmax_indices(series['pressure'], 100)
+        self.assertLessEqual(len(indices), 100)
+        self.assertTrue(np.all(np.diff(indices) > 0))
+        self.assertIn(int(series['pressure'].argmax()), indices.tolist())
+        self.assertIn(int(series['pressure'].argmin()), indices.tolist())
+        # Нечетный threshold: интервалов threshold // 2
+        self.assertLessEqual(len(minmax_indices(series['pressure'], 5)), 4)
+
+    def test_avg(self):
+        series = {'timestamps': np.array([0, 10, 20, 30, 40], dtype=np.int64), 'pressure': np.arange(5.0)}
+        result = average_buckets(series, 2)
+        self.assertEqual(result['timestamps'].dtype, np.int64)
+        self.assertEqual(result['timestamps'].tolist(), [5, 30])
+        self.assertEqual(result['pressure'].tolist(), [0.5, 3.0])
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            downsample(self.series(10), 5, 'median')
+
+
+class SeriesAssertions:
+    def assertSeriesEqual(self, actual, expected):
+        self.assertEqual(set(actual), set(expected))
+        for name, values in expected.items():
+            # Сравнение по битам: NaN и -0.0 тоже должны сохраниться
+            np.testing.assert_array_equal(actual[name].view(np.int64), values.view(np.int64), name)
+
+
+class TelemetryBlockTests(SeriesAssertions, TestCase):
+    """Сжатые блоки телеметрии: кодирование без потерь и чтение вместе со строками"""
+    END = datetime(2020, 1, 1, tzinfo=dt_timezone.utc)
+
+    @classmethod
+    def setUpTestData(cls):
+        create_wells(2)
+        cls.wells = list(Well.objects.order_by('id'))
+        create_telemetry([well.pk for well in cls.wells], 1000, end=cls.END)
+
+    def test_round_trip(self):
+        rng = np.random.default_rng(0)
+        timestamps = 1_600_000_000 + np.cumsum(rng.choice([1, 300, 300, 3600], 500))
+        series = {
+            'timestamps': timestamps.astype(np.int64),
+            'temperature': rng.normal(85, 1, 500).round(1),
+            'pressure': rng.normal(40, 0.5, 500),
+            'flow_rate': np.full(500, -0.0),
+        }
+        series['pressure'][::7] = np.nan
+        self.assertSeriesEqual(decode_block(encode_block(series)), series)
+        single = {name: values[:1] for name, values in series.items()}
+        self.assertSeriesEqual(decode_block(encode_block(single)), single)
+
+    def test_regular_series_is_compact(self):
+        series = load_series(self.wells[0])
+        # Шаг постоянный, значения с одним знаком после запятой: не больше 5 байт на точку
+        self.assertLess(len(encode_block(series)), 5 * len(series['timestamps']))
+
+    def test_reads_match_rows(self):
+        window = (self.END - timedelta(hours=30), self.END - timedelta(hours=20))
+        full = load_series_batch([well.pk for well in self.wells])
+        part = load_series(self.wells[0], *window)
+        csv = ''.join(iter_telemetry_csv(self.wells[0], *window))
+
+        self.assertEqual(compact_telemetry(self.END - timedelta(hours=10), block_points=100), (1758, 18))
+        self.assertEqual(TelemetryReading.objects.count(), 242)
+        for well in self.wells:
+            self.assertSeriesEqual(load_series(well), full[well.pk])
+        self.assertSeriesEqual(load_series_batch([well.pk for well in self.wells])[self.wells[1].pk], full[self.wells[1].pk])
+        with self.assertNumQueries(2):
+            self.assertSeriesEqual(load_series(self.wells[0], *window), part)
+        self.assertEqual(''.join(iter_telemetry_csv(self.wells[0], *window)), csv)
+
+    def test_late_readings_unpack_blocks(self):
+        well = self.wells[0]
+        compact_telemetry(self.END + timedelta(seconds=1), block_points=100)
+        hour = self.END - timedelta(hours=50)
+        rollup = TelemetryRollup.objects.get(well=well, granularity='hour', bucket_start=hour)
+
+        # Поздняя точка внутри упакованного часа: блоки этого часа возвращаются в строки
+        late = telemetry_payload(1, int(hour.timestamp()) + 30)
+        ingest_telemetry(well, late)
+        self.assertTrue(TelemetryReading.objects.filter(well=well, timestamp__lt=hour).exists())
+        updated = TelemetryRollup.objects.get(well=well, granularity='hour', bucket_start=hour)
+        self.assertEqual(updated.count, rollup.count + 1)
+        self.assertEqual(len(load_series(well)['timestamps']), 1001)
+
+        # Повторная упаковка вместе с соседними блоками, без пересечений
+        compact_telemetry(self.END + timedelta(seconds=1), block_points=100)
+        self.assertFalse(TelemetryReading.objects.exists())
+        blocks = list(TelemetryBlock.objects.filter(well=well).order_by('start'))
+        self.assertTrue(all(left.end < right.start for left, right in zip(blocks, blocks[1:])))
+        self.assertEqual(sum(block.count for block in blocks), 1001)
+
+
+class ColdStorageTests(SeriesAssertions, TestCase):
+    """Перенос старой телеметрии в файлы и чтение вместе с БД"""
+    END = datetime(2020, 3, 10, tzinfo=dt_timezone.utc)
+
+    @classmethod
+    def setUpTestData(cls):
+        create_wells(2)
+        cls.wells = list(Well.objects.order_by('id'))
+        # 60 суток с шагом 5 минут: январь, февраль и начало марта 2020
+        create_telemetry([well.pk for well in cls.wells], 60 * 288, end=cls.END)
+
+    def setUp(self):
+        self.cold_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cold_dir, ignore_errors=True)
+        cold_settings = override_settings(TELEMETRY_COLD_DIR=self.cold_dir)
+        cold_settings.enable()
+        self.addCleanup(cold_settings.disable)
+
+    def test_tier_moves_whole_months(self):
+        window = (datetime(2020, 1, 31, 22, tzinfo=dt_timezone.utc), datetime(2020, 2, 1, 2, tzinfo=dt_timezone.utc))
+        full = load_series_batch([well.pk for well in self.wells])
+        part = load_series(self.wells[0], *window)
+        # Январь частично в блоках, граница блоков не совпадает с границей месяца
+        compact_telemetry(datetime(2020, 1, 20, tzinfo=dt_timezone.utc), block_points=1000)
+
+        points, wells = tier_telemetry(datetime(2020, 3, 5, tzinfo=dt_timezone.utc))
+        march = datetime(2020, 3, 1, tzinfo=dt_timezone.utc)
+        self.assertEqual(wells, 2)
+        self.assertEqual(points, sum(int((series['timestamps'] < march.timestamp()).sum()) for series in full.values()))
+        self.assertFalse(TelemetryReading.objects.filter(timestamp__lt=march).exists())
+        self.assertFalse(TelemetryBlock.objects.filter(start__lt=march).exists())
+
+        for well in self.wells:
+            self.assertSeriesEqual(load_series(well), full[well.pk])
+        self.assertSeriesEqual(load_series(self.wells[0], *window), part)
+        self.assertEqual(tier_telemetry(datetime(2020, 3, 5, tzinfo=dt_timezone.utc)), (0, 0))
+
+    def test_late_readings_thaw_cold_hours(self):
+        well = self.wells[0]
+        tier_telemetry(datetime(2020, 3, 5, tzinfo=dt_timezone.utc), [well.pk])
+        hour = datetime(2020, 2, 10, 12, tzinfo=dt_timezone.utc)
+        rollup = TelemetryRollup.objects.get(well=well, granularity='hour', bucket_start=hour)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ingest_telemetry(well, telemetry_payload(1, int(hour.timestamp()) + 30))
+        self.assertEqual(TelemetryReading.objects.filter(well=well, timestamp__lt=hour + timedelta(hours=1)).count(), 13)
+        updated = TelemetryRollup.objects.get(well=well, granularity='hour', bucket_start=hour)
+        self.assertEqual(updated.count, rollup.count + 1)
+        self.assertEqual(len(load_series(well)['timestamps']), 60 * 288 + 1)
+
+        # Повторный перенос возвращает час в файл февраля
+        tier_telemetry(datetime(2020, 3, 5, tzinfo=dt_timezone.utc), [well.pk])
+        self.assertFalse(TelemetryReading.objects.filter(well=well, timestamp__lt=hour + timedelta(hours=1)).exists())
+        self.assertEqual(len(load_series(well)['timestamps']), 60 * 288 + 1)
+
+    def test_well_delete_drops_files(self):
+        well = self.wells[1]
+        tier_telemetry(datetime(2020, 3, 5, tzinfo=dt_timezone.utc), [well.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            well.delete()
+        self.assertEqual(list(Path(self.cold_dir).iterdir()), [])
+
+
+class PollingSchedulerTests(TestCase):
+    """Адаптивный опрос телеметрии: бюджет запросов, интервалы, смена статуса"""
+
+    def make_scheduler(self, fleet, per_minute, batch_size=50, **client_options):
+        clock = VirtualClock(start=1_700_000_000)
+        client = SyntheticExternalClient(fleet, **client_options)
+        scheduler = PollingScheduler(
+            client, RequestBudget(per_minute, burst=1, clock=clock), batch_size=batch_size, concurrency=1,
+            clock=clock, sleep=clock.sleep
+        )
+        return clock, client, scheduler
+
+    def test_budget_respected(self):
+        # Спрос (30 скважин по одной в запросе) заведомо выше бюджета 6 запросов в минуту
+        clock, client, scheduler = self.make_scheduler(30, per_minute=6, batch_size=1)
+        scheduler.run(duration=300, report_every=float('inf'))
+        # Список скважин (1 запрос в долг) + запас 1 + 6 в минуту
+        self.assertLessEqual(client.requests, 1 + 1 + 6 * 5)
+        self.assertGreaterEqual(client.requests, 6 * 5 - 1)
+
+    def test_interval_follows_change_rate(self):
+        clock, client, scheduler = self.make_scheduler(1, per_minute=60)
+        low, high = STATUS_INTERVALS['active']
+        schedule = WellSchedule(well=None, status='active', interval=300, due=0, volatility=0.2)
+        self.assertEqual(scheduler.next_interval(schedule), 150)
+        schedule.volatility = 0.001
+        self.assertEqual(scheduler.next_interval(schedule), 450)
+        schedule.interval, schedule.volatility = high, 0.001
+        self.assertEqual(scheduler.next_interval(schedule), high)
+        schedule.interval, schedule.volatility = low, 0.2
+        self.assertEqual(scheduler.next_interval(schedule), low)
+
+    def test_volatile_emergency_wells_polled_more_often(self):
+        clock, client, scheduler = self.make_scheduler(10, per_minute=60, emergency_every=5)
+        scheduler.run(duration=1800, report_every=float('inf'))
+        polls = {schedule.status: schedule.polls for schedule in scheduler.wells.values()}
+        self.assertEqual(scheduler.wells['WELL-005'].interval, STATUS_INTERVALS['emergency'][0])
+        self.assertGreater(polls['emergency'], 3 * polls['active'])
+        self.assertGreater(polls['active'], polls['inactive'])
+
+    def test_status_change_triggers_poll(self):
+        clock, client, scheduler = self.make_scheduler(10, per_minute=60)
+        scheduler.run(duration=60, report_every=float('inf'))
+        schedule = scheduler.wells['WELL-005']
+        self.assertGreater(schedule.due, clock())
+
+        client.emergency_every = 5
+        scheduler.refresh_wells()
+        self.assertEqual(schedule.status, 'emergency')
+        self.assertEqual(schedule.due, clock())
+        polls = schedule.polls
+        # Перечитывание списка потратило запрос - ждем пополнения бюджета
+        clock.sleep(scheduler.budget.wait_time())
+        scheduler.step()
+        self.assertEqual(schedule.polls, polls + 1)
+
+    def test_well_list_failure_keeps_polling(self):
+        clock, client, scheduler = self.make_scheduler(10, per_minute=60)
+        scheduler.step()
+        clock.sleep(WELL_LIST_INTERVAL)
+        failure = TransportError('HTTP 503', status=503)
+        with mock.patch.object(client, 'get_wells_data', side_effect=failure) as get_wells_data:
+            scheduler.step()
+            self.assertEqual(len(scheduler.wells), 10)
+            self.assertEqual(scheduler.list_due, clock() + RETRY_DELAY)
+
+            # Телеметрия опрашивается по прежнему списку, список - не раньше RETRY_DELAY
+            clock.sleep(scheduler.budget.wait_time())
+            self.assertEqual(scheduler.step(), 10)
+            self.assertEqual(get_wells_data.call_count, 1)
+
+        clock.sleep(RETRY_DELAY)
+        scheduler.step()
+        self.assertEqual(scheduler.list_refreshed, clock())
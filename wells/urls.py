@@ -1,8 +1,30 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 
 urlpatterns = [
     path('wells/', views.WellListCreateAPIView.as_view(), name='well-list'),
-    path('wells/<int:id>/', views.WellRetrieveUpdateDestroyAPIView.as_view(), name='well-detail')
+    path('wells/fast/', views.WellFastListAPIView.as_view(), name='well-fast-list'),
+    path('wells/export.ndjson', views.WellExportAPIView.as_view(), name='well-export'),
+    path('wells/changes/', views.WellChangesAPIView.as_view(), name='well-changes'),
+    path('wells/bulk/', views.WellBulkSyncAPIView.as_view(), name='well-bulk-sync'),
+    path('wells/geo/radius/', views.WellRadiusAPIView.as_view(), name='well-geo-radius'),
+    path('wells/geo/bbox/', views.WellBBoxAPIView.as_view(), name='well-geo-bbox'),
+    path('wells/geo/nearest/', views.WellNearestAPIView.as_view(), name='well-geo-nearest'),
+    path('wells/telemetry/batch/', views.WellTelemetryBatchAPIView.as_view(), name='well-telemetry-batch'),
+    path('wells/<int:id>/', views.WellRetrieveUpdateDestroyAPIView.as_view(), name='well-detail'),
+    path('wells/<int:id>/nearest/', views.WellNearestAPIView.as_view(), name='well-nearest'),
+    path('wells/<int:id>/telemetry/', views.WellTelemetryAPIView.as_view(), name='well-telemetry'),
+    path('wells/<int:id>/telemetry/rollup/', views.WellTelemetryRollupAPIView.as_view(),
+         name='well-telemetry-rollup'),
+    path('wells/<int:id>/telemetry/export.csv', views.WellTelemetryExportAPIView.as_view(),
+         name='well-telemetry-export'),
+    path('telemetry/rollup/', views.FieldTelemetryRollupAPIView.as_view(), name='field-telemetry-rollup'),
+    path('recommendations/', views.RecommendationListAPIView.as_view(), name='recommendation-list'),
+
+    # Async-версии для ASGI-сервера
+    path('async/wells/', async_views.well_list, name='async-well-list'),
+    path('async/wells/events/', async_views.well_events, name='async-well-events'),
+    path('async/wells/live/', async_views.wells_live, name='async-wells-live'),
+    path('async/wells/<int:id>/', async_views.well_detail, name='async-well-detail'),
 ]
@@ -1,12 +1,124 @@
-from rest_framework import generics
-from .models import Well
-from .serializers import WellSerializer
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.http import StreamingHttpResponse
+from django.db.models import Case, IntegerField, Value, When
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from rest_framework import generics, status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .cache import LIST_VERSION_KEY, cached_response, detail_version_key
+from .filters import WellFilterBackend, WellOrderingFilter
+from .models import Recommendation, Well
+from .pagination import WellCursorPagination
+from .serializers import RecommendationSerializer, WellRowSerializer, WellSerializer
+from .services.bulk_sync import sync_external_wells
+from .services.changes import CursorExpired, InvalidCursor, changes_since
+from .services.downsampling import MODES as DOWNSAMPLING_MODES, downsample
+from .services.geo import NEAREST_MAX_KM, nearest, within_bbox, within_radius
+from .services.rollups import DAY, HOUR, RAW, load_field_rollup, load_well_rollup, plan_granularity
+from .services.telemetry import (
+    TELEMETRY_PARAMETERS, TELEMETRY_UNITS, iter_telemetry_csv, load_series, load_series_batch,
+    series_to_lists
+)
 
 
 class WellListCreateAPIView(generics.ListCreateAPIView):
-    """API для получения списка скважин и создания новых"""
+    """
+    API для получения списка скважин и создания новых.
+    Список постраничный (курсор в параметре cursor), поля ответа
+    можно ограничить параметром fields=well_number,status,current_pressure.
+    Фильтры и поиск - см. WellFilterBackend, сортировка - WellOrderingFilter.
+    """
     queryset = Well.objects.all()
     serializer_class = WellSerializer
+    pagination_class = WellCursorPagination
+    filter_backends = [WellFilterBackend, WellOrderingFilter]
+    ordering = ['well_number']
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.serializer_class.requested_fields(self.request)
+        if fields is not None:
+            # Читаем из БД только нужные колонки (+ ключи для курсора)
+            columns = {'status' if name == 'status_display' else name for name in fields}
+            ordering = WellOrderingFilter().get_ordering(self.request, queryset, self)
+            queryset = queryset.only('id', 'well_number', ordering[0].lstrip('-'), *columns)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        return cached_response(request, [LIST_VERSION_KEY], lambda: super(WellListCreateAPIView, self).list(
+            request, *args, **kwargs
+        ))
+
+
+class WellFastListAPIView(APIView):
+    """
+    Быстрый список скважин только для чтения.
+    GET /api/wells/fast/?fields=well_number,status
+    Отдает JSON-массив всех скважин в схеме WellSerializer потоком, без ModelSerializer.
+    """
+
+    def get(self, request):
+        fields = WellSerializer.requested_fields(request)
+        serializer = WellRowSerializer(fields)
+        return StreamingHttpResponse(
+            serializer.iter_json(Well.objects.order_by('well_number')),
+            content_type='application/json'
+        )
+
+
+class WellExportAPIView(APIView):
+    """
+    Выгрузка всех скважин в NDJSON потоком.
+    GET /api/wells/export.ndjson?fields=well_number,status
+    """
+
+    def get(self, request):
+        fields = WellSerializer.requested_fields(request)
+        response = StreamingHttpResponse(
+            WellRowSerializer(fields).iter_ndjson(Well.objects.order_by('well_number')),
+            content_type='application/x-ndjson'
+        )
+        response['Content-Disposition'] = 'attachment; filename="wells.ndjson"'
+        return response
+
+
+class CursorExpiredError(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = 'Курсор устарел: загрузите список скважин заново (без since)'
+    default_code = 'cursor_expired'
+
+
+class WellChangesAPIView(APIView):
+    """
+    Лента изменений скважин для инкрементального обновления.
+    GET /api/wells/changes/?since=<cursor>&page_size=500&fields=well_number,status
+    Возвращает скважины, измененные после курсора (updated), удаленные (deleted)
+    и новый курсор; при has_more=true следующую страницу запрашивают сразу.
+    Без since - весь список. Курсор старше срока хранения удалений - ответ 410.
+    """
+    default_page_size = 500
+    max_page_size = 5000
+
+    def get(self, request):
+        fields = WellSerializer.requested_fields(request)
+        page_size = _parse_int(request, 'page_size', self.default_page_size)
+        if page_size < 1:
+            raise ValidationError({'page_size': 'Ожидается положительное число'})
+        try:
+            changes = changes_since(
+                request.query_params.get('since'),
+                limit=min(page_size, self.max_page_size),
+                serializer=WellRowSerializer(fields)
+            )
+        except InvalidCursor:
+            raise ValidationError({'since': 'Некорректный курсор'})
+        except CursorExpired:
+            raise CursorExpiredError()
+        return Response(changes.as_dict())
 
 
 class WellRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
@@ -14,3 +126,366 @@ class WellRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Well.objects.all()
     serializer_class = WellSerializer
     lookup_field = 'id'
+
+    def retrieve(self, request, *args, **kwargs):
+        return cached_response(request, [detail_version_key(kwargs['id'])], lambda: super(
+            WellRetrieveUpdateDestroyAPIView, self
+        ).retrieve(request, *args, **kwargs))
+
+
+class WellBulkSyncAPIView(APIView):
+    """
+    API массовой синхронизации скважин из внешнего API.
+    POST /api/wells/bulk/ - список скважин в формате внешнего API или объект {"wells": [...]}
+    Возвращает количество созданных/обновленных/ошибочных записей и результат по каждой.
+    """
+    max_records = 10000
+
+    def post(self, request):
+        records = request.data.get('wells') if isinstance(request.data, dict) else request.data
+        if not isinstance(records, list):
+            raise ValidationError({'wells': 'Ожидается список скважин'})
+        if len(records) > self.max_records:
+            raise ValidationError({'wells': f'Не более {self.max_records} записей за один запрос'})
+
+        result = sync_external_wells(records)
+        return Response(result.as_dict())
+
+
+def _parse_unix_time(request, name):
+    """Читает параметр запроса с unix-временем (секунды)"""
+    value = request.query_params.get(name)
+    if value is None:
+        return None
+    try:
+        return datetime.fromtimestamp(int(value), tz=dt_timezone.utc)
+    except (ValueError, OverflowError, OSError):
+        raise ValidationError({name: 'Ожидается unix-время в секундах'})
+
+
+def _parse_int(request, name, default=None, low=None):
+    value = request.query_params.get(name)
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValidationError({name: 'Ожидается целое число'})
+    if low is not None and value < low:
+        raise ValidationError({name: f'Ожидается целое число не меньше {low}'})
+    return value
+
+
+def _parse_time_range(request, default_hours=24):
+    """
+    Период запроса: start/end (unix-время) или последние hours часов до end.
+    end по умолчанию - текущий момент.
+    """
+    start = _parse_unix_time(request, 'start')
+    end = _parse_unix_time(request, 'end') or timezone.now()
+    if start is None:
+        start = end - timedelta(hours=_parse_int(request, 'hours', default_hours))
+    return start, end
+
+
+class TelemetrySeriesMixin:
+    """Общая часть API истории телеметрии: параметры прореживания и формат ряда"""
+    max_points = 10000
+
+    def get_downsampling(self, request):
+        points = request.query_params.get('points')
+        mode = request.query_params.get('mode', 'lttb')
+        target = request.query_params.get('target', 'pressure')
+        if points is not None:
+            points = min(_parse_int(request, 'points'), self.max_points)
+        if mode not in DOWNSAMPLING_MODES:
+            raise ValidationError({'mode': f'Допустимые значения: {", ".join(DOWNSAMPLING_MODES)}'})
+        if target not in TELEMETRY_PARAMETERS:
+            raise ValidationError({'target': f'Допустимые значения: {", ".join(TELEMETRY_PARAMETERS)}'})
+        return points, mode, target
+
+    def series_payload(self, series, points, mode, target):
+        source_points = len(series['timestamps'])
+        if points is not None and source_points > points:
+            series = downsample(series, points, mode=mode, target=target)
+        return {
+            'telemetry': series_to_lists(series),
+            'points': len(series['timestamps']),
+            'source_points': source_points,
+        }
+
+
+class WellTelemetryAPIView(TelemetrySeriesMixin, APIView):
+    """
+    API истории телеметрии скважины.
+    GET /api/wells/{id}/telemetry/?start=<unix>&end=<unix>&points=500&mode=lttb
+    Без start/end возвращает данные за последние hours часов (по умолчанию 24).
+    Если задан points и замеров больше, ряд прореживается на сервере:
+    mode=lttb (по умолчанию), minmax или avg; target - ряд, по которому
+    выбираются точки в режимах lttb/minmax (по умолчанию pressure).
+    """
+
+    def get(self, request, id):
+        well = get_object_or_404(Well, id=id)
+
+        start, end = _parse_time_range(request)
+        points, mode, target = self.get_downsampling(request)
+        series = load_series(well, start, end)
+
+        return Response({
+            'well_id': well.well_number,
+            'parameters': list(TELEMETRY_PARAMETERS),
+            'units': TELEMETRY_UNITS,
+            **self.series_payload(series, points, mode, target),
+        })
+
+
+class WellTelemetryBatchAPIView(TelemetrySeriesMixin, APIView):
+    """
+    История телеметрии нескольких скважин одним запросом (для дашборда).
+    GET /api/wells/telemetry/batch/?ids=1,2,3&hours=24&points=100&mode=lttb
+    Параметры периода и прореживания - как у /api/wells/{id}/telemetry/.
+    Телеметрия всех скважин читается из БД одним запросом.
+    """
+    max_wells = 500
+
+    def get(self, request):
+        raw_ids = [value for value in request.query_params.get('ids', '').split(',') if value.strip()]
+        try:
+            ids = list(dict.fromkeys(int(value) for value in raw_ids))
+        except ValueError:
+            raise ValidationError({'ids': 'Ожидается список id скважин через запятую'})
+        if not ids:
+            raise ValidationError({'ids': 'Не указаны скважины'})
+        if len(ids) > self.max_wells:
+            raise ValidationError({'ids': f'Не более {self.max_wells} скважин за запрос'})
+
+        start, end = _parse_time_range(request)
+        points, mode, target = self.get_downsampling(request)
+
+        well_numbers = dict(Well.objects.filter(id__in=ids).values_list('id', 'well_number'))
+        found = [well_id for well_id in ids if well_id in well_numbers]
+        batch = load_series_batch(found, start, end)
+
+        return Response({
+            'parameters': list(TELEMETRY_PARAMETERS),
+            'units': TELEMETRY_UNITS,
+            'wells': [
+                {
+                    'id': well_id,
+                    'well_id': well_numbers[well_id],
+                    **self.series_payload(batch[well_id], points, mode, target),
+                }
+                for well_id in found
+            ],
+            'missing': [well_id for well_id in ids if well_id not in well_numbers],
+        })
+
+
+class WellTelemetryExportAPIView(APIView):
+    """
+    Выгрузка истории телеметрии скважины в CSV потоком.
+    GET /api/wells/{id}/telemetry/export.csv?start=<unix>&end=<unix>
+    Без start/end выгружается вся история.
+    """
+
+    def get(self, request, id):
+        well = get_object_or_404(Well, id=id)
+        start = _parse_unix_time(request, 'start')
+        end = _parse_unix_time(request, 'end')
+
+        response = StreamingHttpResponse(iter_telemetry_csv(well, start, end), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="telemetry_{well.well_number}.csv"'
+        return response
+
+
+class TelemetryRollupMixin:
+    """Общая часть API сверток телеметрии"""
+    default_points = 500
+
+    def get_plan(self, request, allow_raw):
+        start, end = _parse_time_range(request)
+        points = _parse_int(request, 'points', self.default_points)
+        granularity = request.query_params.get('granularity') or plan_granularity(start, end, points, allow_raw)
+        allowed = ([RAW] if allow_raw else []) + [HOUR, DAY]
+        if granularity not in allowed:
+            raise ValidationError({'granularity': f'Допустимые значения: {", ".join(allowed)}'})
+        return start, end, points, granularity
+
+    def rollup_response(self, series, granularity, **extra):
+        return Response({
+            **extra,
+            'granularity': granularity,
+            'parameters': list(TELEMETRY_PARAMETERS),
+            'units': TELEMETRY_UNITS,
+            'telemetry': {
+                'timestamps': series['timestamps'].tolist(),
+                **{name: series[f'{name}_avg'].round(3).tolist() for name in TELEMETRY_PARAMETERS},
+            },
+            'ranges': {
+                name: {'min': series[f'{name}_min'].tolist(), 'max': series[f'{name}_max'].tolist()}
+                for name in TELEMETRY_PARAMETERS
+            },
+            'counts': series['count'].tolist(),
+            'points': len(series['timestamps']),
+        })
+
+
+class WellTelemetryRollupAPIView(TelemetryRollupMixin, APIView):
+    """
+    Агрегированная телеметрия скважины для графиков за длинные периоды.
+    GET /api/wells/{id}/telemetry/rollup/?start=<unix>&end=<unix>&points=500
+    Детализация (raw/hour/day) выбирается по периоду и числу точек,
+    либо задается параметром granularity.
+    """
+
+    def get(self, request, id):
+        well = get_object_or_404(Well, id=id)
+        start, end, points, granularity = self.get_plan(request, allow_raw=True)
+
+        if granularity == RAW:
+            series = downsample(load_series(well, start, end), points, mode='avg')
+            return Response({
+                'well_id': well.well_number,
+                'granularity': RAW,
+                'parameters': list(TELEMETRY_PARAMETERS),
+                'units': TELEMETRY_UNITS,
+                'telemetry': series_to_lists(series),
+                'points': len(series['timestamps']),
+            })
+
+        series = load_well_rollup(well, granularity, start, end)
+        return self.rollup_response(series, granularity, well_id=well.well_number)
+
+
+class FieldTelemetryRollupAPIView(TelemetryRollupMixin, APIView):
+    """
+    Агрегированная телеметрия месторождения или всего фонда скважин.
+    GET /api/telemetry/rollup/?field=<месторождение>&start=<unix>&end=<unix>&points=500
+    Без field - по всем месторождениям. Используются только часовые и суточные свертки.
+    """
+
+    def get(self, request):
+        field = request.query_params.get('field')
+        start, end, points, granularity = self.get_plan(request, allow_raw=False)
+        series = load_field_rollup(field, granularity, start, end)
+        return self.rollup_response(series, granularity, field=field)
+
+
+def _parse_float(request, name, low, high, default=None):
+    value = request.query_params.get(name)
+    if value is None:
+        if default is None:
+            raise ValidationError({name: 'Обязательный параметр'})
+        return default
+    try:
+        value = float(value)
+    except ValueError:
+        raise ValidationError({name: 'Ожидается число'})
+    if not low <= value <= high:
+        raise ValidationError({name: f'Допустимый диапазон: {low}..{high}'})
+    return value
+
+
+class WellGeoMixin:
+    """
+    Общая часть пространственных запросов: параметр limit (по умолчанию 100)
+    и поля ответа fields - как у /api/wells/; к скважине добавляется distance_km.
+    """
+    default_limit = 100
+    max_limit = 1000
+
+    def geo_response(self, request, matches):
+        limit = min(_parse_int(request, 'limit', self.default_limit, low=0), self.max_limit)
+        page = matches[:limit]
+        serializer = WellRowSerializer(WellSerializer.requested_fields(request))
+        # id - последней колонкой, чтобы сохранить порядок совпадений
+        rows = Well.objects.filter(id__in=[match.id for match in page]).values_list(*serializer.columns, 'id')
+        by_id = {row[-1]: serializer.to_dict(row) for row in rows}
+
+        results = []
+        for match in page:
+            # Скважина могла быть удалена между поиском и чтением строк
+            item = by_id.get(match.id)
+            if item is None:
+                continue
+            if match.distance_km is not None:
+                item['distance_km'] = match.distance_km
+            results.append(item)
+        return Response({'count': len(matches), 'results': results})
+
+
+class WellRadiusAPIView(WellGeoMixin, APIView):
+    """
+    Скважины в радиусе от точки, по возрастанию расстояния.
+    GET /api/wells/geo/radius/?lat=61.2&lon=73.4&radius_km=25
+    """
+
+    def get(self, request):
+        lat = _parse_float(request, 'lat', -90, 90)
+        lon = _parse_float(request, 'lon', -180, 180)
+        radius_km = _parse_float(request, 'radius_km', 0, NEAREST_MAX_KM)
+        return self.geo_response(request, within_radius(lat, lon, radius_km))
+
+
+class WellBBoxAPIView(WellGeoMixin, APIView):
+    """
+    Скважины в прямоугольнике.
+    GET /api/wells/geo/bbox/?min_lat=60&min_lon=70&max_lat=62&max_lon=75
+    """
+
+    def get(self, request):
+        min_lat = _parse_float(request, 'min_lat', -90, 90)
+        min_lon = _parse_float(request, 'min_lon', -180, 180)
+        max_lat = _parse_float(request, 'max_lat', -90, 90)
+        max_lon = _parse_float(request, 'max_lon', -180, 180)
+        if min_lat > max_lat or min_lon > max_lon:
+            raise ValidationError({'bbox': 'min_lat/min_lon должны быть не больше max_lat/max_lon'})
+        return self.geo_response(request, within_bbox(min_lat, min_lon, max_lat, max_lon))
+
+
+class WellNearestAPIView(WellGeoMixin, APIView):
+    """
+    Ближайшие скважины к точке или к скважине (например, к аварийной).
+    GET /api/wells/geo/nearest/?lat=61.2&lon=73.4&n=10
+    GET /api/wells/{id}/nearest/?n=10 - сама скважина в ответ не входит
+    """
+    default_count = 10
+    max_count = 1000
+
+    def get(self, request, id=None):
+        count = min(_parse_int(request, 'n', self.default_count, low=0), self.max_count)
+        queryset = Well.objects.all()
+        if id is not None:
+            well = get_object_or_404(Well.objects.only('latitude', 'longitude'), id=id)
+            lat, lon = float(well.latitude), float(well.longitude)
+            queryset = queryset.exclude(id=id)
+        else:
+            lat = _parse_float(request, 'lat', -90, 90)
+            lon = _parse_float(request, 'lon', -180, 180)
+        return self.geo_response(request, nearest(lat, lon, count, queryset))
+
+
+class RecommendationListAPIView(generics.ListAPIView):
+    """
+    API рекомендаций по скважинам, от критических к низкоприоритетным.
+    GET /api/recommendations/?well=<id>&status=pending&priority=critical
+    """
+    serializer_class = RecommendationSerializer
+
+    def get_queryset(self):
+        queryset = Recommendation.objects.select_related('well')
+        well_id = _parse_int(self.request, 'well')
+        if well_id is not None:
+            if not 0 < well_id < 2 ** 63:
+                raise ValidationError({'well': 'Ожидается id скважины'})
+            queryset = queryset.filter(well_id=well_id)
+        for name in ('status', 'priority', 'type'):
+            value = self.request.query_params.get(name)
+            if value:
+                queryset = queryset.filter(**{name: value})
+        priority_rank = Case(
+            *[When(priority=code, then=Value(rank)) for rank, (code, _) in enumerate(Recommendation.PRIORITY_CHOICES)],
+            output_field=IntegerField()
+        )
+        return queryset.order_by(priority_rank, '-updated_at')